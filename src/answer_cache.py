@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+# Disk-backed cache of LLM answers, shared by every worker on the machine.
+
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "./.cache/answers.sqlite3")
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", question.strip().lower()).rstrip(" ?!.")
+
+
+def make_key(question: str, chunk_ids: list, chunk_hashes: list, model: str, system_prompt: str) -> str:
+    """Cache key over everything that shapes the answer."""
+    payload = json.dumps({
+        "question": normalize_question(question),
+        "chunk_ids": list(chunk_ids),
+        "chunk_hashes": list(chunk_hashes),
+        "model": model,
+        "system_prompt": system_prompt,
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """sqlite answer cache with a TTL and least-recently-used eviction above max_entries."""
+
+    def __init__(self, path: str = ANSWER_CACHE_PATH, ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY, question TEXT, answer TEXT,"
+                " created_at REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return closing(conn)
+
+    def get(self, key: str):
+        """Cached answer for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn, conn:
+            row = conn.execute(
+                "SELECT answer FROM answers WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key: str, question: str, answer: str):
+        now = time.time()
+        with self._lock, self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, question, answer, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, question, answer, now, now)
+            )
+            # Evict expired entries, then the least recently used beyond max_entries
+            conn.execute("DELETE FROM answers WHERE created_at <= ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                " SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self, *_args):
+        """Drop every cached answer (called when the index changes)."""
+        with self._lock, self._connect() as conn, conn:
+            conn.execute("DELETE FROM answers")
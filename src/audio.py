@@ -0,0 +1,101 @@
+import io
+import math
+import os
+import threading
+import numpy as np
+
+# In-memory preparation of microphone recordings for transcription: mono, 16 kHz,
+# leading/trailing silence trimmed, encoded to Ogg/Opus (FLAC fallback) in a BytesIO buffer.
+# TRANSCRIBE_BACKEND=local transcribes on this machine with faster-whisper instead of the API.
+
+TARGET_RATE = 16000
+AUDIO_FORMAT = os.getenv("AUDIO_FORMAT", "opus")  # opus | flac
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "openai")  # openai | local
+LOCAL_WHISPER_MODEL = os.getenv("LOCAL_WHISPER_MODEL", "base")
+
+# Energy VAD: 30 ms frames quieter than VAD_THRESHOLD_DB below the loudest frame are silence
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-35"))
+VAD_PADDING_MS = 200
+
+
+# ---------------- Utility Methods ----------------
+def to_mono_float(audio_array: np.ndarray) -> np.ndarray:
+    """float32 samples in [-1, 1], channels averaged."""
+    x = np.asarray(audio_array)
+    if np.issubdtype(x.dtype, np.integer):
+        x = x.astype(np.float32) / np.iinfo(x.dtype).max
+    else:
+        x = x.astype(np.float32)
+    if x.ndim == 2:
+        x = x.mean(axis=1)
+    return x
+
+
+def resample(x: np.ndarray, rate: int, target: int = TARGET_RATE) -> np.ndarray:
+    """Polyphase resampling to the target rate."""
+    if rate == target or not len(x):
+        return x
+    from scipy.signal import resample_poly
+    g = math.gcd(int(rate), int(target))
+    return resample_poly(x, target // g, int(rate) // g).astype(np.float32)
+
+
+def trim_silence(x: np.ndarray, rate: int = TARGET_RATE, threshold_db: float = VAD_THRESHOLD_DB) -> np.ndarray:
+    """Cut leading and trailing frames whose RMS is threshold_db below the loudest frame."""
+    frame = max(1, rate * VAD_FRAME_MS // 1000)
+    n_frames = len(x) // frame
+    if n_frames == 0:
+        return x
+    rms = np.sqrt(np.mean(x[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    voiced = np.flatnonzero(rms >= rms.max() * 10 ** (threshold_db / 20))
+    if not len(voiced) or rms.max() == 0:
+        return x[:0]
+    padding = rate * VAD_PADDING_MS // 1000
+    start = max(0, voiced[0] * frame - padding)
+    end = min(len(x), (voiced[-1] + 1) * frame + padding)
+    return x[start:end]
+
+
+def encode(x: np.ndarray, rate: int = TARGET_RATE, audio_format: str = AUDIO_FORMAT):
+    """(filename, bytes, mime type) of the samples in a compact codec, ready to upload."""
+    import soundfile as sf
+    buffer = io.BytesIO()
+    if audio_format == "opus":
+        try:
+            sf.write(buffer, x, rate, format="OGG", subtype="OPUS")
+            return "speech.ogg", buffer.getvalue(), "audio/ogg"
+        except (sf.LibsndfileError, ValueError, TypeError):
+            buffer = io.BytesIO()  # libsndfile built without Opus
+    sf.write(buffer, x, rate, format="FLAC")
+    return "speech.flac", buffer.getvalue(), "audio/flac"
+
+
+def prepare(sample_rate: int, audio_array: np.ndarray):
+    """Mono 16 kHz trimmed samples plus stats about how much the recording shrank."""
+    x = trim_silence(resample(to_mono_float(audio_array), sample_rate))
+    stats = {
+        "input_seconds": round(len(audio_array) / sample_rate, 2),
+        "speech_seconds": round(len(x) / TARGET_RATE, 2),
+        "input_bytes": int(np.asarray(audio_array).nbytes),
+    }
+    return x, stats
+
+
+# ---------------- Local transcription ----------------
+_local_model = None
+_local_model_lock = threading.Lock()
+
+
+def transcribe_local(x: np.ndarray) -> str:
+    """Transcribe 16 kHz mono float samples with faster-whisper (optional dependency)."""
+    global _local_model
+    with _local_model_lock:
+        if _local_model is None:
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError as e:
+                raise RuntimeError("TRANSCRIBE_BACKEND=local needs `pip install faster-whisper`") from e
+            _local_model = WhisperModel(LOCAL_WHISPER_MODEL, device="cpu", compute_type="int8")
+    segments, _info = _local_model.transcribe(x, language="en", vad_filter=False)
+    return " ".join(segment.text.strip() for segment in segments)
@@ -0,0 +1,337 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import data_cleanup
+import data_prep
+import data_prune
+import file_read
+import lexical
+import retrieval
+
+# Stage-level benchmarks on a synthetic corpus grown from the dataset (1x .. 10,000x rows):
+#   python benchmark.py --scales 1,10,100,1000 --output bench.json --baseline last_bench.json
+# Each stage is timed per scale; per-row cost that grows with scale shows which stage stops scaling.
+
+DEFAULT_SCALES = "1,10,100"
+DEFAULT_STAGES = "read,clean,fighter_index,prune,data_prep,embed,index_build,query"
+REGRESSION_THRESHOLD = 0.20  # slower than baseline by more than this fraction fails the run
+REGRESSION_MIN_SECONDS = 0.005  # ignore changes smaller than timer noise
+EMBED_LIMIT = 2000  # embedding and vector index stages use at most this many chunks
+QUERY_COUNT = 100
+
+FIGHTER_POOL = 200
+METHODS = ["KO/TKO", "Submission", "Decision (Unanimous)", "Decision (Split)", "TKO (Doctor Stoppage)"]
+OUTCOMES = ["Win", "Loss", "Draw"]
+WEIGHT_CLASSES = ["Flyweight", "Bantamweight", "Featherweight", "Lightweight", "Welterweight"]
+
+
+# ---------------- Synthetic corpus ----------------
+def _sentences(texts) -> list:
+    sentences = [s.strip() + "." for text in texts for s in str(text).split(".") if len(s.strip()) > 20]
+    return sentences or ["Rabindra Dhant is a Nepali mixed martial artist."]
+
+
+def synthetic_frame(base: pd.DataFrame, scale: int, seed: int = 0) -> pd.DataFrame:
+    """len(base) * scale rows with the dataset's columns, realistic JSON columns and chunk text."""
+    rng = np.random.default_rng(seed)
+    n = len(base) * scale
+    chunks_per_item = 4
+
+    fighters = np.array(["Rabindra Dhant"] + sorted(
+        set(base["fighter_a"].dropna()) | set(base["fighter_b"].dropna()) - {"Rabindra Dhant"}
+    ) + [f"Fighter {i:03d}" for i in range(FIGHTER_POOL)], dtype=object)
+    fighter_a = fighters[rng.integers(0, len(fighters), n)]
+    fighter_b = fighters[rng.integers(1, len(fighters), n)]
+    fighter_b = np.where(fighter_b == fighter_a, fighters[-1], fighter_b)
+
+    sentences = np.array(_sentences(base["chunk_text"].dropna()), dtype=object)
+    sentence_counts = rng.integers(6, 11, n)
+    picks = rng.integers(0, len(sentences), sentence_counts.sum())
+    chunk_text = [" ".join(sentences[picks[end - count:end]])
+                  for count, end in zip(sentence_counts, np.cumsum(sentence_counts))]
+    lengths = np.array([len(t) for t in chunk_text])
+
+    item = np.arange(n) // chunks_per_item
+    chunk_index = np.arange(n) % chunks_per_item
+    starts = np.zeros(n, dtype=np.int64)
+    for i in range(1, chunks_per_item):
+        # Offsets run on within each item, so adjacent chunks are contiguous
+        at = chunk_index == i
+        starts[at] = starts[np.flatnonzero(at) - 1] + lengths[np.flatnonzero(at) - 1]
+
+    wins_a, losses_a = rng.integers(0, 30, n), rng.integers(0, 10, n)
+    wins_b, losses_b = rng.integers(0, 30, n), rng.integers(0, 10, n)
+    stats_json = [
+        json.dumps({"fighter_a_record_at_fight": f"{wa}-{la}-0", "fighter_b_record_at_fight": f"{wb}-{lb}-0",
+                    "community_picks_a": int(p), "community_picks_b": 100 - int(p)})
+        for wa, la, wb, lb, p in zip(wins_a, losses_a, wins_b, losses_b, rng.integers(0, 101, n))
+    ]
+    extras_json = [
+        json.dumps({"fighter_a_height_cm": int(ha), "fighter_b_height_cm": int(hb),
+                    "fighter_a_age_at_fight_years": int(aa), "fighter_b_age_at_fight_years": int(ab),
+                    "billing": "Main Event" if main else "Undercard"})
+        for ha, hb, aa, ab, main in zip(rng.integers(160, 190, n), rng.integers(160, 190, n),
+                                        rng.integers(19, 38, n), rng.integers(19, 38, n), rng.random(n) < 0.2)
+    ]
+
+    def sample(column):
+        values = base[column].dropna().to_numpy(dtype=object)
+        return values[rng.integers(0, len(values), n)] if len(values) else np.full(n, None, dtype=object)
+
+    dates = pd.Timestamp("2018-01-01") + pd.to_timedelta(rng.integers(0, 2800, n), unit="D")
+    df = pd.DataFrame({
+        "item_id": [f"syn_{i}" for i in item],
+        "source_url": [f"https://example.com/mma/{i}" for i in item],
+        "source_type": sample("source_type"),
+        "source_title": sample("source_title"),
+        "author_or_channel": sample("author_or_channel"),
+        "published_date": dates.strftime("%Y-%m-%d"),
+        "accessed_date": "2025-08-20",
+        "language": "en",
+        "entities": [f"{a}, {b}" for a, b in zip(fighter_a, fighter_b)],
+        "tags": sample("tags"),
+        "org_promotion": sample("org_promotion"),
+        "event_name": [f"Fight Night {i % 500}" for i in item],
+        "event_date": dates.strftime("%Y-%m-%d"),
+        "location_city": sample("location_city"),
+        "location_country": sample("location_country"),
+        "fighter_a": fighter_a,
+        "fighter_b": fighter_b,
+        "weight_class": np.array(WEIGHT_CLASSES, dtype=object)[rng.integers(0, len(WEIGHT_CLASSES), n)],
+        "odds_a": np.round(rng.uniform(1.1, 4.0, n), 2),
+        "odds_b": np.round(rng.uniform(1.1, 4.0, n), 2),
+        "outcome": np.array(OUTCOMES, dtype=object)[rng.choice(3, n, p=[0.6, 0.35, 0.05])],
+        "method": np.array(METHODS, dtype=object)[rng.integers(0, len(METHODS), n)],
+        "round": rng.integers(1, 6, n),
+        "time_mmss": [f"{m}:{s:02d}" for m, s in zip(rng.integers(0, 5, n), rng.integers(0, 60, n))],
+        "stats_json": stats_json,
+        "extras_json": extras_json,
+        "content_hash_sha1": [f"{i:040x}" for i in item],
+        "chunk_index": chunk_index,
+        "char_start": starts,
+        "char_end": starts + lengths,
+        "token_est": lengths // 4 + 1,
+        "chunk_text": chunk_text,
+    })
+
+    # Real files have gaps: blank out ~10% of the optional columns
+    for column in ["author_or_channel", "org_promotion", "location_city", "odds_a", "odds_b",
+                   "stats_json", "extras_json", "time_mmss"]:
+        df.loc[rng.random(n) < 0.1, column] = None
+    return df.reindex(columns=base.columns)
+
+
+def write_corpus(base: pd.DataFrame, scale: int, directory: str, seed: int = 0) -> str:
+    path = os.path.join(directory, f"synthetic-{scale}x.txt")
+    synthetic_frame(base, scale, seed).to_csv(path, index=False)
+    return path
+
+
+# ---------------- Stages ----------------
+def _unit_vectors(n: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, 384)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def stage_functions(state: dict) -> dict:
+    """Stage name -> (callable, rows it processes). Stages record their outputs in state for later ones."""
+    def read():
+        state["df"] = file_read.readFile(state["path"], use_snapshot=False)
+
+    def clean():
+        state["cleaned"] = data_cleanup.clean_data(state["df"].copy())
+
+    def fighter_index():
+        index = data_cleanup.FighterIndex(state["cleaned"])
+        data_cleanup.filter_rabindra_fights(state["cleaned"], index)
+
+    def prune():
+        data_prune.prune_missing_values(state["df"])
+
+    def prep():
+        df = state["df"]
+        data_prep.to_seconds_mmss_series(df["time_mmss"])
+        data_prep.coalesce_series(df["fighter_b"], df["entities"])
+        data_prep.expand_json_column(df["stats_json"])
+        data_prep.expand_json_column(df["extras_json"])
+
+    def embed():
+        if "embedder" not in state:
+            import embeddings
+            state["embedder"] = embeddings.Embedder()
+        state["vectors"] = state["embedder"].encode(state["texts"])
+
+    def index_build():
+        import vector_store
+        vectors = state.get("vectors")
+        if vectors is None:
+            vectors = _unit_vectors(len(state["texts"]))
+        path = os.path.join(state["workdir"], f"store-{time.perf_counter_ns()}")
+        store = vector_store.open_store(state["store"], path)
+        for start in range(0, len(state["ids"]), 5000):
+            end = start + 5000
+            store.upsert(state["ids"][start:end], state["texts"][start:end], vectors[start:end],
+                         state["metadatas"][start:end])
+        store.commit()
+        state["index"] = store
+        state["bm25"] = lexical.BM25Index(state["ids"], state["texts"])
+
+    def query():
+        store = state.get("index")
+        if store is None:
+            index_build()
+            store = state["index"]
+        queries = state.get("vectors")
+        if queries is None:
+            queries = _unit_vectors(len(state["texts"]))
+        latencies = []
+        for i in range(QUERY_COUNT):
+            start = time.perf_counter()
+            store.search(queries[i % len(queries)], 5)
+            state["bm25"].search(state["texts"][i % len(state["texts"])][:80], 5)
+            latencies.append(time.perf_counter() - start)
+        state["query_latencies"] = latencies
+
+    rows = state["rows"]
+    indexed = len(state.get("ids", []))
+    return {
+        "read": (read, rows),
+        "clean": (clean, rows),
+        "fighter_index": (fighter_index, rows),
+        "prune": (prune, rows),
+        "data_prep": (prep, rows),
+        "embed": (embed, indexed),
+        "index_build": (index_build, indexed),
+        "query": (query, QUERY_COUNT),
+    }
+
+
+def time_stage(fn, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # stages print a lot
+            fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(scales: list, stages: list, repeat: int = 3, store: str = "faiss", embed_limit: int = EMBED_LIMIT,
+        seed: int = 0) -> dict:
+    """Time every stage at every scale; returns the JSON-serialisable results document."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        base = file_read.readFile()
+    results = []
+    workdir = tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        for scale in scales:
+            path = write_corpus(base, scale, workdir, seed)
+            state = {"path": path, "workdir": workdir, "store": store, "rows": len(base) * scale}
+            with contextlib.redirect_stdout(io.StringIO()):
+                state["df"] = file_read.readFile(path, use_snapshot=False)
+                state["cleaned"] = data_cleanup.clean_data(state["df"].copy())
+            ids, texts, metadatas = retrieval.chunk_records(state["df"].head(embed_limit))
+            state.update(ids=ids, texts=texts, metadatas=metadatas)
+
+            functions = stage_functions(state)
+            for name in stages:
+                fn, rows = functions[name]
+                try:
+                    timings = time_stage(fn, repeat)
+                except Exception as e:
+                    print(f"{name} @ {scale}x skipped: {e}")
+                    continue
+                seconds = statistics.median(timings)
+                result = {
+                    "stage": name,
+                    "scale": scale,
+                    "rows": rows,
+                    "seconds": round(seconds, 6),
+                    "min_seconds": round(min(timings), 6),
+                    "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+                }
+                if name == "query":
+                    latencies = np.array(state["query_latencies"]) * 1000
+                    result.update(p50_ms=round(float(np.percentile(latencies, 50)), 3),
+                                  p99_ms=round(float(np.percentile(latencies, 99)), 3))
+                results.append(result)
+                print(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        # readFile leaves a quarantine report per parsed file
+        for leftover in glob.glob(os.path.join(file_read.SNAPSHOT_DIR, "synthetic-*")):
+            os.remove(leftover)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "results": results,
+    }
+
+
+# ---------------- Reporting ----------------
+def scaling_report(document: dict) -> pd.DataFrame:
+    """Per-row cost of each stage at each scale, relative to its smallest scale (1.0 = linear)."""
+    df = pd.DataFrame(document["results"])
+    if df.empty:
+        return df
+    df = df[df["rows"] > 0].assign(us_per_row=lambda d: d["seconds"] / d["rows"] * 1e6)
+    first = df.sort_values("scale").groupby("stage")["us_per_row"].transform("first")
+    df["vs_smallest"] = (df["us_per_row"] / first).round(2)
+    return df.pivot(index="stage", columns="scale", values="vs_smallest")
+
+
+def regressions(document: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """Stages/scales whose median time grew by more than threshold against the baseline run."""
+    previous = {(r["stage"], r["scale"]): r["seconds"] for r in baseline.get("results", [])}
+    slower = []
+    for result in document["results"]:
+        before = previous.get((result["stage"], result["scale"]))
+        if before and result["seconds"] > before * (1 + threshold) \
+                and result["seconds"] - before > REGRESSION_MIN_SECONDS:
+            slower.append({"stage": result["stage"], "scale": result["scale"], "baseline_seconds": before,
+                           "seconds": result["seconds"], "change": round(result["seconds"] / before - 1, 3)})
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage on a scaled synthetic corpus.")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="corpus sizes as multiples of the dataset, up to 10000")
+    parser.add_argument("--stages", default=DEFAULT_STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--store", default="faiss", help="vector store for index_build/query (chroma | faiss)")
+    parser.add_argument("--embed-limit", type=int, default=EMBED_LIMIT)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    document = run([int(s) for s in args.scales.split(",")], args.stages.split(","), args.repeat,
+                   args.store, args.embed_limit)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results -> {args.output}")
+
+    print("\nPer-row cost vs. smallest scale (1.0 = linear scaling):")
+    print(scaling_report(document).to_string())
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            slower = regressions(document, json.load(f), args.threshold)
+        for regression in slower:
+            print("REGRESSION:", regression)
+        sys.exit(1 if slower else 0)
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import re
+
+# Packs retrieved chunks into the prompt context: duplicates dropped, adjacent chunks of the
+# same source merged under one header, and chunks added in rank order until the token budget is spent.
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CHARS_PER_TOKEN = 4
+
+HEADER_FIELDS = [
+    ("Source Title", "source_title"),
+    ("Author", "author_or_channel"),
+    ("Published Date", "published_date"),
+    ("Source URL", "source_url"),
+    ("Also Reported By", "merged_sources"),
+    ("Tags", "tags"),
+    ("Entities", "entities"),
+]
+EMPTY_VALUES = {"", "n/a", "na", "nan", "none", "null"}
+
+_SHA1 = re.compile(r"^[0-9a-f]{40}$")
+_BOILERPLATE = re.compile(
+    r"^\s*(advertisement|share( this)?( on \w+)?|subscribe\b.*|follow us\b.*|read more\b.*|click here\b.*"
+    r"|sign up\b.*|related( articles| posts)?:?|all rights reserved\.?|©.*|copyright\b.*|cookie.*)\s*$",
+    re.IGNORECASE
+)
+
+
+# ---------------- Utility Methods ----------------
+def _number(value):
+    """float(value), or None for missing/garbage values."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+def estimate_tokens(text: str, token_est=None) -> int:
+    """The stored token_est when it is a usable count, otherwise ~4 characters per token."""
+    stored = _number(token_est)
+    if stored is not None and stored > 0:
+        return int(stored)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop share/subscribe/copyright style lines and blank runs from chunk text."""
+    lines = [line for line in text.splitlines() if not _BOILERPLATE.match(line)]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def source_key(meta: dict) -> str:
+    """Chunks of one source share a key: the content hash when it is a real SHA1, else item_id."""
+    content_hash = str(meta.get("content_hash_sha1", "")).strip().lower()
+    if _SHA1.match(content_hash):
+        return content_hash
+    return str(meta.get("item_id", "")) or str(meta.get("source_url", ""))
+
+
+def header_lines(meta: dict) -> list:
+    """Metadata lines for a source, skipping empty / N/A fields."""
+    return [f"{label}: {meta.get(field)}" for label, field in HEADER_FIELDS
+            if str(meta.get(field, "")).strip().lower() not in EMPTY_VALUES]
+
+
+def _span(meta: dict):
+    """(char_start, char_end) when both offsets are valid, else None."""
+    start, end = _number(meta.get("char_start")), _number(meta.get("char_end"))
+    if start is None or end is None or end <= start:
+        return None
+    return int(start), int(end)
+
+
+def _adjacent(previous: dict, current: dict) -> bool:
+    """Whether current continues previous in the source (by chunk_index or char offsets)."""
+    prev_span, span = _span(previous["meta"]), _span(current["meta"])
+    if prev_span and span:
+        return span[0] <= prev_span[1] + 1
+    prev_index, index = _number(previous["meta"].get("chunk_index")), _number(current["meta"].get("chunk_index"))
+    return prev_index is not None and index is not None and index == prev_index + 1
+
+
+def _merge_text(previous: dict, current: dict) -> str:
+    """current's text without the part that overlaps previous (per char offsets)."""
+    prev_span, span = _span(previous["meta"]), _span(current["meta"])
+    if prev_span and span and span[0] < prev_span[1]:
+        return current["text"][prev_span[1] - span[0]:]
+    return current["text"]
+
+
+def pack_context(documents: list, metadatas: list, budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Prompt context from ranked chunks, within budget tokens (the top chunk is always kept)."""
+    sources, seen, used = {}, set(), 0
+    for rank, (doc, meta) in enumerate(zip(documents, metadatas)):
+        meta = meta or {}
+        text = strip_boilerplate(doc or "")
+        if not text:
+            continue
+
+        # The same chunk under a different id (re-ingested or copied source)
+        key = source_key(meta)
+        position = _number(meta.get("chunk_index"))
+        identity = (key, position) if position is not None else hashlib.sha1(text.encode("utf-8")).hexdigest()
+        text_hash = hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+        if identity in seen or text_hash in seen:
+            continue
+
+        tokens = estimate_tokens(text, meta.get("token_est") if text == doc else None)
+        if key not in sources:
+            tokens += estimate_tokens("\n".join(header_lines(meta)))
+        if used + tokens > budget and sources:
+            continue
+
+        seen.update((identity, text_hash))
+        used += tokens
+        source = sources.setdefault(key, {"rank": rank, "meta": meta, "chunks": []})
+        source["chunks"].append({"text": text, "meta": meta, "position": position})
+
+    blocks = []
+    for source in sorted(sources.values(), key=lambda s: s["rank"]):
+        # Source order, so adjacent chunks read as one passage
+        chunks = sorted(source["chunks"], key=lambda c: (c["position"] is None, c["position"] or 0))
+        passages = [chunks[0]["text"]]
+        for previous, current in zip(chunks, chunks[1:]):
+            if _adjacent(previous, current):
+                passages[-1] = passages[-1].rstrip() + " " + _merge_text(previous, current).lstrip()
+            else:
+                passages.append(current["text"])
+        blocks.append("\n".join(header_lines(source["meta"]) + ["", "Content:", "\n\n[...]\n\n".join(passages)]))
+    return "\n\n---\n\n".join(blocks)
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+import context_packer
+
+# Per-session chat memory: the raw question/answer text (not the chatbot's display HTML),
+# recent turns kept verbatim within a token budget and older turns folded into a rolling summary.
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "800"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "200"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1000"))
+
+
+def turn_tokens(turn: tuple) -> int:
+    return sum(context_packer.estimate_tokens(text) for text in turn)
+
+
+def truncate_summary(text: str, budget: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """Keep the most recent part of a summary that fits the budget."""
+    max_chars = budget * context_packer.CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else "..." + text[-max_chars:]
+
+
+class ConversationMemory:
+    """Raw turns of one chat session, bounded by HISTORY_TOKEN_BUDGET plus a rolling summary."""
+
+    def __init__(self, budget: int = HISTORY_TOKEN_BUDGET, summary_budget: int = SUMMARY_TOKEN_BUDGET):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.turns = []  # (question, answer) not yet folded into the summary
+        self.summary = ""
+        self._lock = asyncio.Lock()
+
+    def reset(self):
+        self.turns, self.summary = [], ""
+
+    def add_turn(self, question: str, answer: str):
+        self.turns.append((question, answer))
+
+    def _window_start(self) -> int:
+        """Index of the oldest turn that still fits the budget (newest turns first)."""
+        used, start = 0, len(self.turns)
+        while start > 0:
+            used += turn_tokens(self.turns[start - 1])
+            if used > self.budget:
+                break
+            start -= 1
+        return start
+
+    def messages(self) -> list:
+        """Chat messages for the summary and the recent turns that fit the budget."""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": "Summary of the earlier conversation: " + self.summary})
+        for question, answer in self.turns[self._window_start():]:
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+        return messages
+
+    async def compact(self, summarize):
+        """Fold turns that fell out of the budget into the summary.
+
+        summarize(summary, turns) is an async callable returning the new summary text;
+        if it fails the old turns are appended to the summary verbatim and truncated.
+        """
+        async with self._lock:
+            start = self._window_start()
+            if start == 0:
+                return
+            overflow, self.turns = self.turns[:start], self.turns[start:]
+            try:
+                summary = await summarize(self.summary, overflow)
+            except Exception as e:
+                print(f"History summary failed: {e}")
+                summary = " ".join([self.summary] + [f"Q: {q} A: {a}" for q, a in overflow])
+            self.summary = truncate_summary(summary.strip(), self.summary_budget)
+
+
+# ---------------- Sessions ----------------
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_session(session_id: str) -> ConversationMemory:
+    """Memory for a session, created on first use; the least recently used sessions are dropped."""
+    with _sessions_lock:
+        memory = _sessions.pop(session_id, None) or ConversationMemory()
+        _sessions[session_id] = memory
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+        return memory
@@ -1,7 +1,26 @@
 import pandas as pd
+import numpy as np
 import json
+from difflib import SequenceMatcher
 import networkx as nx
 import file_read
+import data_prep
+
+# JSON keys pulled out as columns by clean_data (source key -> column name)
+STATS_FIELDS = {
+    'fighter_a_record_at_fight': 'fighter_a_record_at_fight',
+    'fighter_b_record_at_fight': 'fighter_b_record_at_fight',
+}
+EXTRAS_FIELDS = {
+    'fighter_a_age_at_fight_years': 'fighter_a_age',
+    'fighter_b_age_at_fight_years': 'fighter_b_age',
+    'fighter_a_height_cm': 'fighter_a_height_cm',
+    'fighter_b_height_cm': 'fighter_b_height_cm',
+}
+# Spellings of one name at least this similar (and sharing the surname) are one fighter,
+# e.g. "Chungren Koren" / "Chungreng Koren"
+NAME_MATCH_RATIO = 0.9
+
 # ---------------- Utility Methods ----------------
 def parse_json_safe(x):
     """Safely parse JSON strings into dicts."""
@@ -11,56 +30,163 @@ def parse_json_safe(x):
         return {}
 
 
+def name_aliases(keys, sources) -> dict:
+    """Variant name key -> canonical key for near-identical spellings of one fighter.
+
+    keys are lowercased names and sources the item each mention came from; the spelling
+    used by the most distinct sources is canonical.
+    """
+    mentions = pd.DataFrame({'key': keys, 'source': sources}).dropna(subset=['key'])
+    support = mentions.groupby('key', sort=False)['source'].nunique().sort_values(ascending=False, kind='stable')
+    canonical, aliases = {}, {}  # surname -> canonical keys seen so far
+    for key in support.index:
+        words = key.split()
+        if not words:
+            continue
+        known = canonical.setdefault(words[-1], [])
+        match = next((c for c in known if SequenceMatcher(None, key, c).ratio() >= NAME_MATCH_RATIO), None)
+        if match is None:
+            known.append(key)
+        else:
+            aliases[key] = match
+    return aliases
+
+
 # ---------------- Data Processing ----------------
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     """Clean dataframe: fix types, drop duplicates, parse JSON fields."""
-    # Convert dates
-    df['published_date'] = pd.to_datetime(df['published_date'], errors='coerce')
-    df['accessed_date'] = pd.to_datetime(df['accessed_date'], errors='coerce')
+    # Convert dates, counting non-empty values that could not be parsed (for the quality profile)
+    date_failures = {}
+    for column in ['published_date', 'accessed_date']:
+        raw = df[column]
+        df[column] = pd.to_datetime(raw, errors='coerce')
+        date_failures[column] = int((raw.notna() & raw.astype('string').str.strip().ne("") & df[column].isna()).sum())
+    df.attrs['date_failures'] = date_failures
 
     # Drop duplicates
+    rows = len(df)
     df.drop_duplicates(inplace=True)
+    df.attrs['duplicates_dropped'] = rows - len(df)
 
-    # Parse JSON fields
-    df['stats'] = df['stats_json'].apply(parse_json_safe)
-    df['extras'] = df['extras_json'].apply(parse_json_safe)
+    # Parse JSON fields once and expand their keys into typed columns
+    df['stats'], stats, stats_fallback = data_prep.expand_json_column(df['stats_json'])
+    df['extras'], extras, extras_fallback = data_prep.expand_json_column(df['extras_json'])
+    df.attrs['json_fallback'] = {'stats_json': stats_fallback, 'extras_json': extras_fallback}
+    if stats_fallback or extras_fallback:
+        print("JSON cells needing slow fallback:", df.attrs['json_fallback'])
 
     # Extract selected stats
-    df['fighter_a_record_at_fight'] = df['stats'].apply(lambda x: x.get('fighter_a_record_at_fight'))
-    df['fighter_b_record_at_fight'] = df['stats'].apply(lambda x: x.get('fighter_b_record_at_fight'))
+    selected = pd.concat([
+        stats.reindex(columns=list(STATS_FIELDS)).rename(columns=STATS_FIELDS),
+        extras.reindex(columns=list(EXTRAS_FIELDS)).rename(columns=EXTRAS_FIELDS),
+    ], axis=1)
+    df[selected.columns] = selected
 
-    df['fighter_a_age'] = df['extras'].apply(lambda x: x.get('fighter_a_age_at_fight_years'))
-    df['fighter_b_age'] = df['extras'].apply(lambda x: x.get('fighter_b_age_at_fight_years'))
+    return df
 
-    df['fighter_a_height_cm'] = df['extras'].apply(lambda x: x.get('fighter_a_height_cm'))
-    df['fighter_b_height_cm'] = df['extras'].apply(lambda x: x.get('fighter_b_height_cm'))
 
-    return df
+# Columns carried into the bout perspective table
+BOUT_COLUMNS = ['item_id', 'event_name', 'event_date', 'weight_class', 'method', 'round',
+                'time_mmss', 'source_url']
+
+# Outcome as seen from fighter_b's corner; anything else (Draw, NC, ...) is unchanged
+OUTCOME_FLIP = {'win': 'Loss', 'loss': 'Win'}
+
+
+class FighterIndex:
+    """Bout perspective table (one row per fighter per bout) indexed by fighter name."""
+
+    def __init__(self, df: pd.DataFrame):
+        carried = df.reindex(columns=BOUT_COLUMNS)
+        position = np.arange(len(df))
+        outcome = df['outcome'].astype('string')
+
+        side_a = carried.assign(bout_row=df.index, bout_pos=position, side='a',
+                                fighter=df['fighter_a'], opponent=df['fighter_b'],
+                                fighter_outcome=outcome)
+        side_b = carried.assign(bout_row=df.index, bout_pos=position, side='b',
+                                fighter=df['fighter_b'], opponent=df['fighter_a'],
+                                fighter_outcome=outcome.str.lower().map(OUTCOME_FLIP).fillna(outcome))
+
+        bouts = pd.concat([side_a, side_b], ignore_index=True)
+        bouts = bouts[bouts['fighter'].notna()].sort_values(['bout_pos', 'side'], kind='stable')
+        bouts['fighter_key'] = bouts['fighter'].astype('string').str.strip().str.lower()
+
+        # Variant spellings are folded into one fighter, shown under the canonical spelling
+        self.aliases = name_aliases(bouts['fighter_key'], bouts['item_id'])
+        spelling = dict(zip(bouts['fighter_key'][::-1], bouts['fighter'][::-1]))
+        bouts['fighter_key'] = bouts['fighter_key'].replace(self.aliases)
+        bouts['fighter'] = bouts['fighter_key'].map(spelling)
+        opponent_key = bouts['opponent'].astype('string').str.strip().str.lower().replace(self.aliases)
+        bouts['opponent'] = opponent_key.map(spelling).fillna(bouts['opponent'])
+        self.bouts = bouts.reset_index(drop=True)
 
+        # fighter_key -> positions in self.bouts, built in a single groupby
+        self._positions = self.bouts.groupby('fighter_key').indices
 
-def filter_rabindra_fights(df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def key(fighter: str) -> str:
+        return str(fighter).strip().lower()
+
+    def canonical(self, fighter) -> str:
+        """Key of the fighter a name (or variant spelling) refers to."""
+        key = self.key(fighter)
+        return self.aliases.get(key, key)
+
+    def __contains__(self, fighter) -> bool:
+        return self.canonical(fighter) in self._positions
+
+    def fighters(self) -> list:
+        """All fighter names in the index."""
+        return self.bouts['fighter'].drop_duplicates().tolist()
+
+    def fights(self, fighter: str) -> pd.DataFrame:
+        """Bouts for one fighter, from their own perspective."""
+        positions = self._positions.get(self.canonical(fighter), np.empty(0, dtype=int))
+        return self.bouts.iloc[positions]
+
+
+def filter_fighter_fights(df: pd.DataFrame, fighter: str, index: FighterIndex = None) -> pd.DataFrame:
+    """Rows of df involving fighter, with their outcome in a fighter_outcome column."""
+    index = index or FighterIndex(df)
+    fights = index.fights(fighter)
+    df_fighter = df.loc[fights['bout_row']].copy()
+    df_fighter['fighter_outcome'] = fights['fighter_outcome'].to_numpy()
+    return df_fighter
+
+
+def filter_rabindra_fights(df: pd.DataFrame, index: FighterIndex = None) -> pd.DataFrame:
     """Filter dataframe for Rabindra Dhant fights."""
-    df_rabindra = df[(df['fighter_a'] == 'Rabindra Dhant') | (df['fighter_b'] == 'Rabindra Dhant')]
+    df_rabindra = filter_fighter_fights(df, 'Rabindra Dhant', index)
+    return df_rabindra.rename(columns={'fighter_outcome': 'rabindra_outcome'})
+
 
-    def rabindra_outcome(row):
-        if row['fighter_a'] == 'Rabindra Dhant':
-            return row['outcome']
-        elif row['fighter_b'] == 'Rabindra Dhant':
-            return 'Loss' if str(row['outcome']).lower() == 'win' else 'Win'
-        return None
+def fighter_summary(index: FighterIndex, fighter: str) -> dict:
+    """Career summary for one fighter: fight count, outcomes and win methods."""
+    fights = index.fights(fighter)
+    wins = fights[fights['fighter_outcome'] == 'Win']
+    return {
+        'fighter': fighter,
+        'fights': len(fights),
+        'outcomes': fights['fighter_outcome'].value_counts().to_dict(),
+        'win_methods': wins['method'].value_counts().to_dict(),
+    }
 
-    df_rabindra['rabindra_outcome'] = df_rabindra.apply(rabindra_outcome, axis=1)
-    return df_rabindra
 
+def career_summaries(index: FighterIndex) -> pd.DataFrame:
+    """Outcome counts for every fighter in the index (one row per fighter; every source row counts)."""
+    return pd.crosstab(index.bouts['fighter'], index.bouts['fighter_outcome'])
 
-def summarize_rabindra(df_rabindra: pd.DataFrame):
-    """Print summary statistics of Rabindra Dhant's career."""
-    print("\nRabindra Dhant fight records count:", len(df_rabindra))
-    print("\nRabindra Dhant Fight Outcomes:")
-    print(df_rabindra['rabindra_outcome'].value_counts())
 
-    print("\nWin methods by Rabindra Dhant:")
-    print(df_rabindra[df_rabindra['rabindra_outcome'] == 'Win']['method'].value_counts())
+def summarize_fighter(index: FighterIndex, fighter: str = 'Rabindra Dhant'):
+    """Print summary statistics of a fighter's career."""
+    summary = fighter_summary(index, fighter)
+    print(f"\n{fighter} fight records count:", summary['fights'])
+    print(f"\n{fighter} Fight Outcomes:")
+    print(pd.Series(summary['outcomes'], dtype='int64'))
+
+    print(f"\nWin methods by {fighter}:")
+    print(pd.Series(summary['win_methods'], dtype='int64'))
 
 
 # ---------------- Visualization ----------------
@@ -165,8 +291,11 @@ def main():
     print("\nMissing values per column:")
     print(df_clean.isnull().sum())
 
-    df_rabindra = filter_rabindra_fights(df_clean)
-    summarize_rabindra(df_rabindra)
+    index = FighterIndex(df_clean)
+    summarize_fighter(index, 'Rabindra Dhant')
+
+    print("\nOutcomes by fighter (source rows):")
+    print(career_summaries(index))
 
     G = build_mindmap()
     print("\nMindmap graph built with", len(G.nodes), "nodes and", len(G.edges), "edges.")
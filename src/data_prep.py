@@ -18,10 +18,42 @@ def safe_json_load(x):
             except:
                 return {}
 
+def expand_json_column(series: pd.Series, prefix: str = ""):
+    """Parse a JSON column once (orjson) and expand every key into its own typed column.
+
+    The non-empty cells are parsed as one JSON array in a single orjson call; only when that
+    fails (or does not come back as one object per cell) are cells parsed one at a time.
+    Returns the parsed dicts, the expanded frame and the index labels of cells
+    that orjson rejected and needed the slow safe_json_load fallback.
+    """
+    cells = series.tolist()
+    filled = [i for i, x in enumerate(cells) if isinstance(x, str) and x.strip() != ""]
+    parsed, fallback = [{} for _ in cells], []
+    try:
+        values = orjson.loads("[" + ",".join(cells[i] for i in filled) + "]")
+    except orjson.JSONDecodeError:
+        values = None
+    if values is not None and len(values) == len(filled) and all(isinstance(v, dict) for v in values):
+        for i, value in zip(filled, values):
+            parsed[i] = value
+    else:
+        for i in filled:
+            try:
+                value = orjson.loads(cells[i])
+            except orjson.JSONDecodeError:
+                value = safe_json_load(cells[i])
+                fallback.append(series.index[i])
+            parsed[i] = value if isinstance(value, dict) else {}
+
+    expanded = pd.DataFrame(parsed, index=series.index).convert_dtypes()
+    if prefix:
+        expanded = expanded.add_prefix(prefix)
+    return pd.Series(parsed, index=series.index, dtype=object), expanded, fallback
+
 def to_seconds_mmss(s):
     if pd.isna(s) or s=="":
         return np.nan
-    if isinstance(s, (int,float)):
+    if isinstance(s, (int, float, np.number)):
         return float(s)
     m = re.match(r"^(\d{1,2}):(\d{2})$", str(s).strip())
     if not m:
@@ -30,6 +62,30 @@ def to_seconds_mmss(s):
 
 def coalesce(*vals):
     for v in vals:
-        if v not in (None, "", np.nan) and not (isinstance(v,float) and math.isnan(v)):
+        # pd.NA (nullable dtypes) is missing too; comparing it with `in` would raise
+        if v is None or (pd.api.types.is_scalar(v) and pd.isna(v)) or (isinstance(v, str) and v == ""):
+            continue
+        if not (isinstance(v,float) and math.isnan(v)):
             return v
-    return np.nan
\ No newline at end of file
+    return np.nan
+# ---------------- Vectorized (Series-level) versions ----------------
+def to_seconds_mmss_series(s: pd.Series) -> pd.Series:
+    """Column-wise to_seconds_mmss: mm:ss strings -> float seconds, NaN where unparseable."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(float)
+
+    parts = s.astype("string").str.strip().str.extract(r"^(\d{1,2}):(\d{2})$")
+    seconds = parts[0].astype(float) * 60 + parts[1].astype(float)
+
+    # Plain numbers mixed into an object column pass through like the scalar version
+    if s.dtype == object:
+        is_number = np.fromiter((isinstance(v, (int, float, np.number)) for v in s), dtype=bool, count=len(s))
+        if is_number.any():
+            seconds[is_number] = pd.to_numeric(s[is_number], errors="coerce").astype(float)
+    return seconds
+
+def coalesce_series(*series):
+    """Column-wise coalesce: first non-missing, non-empty value across the given Series per row."""
+    frame = pd.concat(series, axis=1, ignore_index=True)
+    frame = frame.mask(frame.isna() | frame.eq(""))
+    return frame.bfill(axis=1).iloc[:, 0].rename(None)
@@ -1,33 +1,245 @@
+import argparse
+import json
+import os
+import numpy as np
+import orjson
 import pandas as pd
 
-def prune_missing_values(df: pd.DataFrame, row_threshold: float = 50.0) -> pd.DataFrame:
+# Data-quality profiling and pruning. QualityProfile collects column/row null rates, JSON and
+# date parse failures and duplicate rows per frame; profiles of streamed chunks merge into one
+# compact JSON report, and pruning reuses the row null rates it computed:
+#   python data_prune.py [PATH] [--chunksize 5000] [--row-threshold 50]
+
+JSON_COLUMNS = ['stats_json', 'extras_json']
+DATE_COLUMNS = ['published_date', 'accessed_date', 'event_date']
+# Columns added by clean_data: the parsed JSON dicts (never null, not hashable) and the fields
+# pulled out of them (data_cleanup.STATS_FIELDS / EXTRAS_FIELDS), which are mostly empty and
+# would otherwise push cleaned rows over the null threshold
+DERIVED_COLUMNS = ['stats', 'extras',
+                   'fighter_a_record_at_fight', 'fighter_b_record_at_fight',
+                   'fighter_a_age', 'fighter_b_age', 'fighter_a_height_cm', 'fighter_b_height_cm']
+# Rows with text are what gets indexed; they are never pruned however sparse their other columns
+TEXT_COLUMN = 'chunk_text'
+
+
+class QualityProfile:
+    """Mergeable data-quality statistics: update() once per frame or chunk, merge() across profiles.
+
+    Duplicate counts are exact: one 64-bit hash per distinct row is kept (8 bytes a row, so
+    memory grows with the rows profiled). save()/load() persist a profile to resume a stream.
+    """
+
+    def __init__(self, row_threshold: float = 50.0):
+        self.row_threshold = row_threshold
+        self.rows = 0
+        self.column_rows = {}  # column -> rows seen with that column
+        self.column_nulls = {}  # column -> null cells
+        self.row_null_histogram = np.zeros(101, dtype=np.int64)  # rows per whole-percent null rate
+        self.rows_over_threshold = 0
+        self.pruned_rows = 0
+        self.json_failures = {}
+        self.date_failures = {}
+        self.duplicate_rows = 0
+        # Distinct row hashes as sorted runs, largest first; runs of similar size are merged
+        # (as in a binary counter), so adding n hashes costs O(n log n) overall, not O(n) per chunk
+        self._row_hashes = []
+
+    def update(self, df: pd.DataFrame) -> np.ndarray:
+        """Add one frame's statistics; returns its per-row null percentage (for pruning)."""
+        columns = [c for c in df.columns if c not in DERIVED_COLUMNS]
+        null = df[columns].isna().to_numpy()
+        n = len(df)
+        self.rows += n
+        for column, nulls in zip(columns, null.sum(axis=0).tolist()):
+            self.column_rows[column] = self.column_rows.get(column, 0) + n
+            self.column_nulls[column] = self.column_nulls.get(column, 0) + int(nulls)
+
+        row_null_pct = null.sum(axis=1) / max(len(columns), 1) * 100
+        self.row_null_histogram += np.bincount(np.floor(row_null_pct).astype(int), minlength=101)[:101]
+        self.rows_over_threshold += int((row_null_pct > self.row_threshold).sum())
+
+        self._count_json_failures(df)
+        self._count_date_failures(df)
+        self._count_duplicates(df[columns])
+        return row_null_pct
+
+    def _count_json_failures(self, df: pd.DataFrame):
+        """Cells orjson rejects; clean_data already records these in attrs['json_fallback']."""
+        recorded = df.attrs.get('json_fallback', {})
+        for column in JSON_COLUMNS:
+            if column in recorded:
+                failures = len(recorded[column])
+            elif column in df:
+                failures = 0
+                for value in df[column].tolist():
+                    if not isinstance(value, str) or not value.strip():
+                        continue
+                    try:
+                        failures += not isinstance(orjson.loads(value), dict)
+                    except orjson.JSONDecodeError:
+                        failures += 1
+            else:
+                continue
+            self.json_failures[column] = self.json_failures.get(column, 0) + failures
+
+    def _count_date_failures(self, df: pd.DataFrame):
+        """Non-empty values that are not dates; clean_data records the ones it coerced to NaT."""
+        recorded = df.attrs.get('date_failures', {})
+        for column in DATE_COLUMNS:
+            if column in recorded:
+                failures = recorded[column]
+            elif column in df and not pd.api.types.is_datetime64_any_dtype(df[column]):
+                raw = df[column].astype('string').str.strip()
+                parsed = pd.to_datetime(raw, errors='coerce', format='mixed')
+                failures = int((raw.notna() & raw.ne("") & parsed.isna()).sum())
+            else:
+                continue
+            self.date_failures[column] = self.date_failures.get(column, 0) + failures
+
+    def _count_duplicates(self, df: pd.DataFrame):
+        """Rows identical to one seen earlier in this frame, an earlier chunk, or dropped by clean_data.
+
+        A separate pass over the frame: every cell is converted to text before hashing.
+        """
+        self.duplicate_rows += df.attrs.get('duplicates_dropped', 0)
+        # Chunks infer dtypes separately (1 vs 1.0), so numbers are hashed as floats
+        numeric = df.select_dtypes('number').columns
+        values = df.astype({column: 'float64' for column in numeric}).astype('string')
+        hashes = np.unique(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        self.duplicate_rows += len(df) - len(hashes)
+        self._add_hashes(hashes)
+
+    def _add_hashes(self, hashes: np.ndarray):
+        """Count the (distinct, sorted) hashes already seen as duplicates and remember the rest."""
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self._row_hashes:
+            at = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            seen |= run[at] == hashes
+        self.duplicate_rows += int(seen.sum())
+        if seen.all():
+            return
+        runs = self._row_hashes
+        runs.append(hashes[~seen])
+        while len(runs) > 1 and len(runs[-2]) <= len(runs[-1]):
+            newer, older = runs.pop(), runs.pop()
+            # Both runs are sorted, so the stable sort only merges them
+            runs.append(np.sort(np.concatenate([older, newer]), kind='stable'))
+
+    def _all_hashes(self) -> np.ndarray:
+        return np.sort(np.concatenate(self._row_hashes), kind='stable') if self._row_hashes \
+            else np.empty(0, dtype=np.uint64)
+
+    def merge(self, other: "QualityProfile") -> "QualityProfile":
+        """Fold another profile (e.g. from a parallel chunk) into this one."""
+        self.rows += other.rows
+        for mine, theirs in ((self.column_rows, other.column_rows), (self.column_nulls, other.column_nulls),
+                             (self.json_failures, other.json_failures), (self.date_failures, other.date_failures)):
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+        self.row_null_histogram += other.row_null_histogram
+        self.rows_over_threshold += other.rows_over_threshold
+        self.pruned_rows += other.pruned_rows
+        self.duplicate_rows += other.duplicate_rows
+        for run in other._row_hashes:
+            self._add_hashes(run)
+        return self
+
+    def report(self) -> dict:
+        """Summary statistics (percentages rounded to 0.01)."""
+        cumulative = np.cumsum(self.row_null_histogram)
+
+        def row_percentile(q):
+            return int(np.searchsorted(cumulative, q * self.rows)) if self.rows else 0
+
+        return {
+            "rows": self.rows,
+            "row_threshold": self.row_threshold,
+            "rows_over_threshold": self.rows_over_threshold,
+            "pruned_rows": self.pruned_rows,
+            "duplicate_rows": self.duplicate_rows,
+            "column_null_pct": {column: round(nulls / self.column_rows[column] * 100, 2)
+                                for column, nulls in self.column_nulls.items() if self.column_rows[column]},
+            "row_null_pct": {"p50": row_percentile(0.5), "p90": row_percentile(0.9),
+                             "max": int(np.flatnonzero(self.row_null_histogram).max()) if self.rows else 0},
+            "json_failures": self.json_failures,
+            "date_failures": self.date_failures,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.report(), separators=(",", ":"), default=str)
+
+    def save(self, path: str, **meta):
+        """Write the full profile (row hashes included) atomically; meta is returned by load()."""
+        counters = {
+            "meta": meta, "row_threshold": self.row_threshold, "rows": self.rows,
+            "column_rows": self.column_rows, "column_nulls": self.column_nulls,
+            "rows_over_threshold": self.rows_over_threshold, "pruned_rows": self.pruned_rows,
+            "json_failures": self.json_failures, "date_failures": self.date_failures,
+            "duplicate_rows": self.duplicate_rows,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, counters=np.array(json.dumps(counters)), histogram=self.row_null_histogram,
+                     row_hashes=self._all_hashes())
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str):
+        """(profile, meta) saved by save(), or (None, {}) if there is no readable file."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                counters = json.loads(str(data["counters"]))
+                histogram, row_hashes = data["histogram"], data["row_hashes"]
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            return None, {}
+        profile = cls(counters["row_threshold"])
+        for key in ("rows", "column_rows", "column_nulls", "rows_over_threshold", "pruned_rows",
+                    "json_failures", "date_failures", "duplicate_rows"):
+            setattr(profile, key, counters[key])
+        profile.row_null_histogram = histogram.astype(np.int64)
+        profile._row_hashes = [row_hashes.astype(np.uint64)] if len(row_hashes) else []
+        return profile, counters["meta"]
+
+
+def prune_missing_values(df: pd.DataFrame, row_threshold: float = 50.0,
+                         profile: QualityProfile = None) -> pd.DataFrame:
     """
     Prune DataFrame by dropping rows with missing percentage greater than row_threshold.
+    Rows with a chunk_text are always kept.
 
     Args:
         df (pd.DataFrame): Input DataFrame.
         row_threshold (float): Threshold percentage of missing values per row (default 50%).
+        profile (QualityProfile): Profile to add this frame's statistics to, e.g. one shared
+            across streamed chunks (a throwaway one if omitted).
 
     Returns:
         pd.DataFrame: Pruned DataFrame.
     """
-    # Column-level missing %
-    missing_percentage_per_column = df.isnull().sum(axis=0) / len(df) * 100
-    print("Missing values percentage per column:")
-    print(missing_percentage_per_column)
+    profile = profile if profile is not None else QualityProfile(row_threshold)
+    row_null_pct = profile.update(df)
 
-    # Row-level missing %
-    missing_percentage_per_row = df.isnull().sum(axis=1) / len(df.columns) * 100
-    rows_to_drop = missing_percentage_per_row[missing_percentage_per_row > row_threshold].index
+    # Drop rows, using the null rates computed while profiling
+    keep = row_null_pct <= row_threshold
+    if TEXT_COLUMN in df:
+        keep |= df[TEXT_COLUMN].astype('string').str.strip().fillna("").ne("").to_numpy()
+    df_pruned = df[keep]
+    # Counted in the profile (pruned_rows) rather than printed per frame
+    profile.pruned_rows += len(df) - len(df_pruned)
+    return df_pruned
 
-    print("\nMissing percent per row:")
-    print(missing_percentage_per_row)
-    print("Rows to drop (>{}% missing): {}".format(row_threshold, rows_to_drop.tolist()))
 
-    # Drop rows
-    df_pruned = df.drop(rows_to_drop)
+if __name__ == "__main__":
+    import data_cleanup
+    import file_read
 
-    print("\nOriginal DataFrame shape:", df.shape)
-    print("DataFrame shape after pruning:", df_pruned.shape)
+    parser = argparse.ArgumentParser(description="Profile data quality over one streamed read and print a JSON report.")
+    parser.add_argument("path", nargs="?", default=file_read.DATA_PATH)
+    parser.add_argument("--chunksize", type=int, default=5000)
+    parser.add_argument("--row-threshold", type=float, default=50.0)
+    args = parser.parse_args()
 
-    return df_pruned
+    quality = QualityProfile(args.row_threshold)
+    for chunk in file_read.readFileChunks(args.path, chunksize=args.chunksize):
+        quality.update(data_cleanup.clean_data(chunk))
+    print(quality.to_json())
@@ -1,38 +1,149 @@
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from embeddings import Embedder
 import file_read
+import retrieval
+import vector_store
 
-# Drop rows with missing chunk_text
-df_filtered = file_read.readFile().dropna(subset=["chunk_text"])
+# Offline index builds. Each build goes to a new versioned store under ./index_versions,
+# is checked, and only then becomes the serving version (running services follow the alias):
+#   python db_config.py build [--data PATH] [--store chroma|faiss] [--keep 3]
+#   python db_config.py list
+#   python db_config.py rollback [--to VERSION]
 
-# Create list of texts
-texts = df_filtered["chunk_text"].tolist()
+KEEP_VERSIONS = 3
+SAMPLE_QUERIES = [
+    "Who is Rabindra Dhant?",
+    "How did Rabindra Dhant win the MFN bantamweight title?",
+    "Where did Rabindra Dhant grow up?",
+]
+# Share of sampled chunks that must come back as their own nearest neighbour
+MIN_SELF_RECALL = 0.9
+# A build smaller than this share of the serving version fails (e.g. a truncated data file)
+MIN_COUNT_RATIO = 0.5
+SELF_RECALL_SAMPLES = 50
+BATCH_SIZE = 5000
 
-# Create metadata for each chunk
-metadatas = df_filtered[[
-    "source_url",
-     "tags"
-]].to_dict(orient="records")
 
+# ---------------- Utility Methods ----------------
+def new_version(store_name: str) -> str:
+    """Timestamped version name that is not on disk yet."""
+    base = version = time.strftime("v%Y%m%d-%H%M%S")
+    n = 1
+    while os.path.exists(vector_store.version_path(store_name, version)):
+        version, n = f"{base}-{n}", n + 1
+    return version
 
-# Load a pre-trained embedding model
-model = SentenceTransformer("all-MiniLM-L6-v2")
 
-# Convert text to embeddings
-embeddings = model.encode(texts, show_progress_bar=True)
+def verify(store, model: Embedder, ids: list, vectors: np.ndarray, previous_count: int = None) -> list:
+    """Problems with a freshly built store (empty list = good to serve).
 
+    previous_count is the chunk count of the version being replaced, if any.
+    """
+    problems = []
+    if store.count() != len(set(ids)):
+        problems.append(f"count {store.count()} != {len(set(ids))} chunks")
+    if previous_count and store.count() < previous_count * MIN_COUNT_RATIO:
+        problems.append(f"count {store.count()} shrank from {previous_count} in the serving version")
 
-# Create ChromaDB client
-client = chromadb.Client(Settings())
+    # Every sampled chunk should find itself
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(ids), min(SELF_RECALL_SAMPLES, len(ids)), replace=False)
+    found = sum(ids[i] in store.search(vectors[i], 3) for i in sample)
+    if len(sample) and found / len(sample) < MIN_SELF_RECALL:
+        problems.append(f"self-recall {found}/{len(sample)} below {MIN_SELF_RECALL:.0%}")
 
-# Create a collection
-collection = client.create_collection(name="rabindra_info")
+    for query in SAMPLE_QUERIES:
+        if not store.search(model.encode([query])[0], 5):
+            problems.append(f"no results for sample query {query!r}")
+    return problems
 
-# Add data to the collection
-collection.add(
-    documents=texts,
-    embeddings=embeddings,
-    metadatas=metadatas,
-    ids=[f"chunk_{i}" for i in range(len(texts))]
-)
+
+def build(path: str = file_read.DATA_PATH, store_name: str = vector_store.VECTOR_STORE,
+          keep: int = KEEP_VERSIONS, switch: bool = True, allow_shrink: bool = False) -> str:
+    """Build a new index version from the data file, verify it and switch the serving alias to it."""
+    serving = vector_store.current_version(store_name)
+    previous_count = None
+    if serving and not allow_shrink:
+        previous_count = vector_store.open_store(store_name, vector_store.version_path(store_name, serving)).count()
+    version = new_version(store_name)
+    target = vector_store.version_path(store_name, version)
+    print(f"Building {store_name} index {version} -> {target}")
+
+    # Ids, texts and metadata for every row with chunk_text (same layout as the served index)
+    ids, texts, metadatas = retrieval.chunk_records(file_read.readFile(path))
+
+    # Load a pre-trained embedding model and convert text to embeddings
+    model = Embedder()
+    embeddings = model.encode(texts, show_progress_bar=True)
+
+    store = vector_store.open_store(store_name, target)
+    for start in range(0, len(ids), BATCH_SIZE):
+        end = start + BATCH_SIZE
+        store.upsert(ids=ids[start:end], documents=texts[start:end],
+                     embeddings=embeddings[start:end], metadatas=metadatas[start:end])
+    store.commit()
+
+    problems = verify(store, model, ids, embeddings, previous_count)
+    if problems:
+        # Leave the failed build on disk for inspection; the alias is untouched
+        raise RuntimeError(f"Index {version} failed verification: {'; '.join(problems)}")
+    print(f"Verified {version}: {store.count()} chunks")
+
+    if switch:
+        entry = vector_store.switch_alias(store_name, version)
+        print(f"Serving alias for {store_name} -> {version}")
+        # Keep the newest versions for rollback
+        for old in entry["previous"][max(keep - 1, 0):]:
+            vector_store.drop_version(store_name, old)
+            print(f"Dropped {old}")
+    return version
+
+
+def rollback(store_name: str = vector_store.VECTOR_STORE, to: str = None) -> str:
+    """Point the serving alias back at an earlier version (the previous one by default)."""
+    entry = vector_store.read_alias().get(store_name, {})
+    previous = entry.get("previous", [])
+    version = to or (previous[0] if previous else None)
+    if version is None or version not in previous:
+        raise ValueError(f"No earlier {store_name} version to roll back to (have {previous})")
+    vector_store.switch_alias(store_name, version)
+    print(f"Serving alias for {store_name} -> {version}")
+    return version
+
+
+def list_versions(store_name: str = vector_store.VECTOR_STORE):
+    entry = vector_store.read_alias().get(store_name, {})
+    if not entry:
+        print(f"No versioned {store_name} builds; serving the default store")
+        return
+    print(f"{entry['current']}  (serving)")
+    for version in entry.get("previous", []):
+        print(version)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build, list and roll back versioned retrieval indexes.")
+    parser.add_argument("command", choices=["build", "list", "rollback"])
+    parser.add_argument("--store", default=vector_store.VECTOR_STORE, choices=["chroma", "faiss"])
+    parser.add_argument("--data", default=file_read.DATA_PATH, help="data file to build from (build)")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="versions kept on disk (build)")
+    parser.add_argument("--no-switch", action="store_true", help="build and verify only (build)")
+    parser.add_argument("--allow-shrink", action="store_true",
+                        help="skip the chunk-count check against the serving version (build)")
+    parser.add_argument("--to", help="version to roll back to (rollback)")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            build(args.data, args.store, args.keep, switch=not args.no_switch, allow_shrink=args.allow_shrink)
+        elif args.command == "rollback":
+            rollback(args.store, args.to)
+        else:
+            list_versions(args.store)
+    except (RuntimeError, ValueError) as e:
+        print(e)
+        sys.exit(1)
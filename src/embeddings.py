@@ -0,0 +1,183 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Embedding backends for MiniLM on CPU. Pick one per machine with EMBEDDING_BACKEND
+# (torch | onnx | onnx-int8) and compare them with `python embeddings.py`.
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+HF_REPO = f"sentence-transformers/{EMBEDDING_MODEL}"
+ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    # Pre-quantized exports in the model repo; use model_qint8_avx512.onnx / model_qint8_arm64.onnx to match the CPU
+    "onnx-int8": os.getenv("ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx"),
+}
+MAX_SEQ_LENGTH = 256
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Worker processes for bulk indexing (1 = encode in-process)
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", "1"))
+
+
+class SentenceTransformerBackend:
+    """PyTorch sentence-transformers model (the original setup)."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, threads: int = None):
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts: list, batch_size: int = EMBEDDING_BATCH_SIZE, show_progress_bar: bool = False) -> np.ndarray:
+        # sentence-transformers already batches in length-sorted order
+        return self.model.encode(texts, batch_size=batch_size, show_progress_bar=show_progress_bar,
+                                 convert_to_numpy=True)
+
+
+class OnnxBackend:
+    """MiniLM exported to ONNX, run with onnxruntime; mean pooling + L2 norm like the original model."""
+
+    def __init__(self, onnx_file: str = ONNX_FILES["onnx"], threads: int = None):
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(HF_REPO, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()  # pads to the longest sequence in each batch
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(hf_hub_download(HF_REPO, onnx_file), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: list) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts: list, batch_size: int = EMBEDDING_BATCH_SIZE, show_progress_bar: bool = False) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 384), dtype=np.float32)
+        # Length-sorted batches keep padding (wasted compute) to a minimum
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = np.empty((len(texts), 384), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+            if show_progress_bar:
+                print(f"\rEmbedded {min(start + batch_size, len(texts))}/{len(texts)}", end="", flush=True)
+        if show_progress_bar:
+            print()
+        return out
+
+
+def load_backend(name: str = EMBEDDING_BACKEND, threads: int = None):
+    """Create an embedding backend by name: torch, onnx or onnx-int8."""
+    if name == "torch":
+        return SentenceTransformerBackend(threads=threads)
+    if name in ONNX_FILES:
+        return OnnxBackend(ONNX_FILES[name], threads=threads)
+    raise ValueError(f"Unknown embedding backend: {name}")
+
+
+# ---------------- Multi-process bulk encoding ----------------
+_worker_backend = None
+
+
+def _init_worker(name: str, threads: int):
+    global _worker_backend
+    _worker_backend = load_backend(name, threads=threads)
+
+
+def _encode_in_worker(args):
+    texts, batch_size = args
+    return _worker_backend.encode(texts, batch_size=batch_size)
+
+
+def encode_multi_process(texts: list, name: str = EMBEDDING_BACKEND, processes: int = EMBEDDING_PROCESSES,
+                         batch_size: int = EMBEDDING_BATCH_SIZE, shard_size: int = 1000) -> np.ndarray:
+    """Encode a large list across a process pool, splitting the CPU cores between workers."""
+    threads = max(1, (os.cpu_count() or 1) // processes)
+    shards = [(texts[i:i + shard_size], batch_size) for i in range(0, len(texts), shard_size)]
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(name, threads)) as pool:
+        return np.concatenate(list(pool.map(_encode_in_worker, shards)))
+
+
+class Embedder:
+    """One backend for queries, plus an optional process pool for bulk indexing."""
+
+    def __init__(self, name: str = EMBEDDING_BACKEND, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 processes: int = EMBEDDING_PROCESSES, bulk_threshold: int = 2000):
+        self.name = name
+        self.batch_size = batch_size
+        self.processes = processes
+        self.bulk_threshold = bulk_threshold
+        self.backend = load_backend(name)
+
+    def encode(self, texts: list, show_progress_bar: bool = False) -> np.ndarray:
+        start = time.perf_counter()
+        if self.processes > 1 and len(texts) >= self.bulk_threshold:
+            embeddings = encode_multi_process(texts, self.name, self.processes, self.batch_size)
+        else:
+            embeddings = self.backend.encode(texts, batch_size=self.batch_size, show_progress_bar=show_progress_bar)
+        if show_progress_bar:
+            elapsed = time.perf_counter() - start
+            print(f"Embedded {len(texts)} texts with {self.name}: {len(texts) / max(elapsed, 1e-9):.1f} sentences/sec")
+        return embeddings
+
+
+# ---------------- Benchmark ----------------
+def benchmark(texts: list, backends=("torch", "onnx", "onnx-int8"), batch_sizes=(16, 32, 64),
+              processes=(1,)) -> list:
+    """Sentences/sec for every backend x batch size x process count on the same texts."""
+    results = []
+    for name in backends:
+        backend = load_backend(name)
+        backend.encode(texts[:8])  # warm-up
+        for batch_size in batch_sizes:
+            for n_proc in processes:
+                start = time.perf_counter()
+                if n_proc > 1:
+                    encode_multi_process(texts, name, n_proc, batch_size)
+                else:
+                    backend.encode(texts, batch_size=batch_size)
+                elapsed = time.perf_counter() - start
+                results.append({"backend": name, "batch_size": batch_size, "processes": n_proc,
+                                "sentences_per_sec": round(len(texts) / elapsed, 1)})
+                print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    import file_read
+
+    parser = argparse.ArgumentParser(description="Compare CPU embedding backends on the dataset.")
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--batch-sizes", default="16,32,64")
+    parser.add_argument("--processes", default="1")
+    parser.add_argument("--repeat", type=int, default=10, help="repeat the corpus to get stable timings")
+    args = parser.parse_args()
+
+    texts = file_read.readFile()["chunk_text"].dropna().tolist() * args.repeat
+    benchmark(texts,
+              backends=args.backends.split(","),
+              batch_sizes=[int(b) for b in args.batch_sizes.split(",")],
+              processes=[int(p) for p in args.processes.split(",")])
@@ -0,0 +1,355 @@
+import re
+import threading
+from collections import OrderedDict
+import pandas as pd
+import data_cleanup
+import file_read
+
+# Materialized fighter profiles and event summaries for the sidebar, built from the cleaned
+# dataset. Views are plain dicts held in memory; refresh() recomputes only the fighters and
+# events whose rows changed, and comparison tables are cached per fighter pair.
+
+# Columns a view depends on; a row whose values here change triggers a refresh of its fighters/event
+VIEW_COLUMNS = ['fighter_a', 'fighter_b', 'outcome', 'event_name', 'event_date', 'location_city',
+                'location_country', 'method', 'round', 'time_mmss', 'weight_class', 'org_promotion',
+                'stats_json', 'extras_json']
+DEFAULT_FIGHTER = 'Rabindra Dhant'
+# Some scraped rows carry a summary paragraph in the fighter columns; those are not names
+MAX_NAME_CHARS = 60
+# Comparison tables kept (least recently used dropped); fighter names are free text in the UI
+TABLE_CACHE_SIZE = 256
+# Bouts at the same event dated at most this far apart are one fight reported by several sources
+SAME_FIGHT_DAYS = pd.Timedelta(days=2)
+
+_RECORD = re.compile(r"(\d+)-(\d+)(?:-(\d+))?")
+_RESULT_DELTA = {'win': (1, 0, 0), 'loss': (0, 1, 0), 'draw': (0, 0, 1)}
+_METHOD_KINDS = {'ko': 'ko', 'tko': 'ko', 'sub': 'sub', 'dec': 'dec'}
+# Career fields in stats_json/extras_json, per profile attribute (first present wins)
+CAREER_FIELDS = {
+    'knockouts': ('stats', ['ko_tko_wins', 'knockout_wins']),
+    'nationality': ('extras', ['nationality']),
+    'nickname': ('extras', ['nickname']),
+    'team': ('extras', ['team', 'affiliation']),
+}
+
+
+# ---------------- Utility Methods ----------------
+def _present(value) -> bool:
+    """Not None/NaN/NaT/pd.NA (clean_data's nullable dtypes) and not blank."""
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return False
+    return str(value).strip() != ""
+
+
+def _first(values):
+    return next((v for v in values if _present(v)), None)
+
+
+def parse_record(record):
+    """(wins, losses, draws) from "W-L" / "W-L-D", or None."""
+    match = _RECORD.search(str(record)) if _present(record) else None
+    if not match:
+        return None
+    return tuple(int(part or 0) for part in match.groups())
+
+
+def method_kind(method) -> str:
+    """'ko', 'sub' or 'dec' for a finish method such as "KO/TKO (Punches)" (None if unknown)."""
+    words = str(method).lower().replace("/", " ").split() if _present(method) else []
+    return next((_METHOD_KINDS[w[:3]] for w in words if w[:3] in _METHOD_KINDS), None)
+
+
+def format_record(record) -> str:
+    return "-".join(str(n) for n in record) if record else "N/A"
+
+
+def _key(value) -> str:
+    return str(value).strip().lower() if _present(value) else ""
+
+
+class FighterViews:
+    """Fighter profile + event views over the cleaned dataset, refreshed incrementally."""
+
+    def __init__(self, df: pd.DataFrame = None):
+        self.profiles = {}  # fighter_key -> profile dict
+        self.events = {}  # event_key -> event dict
+        self.aliases = {}  # variant name key -> canonical fighter key
+        self._rows = {}  # row hash -> (fighter_a key, fighter_b key, event key)
+        self._source_sha1 = None  # hash of the data file the views were last refreshed from
+        self._tables = OrderedDict()  # (fighter_a key, fighter_b key, prediction) -> comparison DataFrame (LRU)
+        self._lock = threading.Lock()
+        if df is not None:
+            self.refresh(df=df)
+
+    # ---------------- Refresh ----------------
+    def refresh(self, path: str = file_read.DATA_PATH, df: pd.DataFrame = None) -> dict:
+        """Recompute the views touched by added, changed or removed rows; returns what was refreshed.
+
+        An unchanged data file returns before anything is read. Otherwise the file is cleaned and
+        the bout index rebuilt in full; only the touched fighter/event views are recomputed.
+        """
+        source_sha1 = None
+        if df is None:
+            source_sha1 = file_read.file_sha1(path)
+            if source_sha1 == self._source_sha1:
+                return {"fighters": 0, "events": 0}
+            df = data_cleanup.clean_data(file_read.readFile(path))
+        hashes = pd.util.hash_pandas_object(df.reindex(columns=VIEW_COLUMNS).astype(str), index=False)
+        rows = {h: (_key(a), _key(b), _key(e))
+                for h, a, b, e in zip(hashes, df['fighter_a'], df['fighter_b'], df['event_name'])}
+
+        changed = set(rows).symmetric_difference(self._rows)
+        if not changed:
+            self._source_sha1 = source_sha1
+            return {"fighters": 0, "events": 0}
+        touched = [self._rows.get(h) or rows[h] for h in changed]
+        fighters = {k for a, b, _e in touched for k in (a, b) if k and len(k) <= MAX_NAME_CHARS}
+        events = {e for _a, _b, e in touched if e and not e.isdigit()}
+
+        index = data_cleanup.FighterIndex(df)
+        # A variant spelling refreshes its canonical fighter and loses any profile of its own
+        fighters |= {self.aliases.get(key, key) for key in fighters} | {index.canonical(key) for key in fighters}
+        profiles = {key: None if key in index.aliases else self._profile(df, index, key) for key in fighters}
+        event_views = {key: self._event(df, key) for key in events}
+
+        with self._lock:
+            for key, profile in profiles.items():
+                if profile is None:
+                    self.profiles.pop(key, None)
+                else:
+                    self.profiles[key] = profile
+            for key, event in event_views.items():
+                if event is None:
+                    self.events.pop(key, None)
+                else:
+                    self.events[key] = event
+            self._tables = OrderedDict((pair, table) for pair, table in self._tables.items()
+                                       if not fighters.intersection(pair[:2]))
+            self.aliases = index.aliases
+            self._rows = rows
+            self._source_sha1 = source_sha1
+        return {"fighters": len(profiles), "events": len(event_views)}
+
+    @staticmethod
+    def _profile(df: pd.DataFrame, index: data_cleanup.FighterIndex, key: str):
+        """Record, win %, age, height, career details and last event for one fighter (None if no bouts remain)."""
+        bouts = index.fights(key)
+        if bouts.empty:
+            return None
+        # Most recent bouts first; undated rows last
+        bouts = bouts.assign(_date=pd.to_datetime(bouts['event_date'], errors='coerce'))
+        bouts = bouts.sort_values('_date', ascending=False, na_position='last', kind='stable')
+        rows = df.loc[bouts['bout_row']]
+        sides = bouts['side'].tolist()
+
+        def side_values(field, source=None):
+            """Per-bout value of fighter_{side}_{field}, from a cleaned column or the stats/extras dicts."""
+            values = []
+            for side, (_, row) in zip(sides, rows.iterrows()):
+                name = f"fighter_{side}_{field}"
+                if source is None:
+                    values.append(row.get(name))
+                else:
+                    values.append(row[source].get(name) if isinstance(row.get(source), dict) else None)
+            return values
+
+        def career_value(attribute):
+            """A CAREER_FIELDS value: fighter_{side}_{field}, or the bare field on rows where the
+            fighter is fighter_a (profile pages describe their subject as fighter_a)."""
+            source, fields = CAREER_FIELDS[attribute]
+            for side, values in zip(sides, rows[source] if source in rows else []):
+                if not isinstance(values, dict):
+                    continue
+                for field in fields:
+                    for name in (f"fighter_{side}_{field}", field) if side == 'a' else (f"fighter_{side}_{field}",):
+                        if _present(values.get(name)):
+                            return values[name]
+            return None
+
+        record = parse_record(_first(side_values('record_after_fight', 'stats')))
+        if record is None:
+            record = parse_record(_first(side_values('record', 'stats')))
+        if record is None:
+            # Record going into the latest bout, plus that bout's result
+            at_fight = list(zip(side_values('record_at_fight'), bouts['fighter_outcome']))
+            before, outcome = next(((r, o) for r, o in at_fight if parse_record(r)), (None, None))
+            if before is not None:
+                delta = _RESULT_DELTA.get(_key(outcome), (0, 0, 0))
+                record = tuple(a + b for a, b in zip(parse_record(before), delta))
+
+        # One entry per fight on file: several sources often describe the same bout, with
+        # differently spelled opponents and dates a day apart (time zones) or missing
+        dated, opponents, keep = {}, set(), []
+        for event, date, opponent in zip(bouts['event_name'].map(_key), bouts['_date'], bouts['opponent'].map(_key)):
+            if event:
+                dates = dated.setdefault(event, [])
+                keep.append(not any(pd.isna(date) or pd.isna(d) or abs(date - d) <= SAME_FIGHT_DAYS for d in dates))
+                dates.append(date)
+            else:
+                keep.append(opponent not in opponents)
+                opponents.add(opponent)
+        deduped = bouts[keep]
+        unique = deduped[deduped['event_name'].map(_present) | deduped['opponent'].map(_present)]
+
+        if record is None:
+            outcomes = deduped['fighter_outcome'].map(_key)
+            record = tuple(int((outcomes == result).sum()) for result in ('win', 'loss', 'draw'))
+
+        history = [{
+            "event": event if _present(event) else None,
+            "date": date if _present(date) else None,
+            "opponent": opponent if _present(opponent) else None,
+            "result": result if _present(result) else None,
+            "method": method if _present(method) else None,
+            "round": int(round_) if _present(round_) else None,
+            "time": time if _present(time) else None,
+        } for event, date, opponent, result, method, round_, time in zip(
+            unique['event_name'], unique['event_date'], unique['opponent'], unique['fighter_outcome'],
+            unique['method'], unique['round'], unique['time_mmss'])]
+        wins = unique[unique['fighter_outcome'].map(_key) == 'win']
+        method_wins = {str(m): int(n) for m, n in wins['method'].value_counts().items()}
+
+        # Career KO count, else the count printed on a bout row, else the KO wins on file
+        knockouts = career_value('knockouts')
+        if knockouts is None:
+            knockouts = _first(side_values('knockouts', 'stats'))
+        if knockouts is None and method_wins:
+            knockouts = sum(n for method, n in method_wins.items() if method_kind(method) == 'ko')
+
+        total = sum(record)
+        last = bouts.iloc[0]
+        return {
+            "name": _first(bouts['fighter']) or key,
+            "record": record,
+            "win_pct": round(100 * record[0] / total, 1) if total else None,
+            "age": _first(side_values('age')),
+            "height_cm": _first(side_values('height_cm')),
+            "knockouts": knockouts,
+            "nationality": career_value('nationality'),
+            "nickname": career_value('nickname'),
+            "team": career_value('team'),
+            "bouts": len(history),
+            "history": history,
+            "method_wins": method_wins,
+            "last_event": last['event_name'] if _present(last['event_name']) else None,
+            "last_event_date": last['event_date'] if _present(last['event_date']) else None,
+            "last_result": last['fighter_outcome'] if _present(last['fighter_outcome']) else None,
+            "last_opponent": last['opponent'] if _present(last['opponent']) else None,
+            "sources": list(dict.fromkeys(u for u in bouts['source_url'] if _present(u))),
+        }
+
+    @staticmethod
+    def _event(df: pd.DataFrame, key: str):
+        """Event summary, merged from every row that mentions it (most complete row first)."""
+        rows = df[df['event_name'].map(_key) == key]
+        if rows.empty:
+            return None
+        rows = rows.loc[rows.reindex(columns=VIEW_COLUMNS).notna().sum(axis=1).sort_values(
+            ascending=False, kind='stable').index]
+
+        def field(column):
+            return _first(rows[column]) if column in rows else None
+
+        outcome, fighter_a, fighter_b = field('outcome'), field('fighter_a'), field('fighter_b')
+        winner = {'win': fighter_a, 'loss': fighter_b}.get(_key(outcome))
+        location = ", ".join(str(v) for v in (field('location_city'), field('location_country')) if _present(v))
+        round_ = field('round')
+        return {
+            "event": field('event_name'),
+            "date": field('event_date'),
+            "location": location or None,
+            "promotion": field('org_promotion'),
+            "weight_class": field('weight_class'),
+            "fighter_a": fighter_a,
+            "fighter_b": fighter_b,
+            "winner": winner or (outcome if _present(outcome) else None),
+            "method": field('method'),
+            "round": int(round_) if _present(round_) else None,
+            "time": field('time_mmss'),
+            "sources": list(dict.fromkeys(u for u in rows['source_url'] if _present(u))),
+        }
+
+    # ---------------- Serving ----------------
+    def fighters(self) -> list:
+        return sorted(profile["name"] for profile in self.profiles.values())
+
+    def profile(self, fighter: str):
+        key = _key(fighter)
+        return self.profiles.get(self.aliases.get(key, key))
+
+    def event_names(self) -> list:
+        return sorted(event["event"] for event in self.events.values())
+
+    def event(self, event_name: str = None):
+        """An event by name, or the default fighter's last event."""
+        if event_name is None:
+            profile = self.profile(DEFAULT_FIGHTER) or {}
+            event_name = profile.get("last_event")
+        return self.events.get(_key(event_name))
+
+    def default_pair(self):
+        profile = self.profile(DEFAULT_FIGHTER) or {}
+        return DEFAULT_FIGHTER, profile.get("last_opponent")
+
+    def comparison_table(self, fighter_a: str = None, fighter_b: str = None, prediction: float = None) -> pd.DataFrame:
+        """Attributes as rows, the two fighters as columns (built once per pair, then cached).
+
+        prediction is P(fighter_a wins); when given it is shown as a Win Prediction row.
+        """
+        if fighter_a is None and fighter_b is None:
+            fighter_a, fighter_b = self.default_pair()
+        if prediction is not None:
+            prediction = round(prediction, 3)
+        pair = tuple(self.aliases.get(_key(name), _key(name)) for name in (fighter_a, fighter_b)) + (prediction,)
+        with self._lock:
+            table = self._tables.get(pair)
+            if table is not None:
+                self._tables.move_to_end(pair)
+        if table is None:
+            profiles = [self.profile(name) or {"name": name or "N/A"} for name in (fighter_a, fighter_b)]
+
+            def show(profile, field, fmt="{}"):
+                value = profile.get(field)
+                return fmt.format(value) if _present(value) else "N/A"
+
+            rows = [
+                ("Nationality", [show(p, "nationality") for p in profiles]),
+                ("Nickname", [show(p, "nickname") for p in profiles]),
+                ("Record", [format_record(p.get("record")) for p in profiles]),
+                ("Win %", [show(p, "win_pct", "{}%") for p in profiles]),
+                ("Age", [show(p, "age", "{:.0f} years") for p in profiles]),
+                ("Height", [show(p, "height_cm", "{:.0f} cm") for p in profiles]),
+                ("Team", [show(p, "team") for p in profiles]),
+                ("Knockouts", [show(p, "knockouts") for p in profiles]),
+                ("Bouts on file", [show(p, "bouts") for p in profiles]),
+                ("Last event", [show(p, "last_event") for p in profiles]),
+                ("Last result", [show(p, "last_result") for p in profiles]),
+            ]
+            if prediction is not None:
+                odds = (prediction, 1 - prediction)
+                rows.append(("Win Prediction", [f"{'🔥' if p >= 0.5 else '⚡'} {p:.0%}" for p in odds]))
+            table = pd.DataFrame(
+                [[attribute] + values for attribute, values in rows],
+                columns=["Attribute"] + [p["name"] for p in profiles]
+            )
+            with self._lock:
+                self._tables[pair] = table
+                while len(self._tables) > TABLE_CACHE_SIZE:
+                    self._tables.popitem(last=False)
+        return table
+
+
+_views = None
+_views_lock = threading.Lock()
+
+
+def get_views() -> FighterViews:
+    """Process-wide views, built from the data file on first use."""
+    global _views
+    if _views is None:
+        with _views_lock:
+            if _views is None:
+                views = FighterViews()
+                views.refresh()
+                _views = views
+    return _views
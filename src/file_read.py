@@ -1,18 +1,270 @@
+import csv
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import warnings
 import pandas as pd
 
+try:
+    import pyarrow.feather as feather
+except ImportError:  # snapshots are skipped without pyarrow
+    feather = None
+
 
 # Safer loading: handle quotes and skip problematic lines
 # Assuming you have uploaded the file to the root of your Google Drive ("My Drive").
 # UPDATE THE PATH BELOW IF YOUR FILE IS IN A DIFFERENT LOCATION IN GOOGLE DRIVE.
 
-def readFile():
-    df = pd.read_csv(
-        "./master_data-rabindra-dhant.txt",
+DATA_PATH = "./master_data-rabindra-dhant.txt"
+SNAPSHOT_DIR = "./.snapshots"
+# Part of the snapshot key: bump when parsing changes so stale snapshots are not served
+PARSER_VERSION = 3
+# Some exported rows carry one stray empty cell just before this column (",,"{...}"); the
+# cell is dropped when that is the only thing keeping the record from splitting cleanly
+SHIFTED_COLUMN = "extras_json"
+
+_SKIPPED_LINE = re.compile(r"Skipping line (\d+): (.*)")
+_QUOTE_OR_COMMA = re.compile(r'[",]')
+
+
+# ---------------- Utility Methods ----------------
+def file_sha1(path: str) -> str:
+    """SHA1 of the raw file bytes, used to key snapshots."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_paths(path: str, source_hash: str, snapshot_dir: str = SNAPSHOT_DIR):
+    """Feather snapshot and quarantine report locations for one version of a source file."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    base = os.path.join(snapshot_dir, f"{stem}.{source_hash[:16]}.p{PARSER_VERSION}")
+    return base + ".feather", base + ".quarantine.json"
+
+
+def in_quotes_after(line: str, in_quotes: bool) -> bool:
+    """Whether a record is still inside a quoted field after this raw line.
+
+    Follows the C engine's rules: a quote only opens a field at its start and "" is an escaped quote.
+    """
+    field_start, skip = 0, -1
+    for m in _QUOTE_OR_COMMA.finditer(line):
+        i = m.start()
+        if i <= skip:
+            continue
+        if in_quotes:
+            if line[i] == '"':
+                if line.startswith('"', i + 1):
+                    skip = i + 1
+                else:
+                    in_quotes = False
+        elif line[i] == ',':
+            field_start = i + 1
+        elif i == field_start:
+            in_quotes = True
+    return in_quotes
+
+
+def skipped_lines(caught) -> dict:
+    """Line number -> reason for every "Skipping line" ParserWarning the C engine emitted."""
+    skipped = {}
+    for warning in caught:
+        for line_no, reason in _SKIPPED_LINE.findall(str(warning.message)):
+            skipped[int(line_no)] = reason
+    return skipped
+
+
+def split_records(lines: list, first_line: int = 2) -> list:
+    """Group raw lines into (first line number, text) logical records.
+
+    A record continues across physical lines while a quoted field is open; blank
+    records are dropped (the C engine skips them without counting them).
+    """
+    records, current, start, in_quotes = [], [], first_line, False
+    for line_no, line in enumerate(lines, start=first_line):
+        if not current:
+            start = line_no
+        current.append(line)
+        in_quotes = in_quotes_after(line, in_quotes)
+        if not in_quotes:
+            text = "".join(current)
+            if text.strip():
+                records.append((start, text))
+            current = []
+    if current:
+        records.append((start, "".join(current)))  # unterminated quote at the end of the input
+    return records
+
+
+def recover_record(header: str, text: str, n_columns: int):
+    """Re-parse one record the C engine rejected with the python engine.
+
+    Returns a one-row frame, or None when the record does not split into exactly one full row
+    (after dropping a stray empty cell before SHIFTED_COLUMN, see above).
+    """
+    rows = list(csv.reader(io.StringIO(text), delimiter=",", quotechar='"'))
+    if len(rows) != 1:
+        return None
+    fields = rows[0]
+    columns = next(csv.reader([header]))
+    if len(fields) == n_columns + 1 and SHIFTED_COLUMN in columns:
+        shifted = columns.index(SHIFTED_COLUMN)
+        if fields[shifted] == "" and fields[shifted + 1].lstrip().startswith("{"):
+            del fields[shifted]
+            out = io.StringIO()
+            csv.writer(out, quotechar='"', lineterminator="").writerow(fields)
+            text = out.getvalue()
+    if len(fields) != n_columns:
+        return None
+    return pd.read_csv(
+        io.StringIO(header + "\n" + text),
         sep=",",
         quotechar='"',
-        engine="python",  # slower but handles messy quoting
-        on_bad_lines="skip"  # skips any corrupted rows
+        engine="python",
+        dtype=str
     )
+
+
+def _c_parse(header: str, records: list):
+    """C-engine parse of the records; returns the frame and the record positions it skipped."""
+    # A blank (all-empty) first row stops pandas from treating an over-long first
+    # record as an implicit index column; it is dropped again after parsing
+    padding = "," * header.count(",") + "\n"
+    body = "".join(text if text.endswith("\n") else text + "\n" for _, text in records)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", pd.errors.ParserWarning)
+        df = pd.read_csv(io.StringIO(header + padding + body), sep=",", quotechar='"',
+                         engine="c", on_bad_lines="warn")
+    # The C engine numbers records, not physical lines: line 1 is the header, line 2 the padding row
+    skipped = sorted(n - 3 for n in skipped_lines(caught) if 3 <= n < len(records) + 3)
+    return df.iloc[1:].reset_index(drop=True), skipped
+
+
+def parse_block(header: str, block: list, first_line: int = 2):
+    """Parse header + raw lines with the C engine, re-parsing its rejected records with the python engine.
+
+    first_line is the file line number of block[0]. Rows keep the file's record order;
+    quarantined records are reported with the file line they start on and their full text.
+    """
+    records = split_records(block, first_line)
+    df, skipped = _c_parse(header, records)
+
+    if len(df) + len(skipped) != len(records):
+        # The quote scan and the C tokenizer disagree about record boundaries somewhere;
+        # parse record by record so every row still maps to its source line
+        parts, skipped = [], []
+        for i, record in enumerate(records):
+            part, bad = _c_parse(header, [record])
+            if bad or len(part) != 1:
+                skipped.append(i)
+            else:
+                parts.append(part)
+        df = pd.concat(parts, ignore_index=True) if parts else df.iloc[0:0]
+    if not skipped:
+        return df, []
+
+    # Accepted rows are the records that were not skipped, in file order
+    order = [i for i in range(len(records)) if i not in set(skipped)]
+    parts, positions, quarantine = [df], order, []
+    for i in skipped:
+        line_no, text = records[i]
+        row = recover_record(header.rstrip("\r\n"), text.rstrip("\r\n"), len(df.columns))
+        if row is None:
+            quarantine.append({"line": line_no, "reason": "record does not split into "
+                               f"{len(df.columns)} fields", "text": text.rstrip("\r\n")})
+            continue
+        # Match the dtypes the C engine inferred for the bulk of the file (when it accepted any rows;
+        # the all-empty padding row alone reads as float)
+        for col in df.columns:
+            if len(df) and pd.api.types.is_numeric_dtype(df[col]):
+                row[col] = pd.to_numeric(row[col], errors="coerce")
+        parts.append(row)
+        positions = positions + [i]
+
+    if len(parts) > 1:
+        df = pd.concat(parts, ignore_index=True)
+        df = df.iloc[sorted(range(len(df)), key=positions.__getitem__)].reset_index(drop=True)
+    return df, quarantine
+
+
+def parse_csv(path: str):
+    """Parse the whole file; returns the frame and a list of quarantined rows."""
+    with open(path, encoding="utf-8") as f:
+        header = f.readline()
+        return parse_block(header, f.readlines())
+
+
+def readFileChunks(path=DATA_PATH, chunksize=5000):
+    """Yield the source in frames of at most chunksize records without loading the whole file.
+
+    Each chunk is parsed like parse_csv; its quarantined rows are in chunk.attrs["quarantine"].
+    """
+    with open(path, encoding="utf-8") as f:
+        header = f.readline()
+        block, first_line, records, in_quotes = [], 2, 0, False
+        for line_no, line in enumerate(f, start=2):
+            if not block:
+                first_line = line_no
+            block.append(line)
+            # Only cut between records, never inside a multi-line quoted field
+            in_quotes = in_quotes_after(line, in_quotes)
+            if in_quotes:
+                continue
+            records += 1
+            if records >= chunksize:
+                chunk, quarantine = parse_block(header, block, first_line)
+                chunk.attrs["quarantine"] = quarantine
+                yield chunk
+                block, records = [], 0
+
+        if block:
+            chunk, quarantine = parse_block(header, block, first_line)
+            chunk.attrs["quarantine"] = quarantine
+            yield chunk
+
+
+def readFile(path=DATA_PATH, use_snapshot=True):
+    source_hash = file_sha1(path)
+    snapshot_path, quarantine_path = snapshot_paths(path, source_hash)
+
+    if use_snapshot and feather is not None and os.path.exists(snapshot_path):
+        # Memory-mapped columnar read instead of a re-parse
+        df = feather.read_table(snapshot_path, memory_map=True).to_pandas()
+    else:
+        df, quarantine = parse_csv(path)
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        # Older snapshots of this source are no longer needed (other .snapshots files are left alone)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for pattern in (f"{stem}.*.feather", f"{stem}.*.quarantine.json"):
+            for old in glob.glob(os.path.join(SNAPSHOT_DIR, pattern)):
+                if old not in (snapshot_path, quarantine_path):
+                    try:
+                        os.remove(old)
+                    except FileNotFoundError:
+                        pass  # removed by a concurrent cold start
+        # Write to a per-process temp file and rename, so a concurrent cold start never
+        # memory-maps a half-written snapshot
+        tmp = f".{os.getpid()}.tmp"
+        with open(quarantine_path + tmp, "w", encoding="utf-8") as f:
+            json.dump({"source": path, "source_sha1": source_hash, "rows": quarantine}, f, indent=2)
+        os.replace(quarantine_path + tmp, quarantine_path)
+        if quarantine:
+            print(f"Quarantined {len(quarantine)} malformed rows -> {quarantine_path}")
+
+        if use_snapshot and feather is not None:
+            try:
+                feather.write_feather(df.reset_index(drop=True), snapshot_path + tmp, compression="uncompressed")
+                os.replace(snapshot_path + tmp, snapshot_path)
+            except Exception as e:
+                print(f"Snapshot not written: {e}")
+                if os.path.exists(snapshot_path + tmp):
+                    os.remove(snapshot_path + tmp)
+
     print("Shape:", df.shape)
     print("Columns:", df.columns.tolist())
     df.head(3)
@@ -1,27 +1,75 @@
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-import file_read
+import retrieval
+import answer_cache
+import audio
+import context_packer
+import conversation_memory
+import telemetry
+import fighter_views
+import win_model
+import query_router
 import gradio as gr
-import pandas as pd
+import asyncio
 import json
 import re
-import openai
-import tempfile
-import soundfile as sf
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 OPEN_API_KEY = os.getenv("OPEN_API_KEY")
-
-client = openai.OpenAI(
-    api_key=OPEN_API_KEY)
+# Point at a local OpenAI-compatible server (e.g. stub_llm_server.py) when set
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+# Concurrency limits: queued Gradio events run at most QUEUE_CONCURRENCY at a time,
+# up to QUEUE_MAX_SIZE wait (further requests are rejected), and outstanding
+# OpenAI calls are capped separately for chat and Whisper.
+QUEUE_CONCURRENCY = int(os.getenv("QUEUE_CONCURRENCY", "16"))
+QUEUE_MAX_SIZE = int(os.getenv("QUEUE_MAX_SIZE", "64"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+WHISPER_MAX_CONCURRENCY = int(os.getenv("WHISPER_MAX_CONCURRENCY", "4"))
+WHISPER_TIMEOUT_SECONDS = float(os.getenv("WHISPER_TIMEOUT_SECONDS", "30"))
+
+llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+whisper_semaphore = asyncio.Semaphore(WHISPER_MAX_CONCURRENCY)
+
+_client = None
+
+
+def get_client():
+    """One shared async client; its pooled HTTP connections are kept alive between requests."""
+    # Created on first use: importing openai costs close to a second of startup
+    global _client
+    if _client is None:
+        import httpx
+        import openai
+        _client = openai.AsyncOpenAI(
+            api_key=OPEN_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONCURRENCY + WHISPER_MAX_CONCURRENCY,
+                    max_keepalive_connections=LLM_MAX_CONCURRENCY + WHISPER_MAX_CONCURRENCY,
+                    keepalive_expiry=60
+                )
+            )
+        )
+    return _client
 
 
 SYSTEM_PROMPT = (
     " Answer the question based on the given context. Also return the source URL and any relevant metadata for each part of your answer."
 )
+CHAT_MODEL = "gpt-4"
+# Chunks retrieved per question; the context packer keeps what fits its token budget
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "8"))
+
+# Answers are cached on disk and dropped whenever the index changes
+answers = answer_cache.AnswerCache()
+retrieval.index_listeners.append(answers.clear)
+# Sidebar views are refreshed (only the changed fighters/events) when the data file changes
+retrieval.data_listeners.append(lambda path: fighter_views.get_views().refresh(path))
+# New data means new features and, if the data version is new, a retrained win model
+retrieval.data_listeners.append(win_model.reload)
+retrieval.data_listeners.append(query_router.reload)
 
 # --- Static Data for UI ---
 # Quick Facts about Rabindra Dhant and MMA in Nepal
@@ -41,52 +89,6 @@ sample_prompts_data = """
 *   "What was the significance of Rabindra Dhant's refusal of Indian citizenship?"
 """
 
-# Fighter comparison data for table display (attributes as rows, fighters as columns)
-fighter_comparison_data = {
-    "Attribute": [
-        "Nationality",
-        "Nickname",
-        "Age",
-        "Height",
-        "Team",
-        "Record",
-        "Win %",
-        "Win Prediction"
-    ],
-    "Rabindra Dhant": [
-        "🇳🇵 Nepalese",
-        "The Tiger of Bajhang",
-        "26 years, 8 months, 3 days",
-        "5'9\" (175cm)",
-        "Lock N Roll MMA Nepal / Soma Fight Club Bali",
-        "8-1-0",
-        "88.9%",
-        "🔥 65%"
-    ],
-    "Chungreng Koren": [
-        "🇮🇳 Indian",
-        "The Indian Rhino",
-        "27 years, 6 months, 1 day",
-        "5'8\" (173cm)",
-        "Warrior's Cove Mixed Martial Arts",
-        "7-1-0",
-        "87.5%",
-        "⚡ 35%"
-    ]
-}
-
-# Fight event data
-fight_event_data = {
-    "event": "Matrix Fight Night 17 (MFN 17)",
-    "date": "August 2, 2025",
-    "location": "Greater Noida, India",
-    "result_method": "KO/TKO (Punches)",
-    "result_round": "Round 3",
-    "result_time": "0:53",
-    "winner": "Rabindra Dhant"
-}
-
-
 def extract_json_from_text(text):
     if not isinstance(text, str):
         return None
@@ -107,127 +109,193 @@ def get_sample_prompts():
     return sample_prompts_data
 
 
-def get_fighter_comparison_table():
-    df = pd.DataFrame(fighter_comparison_data)
-    return df
-
-
-def get_fight_event_info():
-    data = fight_event_data
+def get_fighter_comparison_table(fighter_a=None, fighter_b=None):
+    # Materialized view; the default pair is Rabindra Dhant and their last opponent
+    views = fighter_views.get_views()
+    if fighter_a is None and fighter_b is None:
+        fighter_a, fighter_b = views.default_pair()
+    # The predictor loads (and trains if needed) in the warm-up thread; until then no prediction row
+    predictor = win_model.loaded_predictor()
+    prediction = None
+    if predictor is not None:
+        try:
+            prediction = predictor.probability(fighter_a, fighter_b)
+        except Exception as e:
+            print(f"Win prediction unavailable: {e}")
+    return views.comparison_table(fighter_a, fighter_b, prediction)
+
+
+def load_sidebar():
+    """Fighter choices and the default comparison table, filled in after the page loads."""
+    views = fighter_views.get_views()
+    fighter_a, fighter_b = views.default_pair()
+    fighters = views.fighters()
+    return (gr.update(choices=fighters, value=fighter_a), gr.update(choices=fighters, value=fighter_b),
+            get_fighter_comparison_table(fighter_a, fighter_b))
+
+
+def get_fight_event_info(event_name=None):
+    data = fighter_views.get_views().event(event_name)
+    if data is None:
+        return "### No event data available"
+    show = lambda value: value if value is not None else "N/A"
     markdown_output = f"""
 ### 🏆 **{data['event']}** 🏆
 
-**📅 Date:** {data['date']}
-**📍 Location:** {data['location']}
+**📅 Date:** {show(data['date'])}
+**📍 Location:** {show(data['location'])}
 
 **🥊 Fight Result:**
-*   **Winner:** **{data['winner']}** 🏆
-*   **Method:** {data['result_method']}
-*   **Round:** {data['result_round']}
-*   **Time:** {data['result_time']}
+*   **Winner:** **{show(data['winner'])}** 🏆
+*   **Method:** {show(data['method'])}
+*   **Round:** {show(data['round'])}
+*   **Time:** {show(data['time'])}
 """
     return markdown_output
 
 
-def chat_with_markdown(user_input, history=[], stats_df=None):
-    if not user_input or user_input.strip() == "":
-      return history, history, stats_df, user_input  # Return current state unchanged
+def retrieve_context(user_input):
+    """Search the shared index and build the prompt context; also returns the answer cache key."""
+    results = retrieval.get_service().query(user_input, n_results=CONTEXT_CANDIDATES)
 
-    # Drop rows with missing chunk_text
-    df_filtered = file_read.readFile().dropna(subset=["chunk_text"])
+    # Deduped, merged chunks with their source metadata, within the token budget
+    with telemetry.span("context_pack", retrieved_chunks=len(results["ids"][0])) as pack_span:
+        context = context_packer.pack_context(results["documents"][0], results["metadatas"][0])
+        pack_span.set_attribute("context_tokens", context_packer.estimate_tokens(context))
 
-    # Create list of texts
-    texts = df_filtered["chunk_text"].tolist()
-
-    # Create metadata for each chunk
-    metadatas = df_filtered[[
-        "source_url",
-        "tags"
-    ]].to_dict(orient="records")
-
-    # Load a pre-trained embedding model
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-
-    # Convert text to embeddings
-    embeddings = model.encode(texts, show_progress_bar=True)
-
-    # Create ChromaDB client
-    client = chromadb.Client(Settings())
-
-    # Create a collection
-    collection_name = "rabindra_info"
-    existing_collections = [col.name for col in client.list_collections()]
-    if collection_name in existing_collections:
-        collection = client.get_collection(name=collection_name)
-    else:
-        collection = client.create_collection(name=collection_name)
-
-    # Add data to the collection
-    collection.add(
-        documents=texts,
-        embeddings=embeddings,
-        metadatas=metadatas,
-        ids=[f"chunk_{i}" for i in range(len(texts))]
+    cache_key = answer_cache.make_key(
+        user_input,
+        results["ids"][0],
+        [meta.get("chunk_sha1", "") for meta in results["metadatas"][0]],
+        CHAT_MODEL,
+        SYSTEM_PROMPT
     )
+    return context, cache_key
 
 
-    #embedding user query
-    query_embedding = model.encode([user_input])[0]
+def prompt_messages(context, turns, user_input):
+    """System prompt with the retrieved context, earlier turns, then the question."""
+    return ([{"role": "system", "content": SYSTEM_PROMPT + "Context: " + context}]
+            + turns + [{"role": "user", "content": user_input}])
 
-    # Search in ChromaDB
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=5,
-        include=["documents", "metadatas"]
-    )
 
-    # Combine text and metadata for prompt
-    context_blocks = []
-    for doc, meta in zip(results["documents"][0], results["metadatas"][0]):
-        block = f"""
-    Source Title: {meta.get("source_title", "N/A")}
-    Author: {meta.get("author_or_channel", "N/A")}
-    Published Date: {meta.get("published_date", "N/A")}
-    Source URL: {meta.get("source_url", "N/A")}
-    Tags: {meta.get("tags", "N/A")}
-    Entities: {meta.get("entities", "N/A")}
-
-    Content:
-    {doc}
-    """
+def is_cacheable(user_input, history):
+    """Only self-contained turns are cached: the first turn of a chat, or a quick question."""
+    return not history or user_input in quick_questions
 
-    context_blocks.append(block)
 
-    context = "\n\n---\n\n".join(context_blocks)
+async def summarize_turns(summary, turns):
+    """Rolling summary of the earlier conversation, used once turns fall out of the history budget."""
+    transcript = "\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+    async with llm_semaphore:
+        response = await get_client().chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[
+                {"role": "system", "content": "Update the summary of this conversation about MMA. "
+                                              "Keep names, fights and facts the user asked about; at most "
+                                              f"{conversation_memory.SUMMARY_TOKEN_BUDGET} tokens."},
+                {"role": "user", "content": f"Summary so far: {summary or 'none'}\n\nNew turns:\n{transcript}"},
+            ],
+            max_tokens=conversation_memory.SUMMARY_TOKEN_BUDGET
+        )
+    return response.choices[0].message.content or summary
 
-    client = openai.OpenAI(
-    api_key=OPEN_API_KEY)
 
-    # Prepare messages for LLM
-    messages = [{"role": "system", "content": SYSTEM_PROMPT + "Context: " + context}]
-    for h in history:
-        messages.append({"role": "user", "content": re.sub(r"^👤 ", "", h[0])})
-        messages.append({"role": "assistant", "content": re.sub(r"^🤖 ", "", h[1])})
-    messages.append({"role": "user", "content": user_input})
+async def chat_with_markdown(user_input, history=[], stats_df=None, request: gr.Request = None):
+    # One trace per turn; ended even if the client disconnects mid-stream
+    request_trace = telemetry.RequestTrace("chat", history_turns=len(history))
+    try:
+        async for update in chat_turn(user_input, history, stats_df, request, request_trace):
+            yield update
+    finally:
+        request_trace.end()
 
-    # Call GPT
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages
-    )
 
-    print(f"response: {response.choices}" )
-    answer = response.choices[0].message.content or ""
+async def chat_turn(user_input, history, stats_df, request, request_trace):
+    if not user_input or user_input.strip() == "":
+      yield history, history, stats_df, user_input  # Return current state unchanged
+      return
 
-    # Remove JSON from text before display
-    #display_text = re.sub(r'\{.*\}', '', answer, flags=re.DOTALL).strip()
+    # Raw turns for the prompt live in per-session memory; history is only the display HTML
+    memory = conversation_memory.get_session(request.session_hash if request else "default")
+    if not history:
+        memory.reset()  # new or cleared chat
 
     # Wrap user text in white span
     user_display = f"<span style='color: red'>👤</span> <span style='color: #FFFFFF'>{user_input}</span>"
 
-    history.append((user_display, f"🤖 {answer}"))
+    # Record/event/stats questions are answered exactly from the fighter views, skipping RAG and the LLM
+    with request_trace.stage("intent_router") as router_span:
+        intent, routed = query_router.get_router().route(user_input, [q for q, _a in memory.turns])
+        router_span.set_attribute("intent", intent or "rag")
+    request_trace.set(route=intent or "rag")
+    if routed is not None:
+        memory.add_turn(user_input, routed)
+        history.append((user_display, f"🤖 {routed}"))
+        yield history, history, stats_df, ""
+        return
+
+    # Search the shared index (built once per process) off the event loop
+    context, cache_key = await asyncio.to_thread(request_trace.run, "retrieval", retrieve_context, user_input)
+
+    cacheable = is_cacheable(user_input, history)
+    request_trace.set(cacheable=cacheable)
+    if cacheable:
+        with request_trace.stage("answer_cache") as cache_span:
+            cached = await asyncio.to_thread(answers.get, cache_key)
+            cache_span.set_attribute("hit", cached is not None)
+        if cached is not None:
+            memory.add_turn(user_input, cached)
+            history.append((user_display, f"🤖 {cached}"))
+            yield history, history, stats_df, ""
+            return
+
+    # Prepare messages for LLM; a cached answer is keyed without the conversation, so it is
+    # also generated without it
+    messages = prompt_messages(context, [] if cacheable else memory.messages(), user_input)
+
+    history.append((user_display, "🤖 "))
+    yield history, history, stats_df, ""
+
+    # Call GPT and stream tokens into the last chat turn as they arrive
+    answer = ""
+    with request_trace.stage("llm", model=CHAT_MODEL, prompt_messages=len(messages),
+                             prompt_tokens_est=sum(context_packer.estimate_tokens(m["content"]) for m in messages)) as llm_span:
+        async with llm_semaphore:
+            llm_span.add_event("semaphore_acquired")
+            stream = await get_client().chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    llm_span.set_attribute("prompt_tokens", chunk.usage.prompt_tokens)
+                    llm_span.set_attribute("completion_tokens", chunk.usage.completion_tokens)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if not answer:
+                    llm_span.add_event("first_token")
+                answer += delta
+                history[-1] = (user_display, f"🤖 {answer}")
+                yield history, history, stats_df, ""
+        llm_span.set_attribute("completion_tokens_est", context_packer.estimate_tokens(answer))
+
+    if cacheable and answer:
+        await asyncio.to_thread(answers.put, cache_key, user_input, answer)
+
+    # Keep the next prompt's history within budget (after the answer is on screen)
+    memory.add_turn(user_input, answer)
+    with request_trace.stage("memory_compaction"):
+        await memory.compact(summarize_turns)
 
-    return history, history, stats_df, ""
+    # Remove JSON from text before display
+    #display_text = re.sub(r'\{.*\}', '', answer, flags=re.DOTALL).strip()
 
 
 
@@ -237,35 +305,79 @@ quick_questions = [
         "Who is his coach and mentor?",
         "How popular is MMA in Nepal?"
 ]
-def send_quick_question(question, chatbot, msg):
-    return chat_with_markdown(question, chatbot, msg)  # reuse your existing chat function
+async def send_quick_question(question, chatbot, msg, request: gr.Request = None):
+    async for update in chat_with_markdown(question, chatbot, msg, request):  # reuse your existing streaming chat function
+        yield update
+
 
+_prewarm_started = False
+
+
+async def prewarm_quick_questions():
+    """Answer the quick questions so button clicks hit the cache.
+
+    Runs once per process as a page-load event, on Gradio's event loop: the calls go through the
+    shared pooled client and wait for llm_semaphore like any chat turn.
+    """
+    global _prewarm_started
+    if _prewarm_started:
+        return
+    _prewarm_started = True
+    for question in quick_questions:
+        try:
+            context, cache_key = await asyncio.to_thread(retrieve_context, question)
+            if await asyncio.to_thread(answers.get, cache_key) is not None:
+                continue
+            async with llm_semaphore:
+                response = await get_client().chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=prompt_messages(context, [], question)
+                )
+            await asyncio.to_thread(answers.put, cache_key, question, response.choices[0].message.content or "")
+        except Exception as e:
+            print(f"Pre-warm failed for {question!r}: {e}")
 
-def transcribe_audio_to_input(audio_data):
+
+async def transcribe_audio_to_input(audio_data):
     if not audio_data:
         return ""
 
     if isinstance(audio_data, tuple) and len(audio_data) == 2:
         sample_rate, audio_array = audio_data
-
-        # Create temporary wav file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            sf.write(temp_file.name, audio_array, sample_rate)
-            temp_file_path = temp_file.name
+        request_trace = telemetry.RequestTrace("transcribe", sample_rate=sample_rate,
+                                               backend=audio.TRANSCRIBE_BACKEND)
 
         try:
+            # Mono 16 kHz, silence trimmed, compressed in memory (no temp file)
+            with request_trace.stage("audio_prepare") as prepare_span:
+                samples, stats = await asyncio.to_thread(audio.prepare, sample_rate, audio_array)
+                prepare_span.set_attributes(stats)
+            if not len(samples):
+                return ""
+
+            if audio.TRANSCRIBE_BACKEND == "local":
+                with request_trace.stage("local_whisper", model=audio.LOCAL_WHISPER_MODEL) as whisper_span:
+                    async with whisper_semaphore:
+                        transcript = await asyncio.to_thread(audio.transcribe_local, samples)
+                    whisper_span.set_attribute("transcript_chars", len(transcript))
+                return transcript
+
+            with request_trace.stage("audio_encode", format=audio.AUDIO_FORMAT) as encode_span:
+                upload = await asyncio.to_thread(audio.encode, samples)
+                encode_span.set_attribute("upload_bytes", len(upload[1]))
+
             # Transcribe using OpenAI Whisper
-            with open(temp_file_path, "rb") as f:
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=f
-                ).text
+            with request_trace.stage("whisper", model="whisper-1") as whisper_span:
+                async with whisper_semaphore:
+                    transcript = (await get_client().with_options(timeout=WHISPER_TIMEOUT_SECONDS).audio.transcriptions.create(
+                        model="whisper-1",
+                        file=upload
+                    )).text
+                whisper_span.set_attribute("transcript_chars", len(transcript))
             return transcript
 
         finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            request_trace.end()
 
     else:
         return "Invalid audio format"
@@ -277,7 +389,7 @@ def toggle_division(is_visible):
 
 
 # Gradio UI
-with gr.Blocks(css="""
+UI_CSS = """
  #response-box{
 }
  #input-box {
@@ -427,95 +539,116 @@ with gr.Blocks(css="""
 width: 100% !important;
 }
 
-""") as demo:
-    gr.Markdown("## MMS Chat Assistant")
-
-    with gr.Row():
-        with gr.Column(scale=3):
-            # Chatbot
-            chatbot = gr.Chatbot(elem_classes="chat-box", elem_id="response-box")
-
-            # Quick question buttons above input
-            with gr.Row():
-                buttons = []
-                for q_text in quick_questions:
-                    btn = gr.Button(q_text, elem_classes="quick-btn")
-                    buttons.append(btn)
-
-            # User input textbox
-            msg = gr.Textbox(label="Enter your message", placeholder="Type your question here...", elem_id="input-box")
-
-            with gr.Row():
-                with gr.Column(scale=2):
-                    clear = gr.Button("Clear Chat", elem_id="clear", scale=3)
-
-                with gr.Column(scale=2):
-                    send_btn = gr.Button("Send", elem_id="send-btn")
-
-                    microphone_toggle = gr.Button("🎤")
-
-                    # Division that will be shown/hidden
-                    with gr.Column(visible=False) as division:
-                        speech_input = gr.Audio(label="🎤 Record your question", sources=["microphone"], type="numpy",
-                                                interactive=True, elem_id="micphone")
-                    # State to track division visibility
-                    division_visible = gr.State(False)
-
-                    # Event handler
-                    microphone_toggle.click(
-                        fn=toggle_division,
-                        inputs=[division_visible],
-                        outputs=[division_visible]
-                    ).then(
-                        fn=lambda x: gr.update(visible=x),
-                        inputs=[division_visible],
-                        outputs=[division]
-                    ).then(
-                        fn=lambda x: "🔴" if x else "🎤",
-                        inputs=[division_visible],
-                        outputs=[microphone_toggle]
+"""
+
+
+def build_ui():
+    """Build the Blocks tree (called from main(), so importing this module stays cheap)."""
+    with gr.Blocks(css=UI_CSS) as demo:
+        gr.Markdown("## MMS Chat Assistant")
+
+        with gr.Row():
+            with gr.Column(scale=3):
+                # Chatbot
+                chatbot = gr.Chatbot(elem_classes="chat-box", elem_id="response-box")
+
+                # Quick question buttons above input
+                with gr.Row():
+                    buttons = []
+                    for q_text in quick_questions:
+                        btn = gr.Button(q_text, elem_classes="quick-btn")
+                        buttons.append(btn)
+
+                # User input textbox
+                msg = gr.Textbox(label="Enter your message", placeholder="Type your question here...", elem_id="input-box")
+
+                with gr.Row():
+                    with gr.Column(scale=2):
+                        clear = gr.Button("Clear Chat", elem_id="clear", scale=3)
+
+                    with gr.Column(scale=2):
+                        send_btn = gr.Button("Send", elem_id="send-btn")
+
+                        microphone_toggle = gr.Button("🎤")
+
+                        # Division that will be shown/hidden
+                        with gr.Column(visible=False) as division:
+                            speech_input = gr.Audio(label="🎤 Record your question", sources=["microphone"], type="numpy",
+                                                    interactive=True, elem_id="micphone")
+                        # State to track division visibility
+                        division_visible = gr.State(False)
+
+                        # Event handler
+                        microphone_toggle.click(
+                            fn=toggle_division,
+                            inputs=[division_visible],
+                            outputs=[division_visible]
+                        ).then(
+                            fn=lambda x: gr.update(visible=x),
+                            inputs=[division_visible],
+                            outputs=[division]
+                        ).then(
+                            fn=lambda x: "🔴" if x else "🎤",
+                            inputs=[division_visible],
+                            outputs=[microphone_toggle]
+                        )
+
+                # Connect quick question buttons to chatbot
+                for btn, q_text in zip(buttons, quick_questions):
+                    btn.click(
+                        send_quick_question,
+                        inputs=[gr.State(q_text), chatbot, msg],
+                        outputs=[chatbot, chatbot, msg, msg]
                     )
 
-            # Connect quick question buttons to chatbot
-            for btn, q_text in zip(buttons, quick_questions):
-                btn.click(
-                    send_quick_question,
-                    inputs=[gr.State(q_text), chatbot, msg],
-                    outputs=[chatbot, chatbot, msg, msg]
+            # Right sidebar with fighter info
+            with gr.Column(scale=1):
+                gr.Markdown("## 🥊 Fighter Comparison & Prediction")
+                # Placeholders; load_sidebar fills them once the page loads (the views build off the launch path)
+                with gr.Row():
+                    fighter_a_pick = gr.Dropdown([], label="Fighter A", allow_custom_value=True)
+                    fighter_b_pick = gr.Dropdown([], label="Fighter B", allow_custom_value=True)
+                fighter_table = gr.DataFrame(
+                    value=[["Loading fighter data...", "", ""]],
+                    headers=["Attribute", "Fighter A", "Fighter B"],
+                    elem_id="fighter-table",
+                    interactive=False,
+                    wrap=True,
                 )
 
-        # Right sidebar with fighter info
-        with gr.Column(scale=1):
-            gr.Markdown("## 🥊 Fighter Comparison & Prediction")
-            fighter_table = gr.DataFrame(
-                value=get_fighter_comparison_table(),
-                elem_id="fighter-table",
-                interactive=False,
-                wrap=True,
-            )
+                for pick in (fighter_a_pick, fighter_b_pick):
+                    pick.change(get_fighter_comparison_table, inputs=[fighter_a_pick, fighter_b_pick],
+                                outputs=[fighter_table], queue=False)
 
-            gr.Markdown("## 💡 Quick Facts & Context")
-            gr.Markdown(get_quick_facts())
+                gr.Markdown("## 💡 Quick Facts & Context")
+                gr.Markdown(get_quick_facts())
 
-    # Submit textbox on Enter
-    msg.submit(
-        chat_with_markdown,
-        inputs=[msg, chatbot],
-        outputs=[chatbot, chatbot, msg]
-    )
+        # Submit textbox on Enter
+        msg.submit(
+            chat_with_markdown,
+            inputs=[msg, chatbot],
+            outputs=[chatbot, chatbot, msg]
+        )
 
-    # Clear chat
-    clear.click(
-        lambda: ([], [], get_fighter_comparison_table(), ""),
-        None,
-        [chatbot, chatbot, fighter_table, msg],
-        queue=False
-    )
+        # Clear chat
+        clear.click(
+            lambda a, b: ([], [], get_fighter_comparison_table(a, b), ""),
+            [fighter_a_pick, fighter_b_pick],
+            [chatbot, chatbot, fighter_table, msg],
+            queue=False
+        )
+
+        send_btn.click(chat_with_markdown, inputs=[msg, chatbot], outputs=[chatbot, chatbot, msg])
+
+        speech_input.change(transcribe_audio_to_input, inputs=[speech_input], outputs=[msg])
 
-    send_btn.click(chat_with_markdown, inputs=[msg, chatbot], outputs=[chatbot, chatbot, msg])
+        demo.load(load_sidebar, outputs=[fighter_a_pick, fighter_b_pick, fighter_table], queue=False)
+        demo.load(prewarm_quick_questions, queue=False)
 
-    speech_input.change(transcribe_audio_to_input, inputs=[speech_input], outputs=[msg])
+    return demo
 
 
 def main():
+ demo = build_ui()
+ demo.queue(default_concurrency_limit=QUEUE_CONCURRENCY, max_size=QUEUE_MAX_SIZE)
  demo.launch()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import math
+import re
+from collections import Counter, defaultdict
+import numpy as np
+
+# In-memory BM25 over chunk text + entities, rebuilt from the vector store when the index changes.
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+# ---------------- Utility Methods ----------------
+def tokenize(text: str) -> list:
+    """Lowercase alphanumeric tokens."""
+    return _TOKEN.findall(str(text or "").lower())
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    """Merge several ranked id lists into one (higher fused score first)."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class BM25Index:
+    """Inverted index of term -> (doc positions, term frequencies), scored with Okapi BM25."""
+
+    def __init__(self, ids: list, texts: list, k1: float = BM25_K1, b: float = BM25_B):
+        self.ids = list(ids)
+        self.k1 = k1
+        self.b = b
+
+        postings = defaultdict(lambda: ([], []))
+        lengths = np.zeros(len(self.ids), dtype=np.float32)
+        for pos, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[pos] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                docs, tfs = postings[term]
+                docs.append(pos)
+                tfs.append(tf)
+
+        n_docs = max(len(self.ids), 1)
+        avg_length = float(lengths.mean()) if len(self.ids) else 1.0
+        # Per-document length normalisation, computed once
+        self._norm = k1 * (1 - b + b * lengths / max(avg_length, 1e-9))
+        self._postings = {
+            term: (np.array(docs, dtype=np.int64), np.array(tfs, dtype=np.float32),
+                   math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5)))
+            for term, (docs, tfs) in postings.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: str, k: int = 5, allowed: np.ndarray = None) -> list:
+        """Top-k ids by BM25 score; allowed is an optional boolean mask over the indexed docs."""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term not in self._postings:
+                continue
+            docs, tfs, idf = self._postings[term]
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[docs])
+
+        if allowed is not None:
+            scores[~allowed] = 0
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [self.ids[i] for i in hits]
@@ -1,9 +1,101 @@
-import file_read
-import data_cleanup
-import gradio_ui
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
 
-file_read.readFile()
-data_cleanup.main()
-gradio_ui.main()
+# Entry point:
+#   python main.py                -> serve the chat UI (default)
+#   python main.py report         -> EDA report on the data file (no UI)
+#   python main.py check-imports  -> fail if importing the UI exceeds the import-time budget
 
+# Seconds allowed for `import gradio_ui` in a fresh interpreter
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
 
+
+def report():
+    """Data file summary, cleaning report and mindmap (what used to run before every launch)."""
+    import file_read
+    import data_cleanup
+
+    file_read.readFile()
+    data_cleanup.main()
+
+
+def warm_up():
+    """Load the model/index and start background jobs while the UI binds its port."""
+    import retrieval
+    import fighter_views
+    import gradio_ui  # registers its index/data listeners before the index is built
+    import win_model
+
+    def _run():
+        try:
+            # Sidebar views; the first page load waits on the same singleton
+            fighter_views.get_views()
+
+            # Build (or load) the retrieval index; early requests wait on the same singleton
+            retrieval.get_service()
+
+            # Load the win model, training it first if this data version has none yet
+            try:
+                win_model.get_predictor()
+            except Exception as e:
+                print(f"Win model unavailable: {e}")
+
+            # Pick up edits to the data file without a restart
+            # (the quick-question answers are pre-warmed by the UI's page-load event)
+            retrieval.watch_data_file()
+        except Exception as e:
+            print(f"Warm-up failed: {e}")
+
+    thread = threading.Thread(target=_run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def serve():
+    import telemetry
+
+    # Spans to ./.telemetry, latency histograms on the local /metrics endpoint
+    telemetry.setup()
+
+    warm_up()
+
+    import gradio_ui
+    gradio_ui.main()
+
+
+def check_imports(module: str = "gradio_ui", budget: float = IMPORT_BUDGET_SECONDS) -> int:
+    """Time `import module` in a fresh interpreter; non-zero exit when over budget (for CI)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        return result.returncode
+
+    # "import time: self [us] | cumulative | imported package", one line per module
+    # (nesting depth is the indent of the package name)
+    timings = [(int(cumulative), len(name) - len(name.lstrip()), name.strip())
+               for _self, cumulative, name in re.findall(r"import time:\s+(\d+) \|\s+(\d+) \|(.*)", result.stderr)]
+    total = next((us for us, depth, name in reversed(timings) if depth == 1 and name == module), 0) / 1e6
+    print(f"import {module}: {total:.2f}s (budget {budget:.2f}s)")
+    # Slowest direct imports of the module
+    for us, _depth, name in sorted((t for t in timings if t[1] == 3), reverse=True)[:10]:
+        print(f"  {us / 1e6:6.2f}s  {name}")
+    return 0 if total <= budget else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MMA chat assistant")
+    parser.add_argument("mode", nargs="?", default="serve", choices=["serve", "report", "check-imports"])
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS)
+    args = parser.parse_args()
+
+    if args.mode == "report":
+        report()
+    elif args.mode == "check-imports":
+        sys.exit(check_imports(budget=args.budget))
+    else:
+        serve()
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import mmh3
+from lexical import tokenize
+
+# Near-duplicate chunk detection before embedding: MinHash signatures over word shingles,
+# LSH banding to find candidate pairs, and union-find clusters of pairs whose estimated
+# Jaccard similarity clears NEAR_DUP_THRESHOLD. One chunk per cluster is kept. Signatures are
+# cached by text hash, and LSHIndex keeps the indexed chunks' signatures next to the vector
+# store so a new batch is only checked against the buckets it falls into.
+
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# 16 bands x 8 rows: pairs above ~0.7 Jaccard almost always share a bucket
+LSH_BANDS = 16
+# Signatures kept in memory, keyed by the SHA1 of the text (128 x 8 bytes each)
+SIGNATURE_CACHE_SIZE = int(os.getenv("SIGNATURE_CACHE_SIZE", "20000"))
+# LSHIndex file inside the vector store directory
+LSH_FILE = "near_dup_lsh.npz"
+
+_SHA1 = re.compile(r"^[0-9a-f]{40}$")
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+
+_signature_cache = OrderedDict()  # text SHA1 -> signature (LRU)
+_signature_lock = threading.Lock()
+
+
+# ---------------- Utility Methods ----------------
+def shingles(text: str, k: int = SHINGLE_WORDS) -> set:
+    """Overlapping k-word windows of the lowercased text (the whole text if it is shorter)."""
+    words = tokenize(text)
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature: per permutation, the minimum of (a * h + b) mod p over the shingle hashes."""
+    hashes = np.fromiter((mmh3.hash(s, signed=False) for s in shingles(text)), dtype=np.uint64)
+    if not len(hashes):
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def signatures(texts: list) -> np.ndarray:
+    """Signatures of the texts (one row each), reusing cached ones for texts seen before."""
+    rows = []
+    for text in texts:
+        key = hashlib.sha1(text.encode("utf-8")).digest()
+        with _signature_lock:
+            sig = _signature_cache.get(key)
+            if sig is not None:
+                _signature_cache.move_to_end(key)
+        if sig is None:
+            sig = signature(text)
+            with _signature_lock:
+                _signature_cache[key] = sig
+                while len(_signature_cache) > SIGNATURE_CACHE_SIZE:
+                    _signature_cache.popitem(last=False)
+        rows.append(sig)
+    return np.vstack(rows) if rows else np.empty((0, NUM_PERM), dtype=np.uint64)
+
+
+def band_keys(sig: np.ndarray, bands: int = LSH_BANDS) -> list:
+    """LSH bucket key of the signature in every band."""
+    rows = NUM_PERM // bands
+    return [sig[band * rows:(band + 1) * rows].tobytes() for band in range(bands)]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def _find(parent: list, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def clusters(texts: list, threshold: float = NEAR_DUP_THRESHOLD, bands: int = LSH_BANDS) -> list:
+    """Cluster id (the position of its first member) for every text."""
+    sigs = signatures(texts)
+    rows = NUM_PERM // bands
+    parent = list(range(len(texts)))
+    for band in range(bands):
+        buckets = {}
+        for i, key in enumerate(map(bytes, sigs[:, band * rows:(band + 1) * rows])):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = _find(parent, first), _find(parent, other)
+                if root_a != root_b and similarity(sigs[first], sigs[other]) >= threshold:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+    return [_find(parent, i) for i in range(len(texts))]
+
+
+def dedupe(ids: list, texts: list, metadatas: list, threshold: float = NEAR_DUP_THRESHOLD):
+    """Keep the longest chunk of each near-duplicate cluster.
+
+    The kept chunk's metadata records the cluster (near_dup_key, next to content_hash_sha1),
+    the ids it absorbed (merged_ids) and the other sources that carried the same text (merged_sources).
+    """
+    cluster_of = clusters(texts, threshold)
+    members = {}
+    for i, cluster in enumerate(cluster_of):
+        members.setdefault(cluster, []).append(i)
+
+    kept = []
+    for cluster, positions in members.items():
+        keep = max(positions, key=lambda i: (len(texts[i]), -i))
+        meta = dict(metadatas[keep])
+        merged = [i for i in positions if i != keep]
+        # The first member's content hash, or a hash of its text when that column is unusable
+        content_hash = str(metadatas[cluster].get("content_hash_sha1", "")).strip().lower()
+        meta["near_dup_key"] = content_hash if _SHA1.match(content_hash) else \
+            hashlib.sha1(texts[cluster].encode("utf-8")).hexdigest()
+        meta["merged_ids"] = ", ".join(ids[i] for i in merged)
+        own = meta.get("source_url", "")
+        meta["merged_sources"] = ", ".join(dict.fromkeys(
+            url for url in (metadatas[i].get("source_url", "") for i in merged) if url and url != own))
+        kept.append((keep, meta))
+
+    kept.sort()
+    return ([ids[i] for i, _ in kept], [texts[i] for i, _ in kept], [meta for _, meta in kept])
+
+
+class LSHIndex:
+    """Persistent LSH buckets of the chunks in a vector store: chunk id -> signature.
+
+    match() checks a new chunk against the indexed ones sharing a bucket with it, so
+    incremental upserts catch near-duplicates of chunks indexed in earlier batches.
+    """
+
+    def __init__(self, path: str = None, bands: int = LSH_BANDS):
+        self.path = path
+        self.bands = bands
+        self.signatures = {}  # chunk id -> signature
+        self._buckets = [{} for _ in range(bands)]  # per band: key -> set of chunk ids
+        if path and os.path.exists(path):
+            with np.load(path, allow_pickle=False) as data:
+                self.add(data["ids"].tolist(), data["signatures"])
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def add(self, ids: list, sigs: np.ndarray):
+        self.remove([chunk_id for chunk_id in ids if chunk_id in self.signatures])
+        for chunk_id, sig in zip(ids, sigs):
+            self.signatures[chunk_id] = sig
+            for buckets, key in zip(self._buckets, band_keys(sig, self.bands)):
+                buckets.setdefault(key, set()).add(chunk_id)
+
+    def remove(self, ids: list):
+        for chunk_id in ids:
+            sig = self.signatures.pop(chunk_id, None)
+            if sig is None:
+                continue
+            for buckets, key in zip(self._buckets, band_keys(sig, self.bands)):
+                members = buckets.get(key)
+                members.discard(chunk_id)
+                if not members:
+                    del buckets[key]
+
+    def reset(self, ids: list, sigs: np.ndarray):
+        self.signatures = {}
+        self._buckets = [{} for _ in range(self.bands)]
+        self.add(ids, sigs)
+
+    def match(self, chunk_id: str, sig: np.ndarray, threshold: float = NEAR_DUP_THRESHOLD):
+        """Id of an indexed chunk (other than chunk_id) this signature is a near-duplicate of, or None."""
+        candidates = set()
+        for buckets, key in zip(self._buckets, band_keys(sig, self.bands)):
+            candidates |= buckets.get(key, set())
+        candidates.discard(chunk_id)
+        return next((other for other in sorted(candidates)
+                     if similarity(sig, self.signatures[other]) >= threshold), None)
+
+    def save(self):
+        """Write the index atomically (tmp file + rename)."""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        ids = list(self.signatures)
+        sigs = np.vstack([self.signatures[i] for i in ids]) if ids else np.empty((0, NUM_PERM), dtype=np.uint64)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, ids=np.array(ids, dtype=str), signatures=sigs)
+        os.replace(tmp, self.path)
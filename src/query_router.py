@@ -0,0 +1,298 @@
+import re
+import threading
+import pandas as pd
+import file_read
+import fighter_views
+
+# Structured fast path in front of RAG: record, finish-count and event questions about known
+# fighters/events are answered straight from the materialized views, with source URLs.
+# Anything it cannot answer exactly (open-ended questions, unknown or unrelated entities)
+# returns None and goes through retrieval + the LLM as before.
+
+MAX_SOURCES = 3
+# Aliases shorter than this are too ambiguous to match inside a question
+MIN_ALIAS_CHARS = 4
+
+_PRONOUN = re.compile(r"\b(he|his|him|she|her|they|their|them)\b")
+_OPEN_ENDED = re.compile(r"\b(why|explain|describe|tell me|significance|background|story|think|feel|compare|predict)\b")
+# A record or finish count narrowed to some opponents or period ("record against Indian fighters")
+# is not what the views hold; those questions go to RAG
+_QUALIFIER = re.compile(r"\b(against|vs|versus|in|at|since|before|after|opponents?|countr(y|ies))\b")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_ACRONYM_SOURCE = re.compile(r"^(.*?)\s*\(([A-Za-z]{2,})\)$")
+# Intents in priority order; each needs a fighter, an event or both to be answerable
+INTENTS = [
+    ("event_opponent", re.compile(r"\bwho\b.*\b(fight|fought|face|faced|against|opponent)\b")),
+    ("event_winner", re.compile(r"\bwho\b.*\b(won|win|winner)\b")),
+    ("method_count", re.compile(r"\bhow many\b.*\b(ko|tko|knockouts?|submissions?|decisions?)\b")),
+    ("record", re.compile(r"\b(record|win loss|wins and losses|how many (wins|losses|fights))\b")),
+    ("last_fight", re.compile(r"\b(last|latest|most recent|previous) (fight|bout|match)\b")),
+    ("age", re.compile(r"\b(how old|age)\b")),
+    ("height", re.compile(r"\b(how tall|height)\b")),
+    ("event_result", re.compile(r"\b(how|what round|which round|when|where|what time|method|result)\b")),
+]
+KIND_WORDS = {"ko": "knockout", "sub": "submission", "dec": "decision"}
+_WORD_KINDS = {word: kind for kind, word in KIND_WORDS.items()}
+_KIND_WORD = re.compile(r"\b(knockout|submission|decision)s?\b")
+
+
+# ---------------- Utility Methods ----------------
+def normalize(text: str) -> str:
+    """Lowercase words separated by single spaces ("Dhant's" -> "dhant s"), padded for alias lookups."""
+    return " " + _NON_WORD.sub(" ", str(text).lower()).strip() + " "
+
+
+def event_aliases(name: str) -> set:
+    """"Matrix Fight Night 17" -> {"matrix fight night 17", "mfn 17", "mfn17"}."""
+    words = normalize(name).split()
+    aliases = {" ".join(words)}
+    letters = [w for w in words if not w.isdigit()]
+    numbers = [w for w in words if w.isdigit()]
+    if len(letters) > 1 and numbers:
+        acronym = "".join(w[0] for w in letters)
+        aliases |= {f"{acronym} {' '.join(numbers)}", acronym + "".join(numbers)}
+    elif len(letters) == 1 and numbers:
+        aliases.add(letters[0] + "".join(numbers))  # "UFC 312" -> "ufc312"
+    return aliases
+
+
+def describe_bout(entry: dict) -> str:
+    """"won by KO/TKO in round 3 (00:53)" for one history entry of a fighter profile."""
+    result = (entry.get("result") or "").lower()
+    text = {"win": "won", "loss": "lost", "draw": "drew"}.get(result, result or "fought")
+    if entry.get("method"):
+        text += f" by {entry['method']}"
+    if entry.get("round"):
+        text += f" in round {entry['round']}"
+    if entry.get("time"):
+        text += f" ({entry['time']})"
+    return text
+
+
+def with_sources(text: str, sources: list) -> str:
+    if not sources:
+        return text
+    return text + "\n\n**Sources:**\n" + "\n".join(f"- {url}" for url in sources[:MAX_SOURCES])
+
+
+class EntityIndex:
+    """Fighter, event and other named-entity aliases from the fighter_a/fighter_b, event_name and entities columns."""
+
+    def __init__(self, df: pd.DataFrame, views: fighter_views.FighterViews):
+        self.fighters = {}  # alias -> fighter name
+        self.events = {}  # alias -> event name
+        self.other = set()  # known entities that are neither (people, places, gyms, ...)
+
+        names = views.fighters()
+        for name in names:
+            self.fighters[normalize(name).strip()] = name
+        # Variant spellings of a fighter's name
+        for variant, key in views.aliases.items():
+            profile = views.profile(key)
+            if profile is not None:
+                self.fighters[normalize(variant).strip()] = profile["name"]
+        # First or last name alone, when no other fighter shares it
+        for position in (0, -1):
+            parts = {}
+            for name in names:
+                parts.setdefault(normalize(name).split()[position], set()).add(name)
+            for part, owners in parts.items():
+                if len(owners) == 1 and len(part) >= MIN_ALIAS_CHARS:
+                    self.fighters.setdefault(part, owners.pop())
+
+        events = views.event_names()
+        for event in events:
+            for alias in event_aliases(event):
+                self.events[alias] = event
+
+        entities = df['entities'].dropna().astype(str) if 'entities' in df else []
+        for entity in {e.strip() for cell in entities for e in cell.split(",") if e.strip()}:
+            alias = normalize(entity).strip()
+            # "Nepal Warriors Championship (NWC)" names the promotion behind "NWC 1"
+            match = _ACRONYM_SOURCE.match(entity)
+            if match:
+                long_name, acronym = normalize(match.group(1)).strip(), match.group(2).lower()
+                for event in events:
+                    words = normalize(event).split()
+                    if words[0] == acronym and len(words) > 1:
+                        self.events.setdefault(f"{long_name} {' '.join(words[1:])}", event)
+            if alias in self.fighters or alias in self.events or len(alias) < MIN_ALIAS_CHARS:
+                continue
+            self.other.add(alias)
+
+        # Longest aliases first, so "matrix fight night 17" wins over shorter overlaps
+        self._fighter_aliases = sorted(self.fighters, key=len, reverse=True)
+        self._event_aliases = sorted(self.events, key=len, reverse=True)
+        self._other_aliases = sorted(self.other, key=len, reverse=True)
+
+    def find(self, text: str):
+        """(fighters, events, other entities) mentioned in text, in order of first mention."""
+        text = normalize(text)
+        found = {}
+        for kind, aliases, lookup in (("fighters", self._fighter_aliases, self.fighters),
+                                      ("events", self._event_aliases, self.events),
+                                      ("other", self._other_aliases, None)):
+            hits = []
+            for alias in aliases:
+                position = text.find(f" {alias} ")
+                if position >= 0:
+                    hits.append((position, lookup[alias] if lookup else alias))
+                    text = text.replace(f" {alias} ", " " + "_" * len(alias) + " ")
+            found[kind] = list(dict.fromkeys(name for _, name in sorted(hits)))
+        return found["fighters"], found["events"], found["other"]
+
+
+class QueryRouter:
+    """Answers structured fighter/event questions from the views; None means "use RAG"."""
+
+    def __init__(self, views: fighter_views.FighterViews = None, df: pd.DataFrame = None):
+        self.views = views or fighter_views.get_views()
+        self.entities = EntityIndex(file_read.readFile() if df is None else df, self.views)
+
+    def route(self, question: str, previous_questions=()):
+        """(intent, answer) for a structured question, or (None, None)."""
+        text = normalize(question)
+        if _OPEN_ENDED.search(text):
+            return None, None
+        fighters, events, other = self.entities.find(question)
+        if other or len(fighters) > 1 or len(events) > 1:
+            return None, None  # mentions something the views do not cover, or a comparison
+        if not fighters and _PRONOUN.search(text):
+            fighters = self._last_fighter(previous_questions)
+        fighter = self.views.profile(fighters[0]) if fighters else None
+        event = self.views.event(events[0]) if events else None
+
+        for intent, pattern in INTENTS:
+            if pattern.search(text):
+                answer = getattr(self, f"_{intent}")(fighter, event, text)
+                if answer is not None:
+                    return intent, answer
+        return None, None
+
+    def answer(self, question: str, previous_questions=()):
+        return self.route(question, previous_questions)[1]
+
+    def _last_fighter(self, previous_questions) -> list:
+        """The fighter a pronoun refers to: the last one named in this chat, else the default fighter."""
+        for previous in reversed(list(previous_questions)):
+            fighters, _events, _other = self.entities.find(previous)
+            if fighters:
+                return fighters[-1:]
+        return [fighter_views.DEFAULT_FIGHTER]
+
+    # ---------------- Intents ----------------
+    @staticmethod
+    def _bout_at(fighter: dict, event: dict):
+        return next((entry for entry in fighter["history"] if fighter_views._key(entry["event"]) ==
+                     fighter_views._key(event["event"])), None)
+
+    def _event_opponent(self, fighter, event, _text):
+        if event is None:
+            return None
+        if fighter is None:
+            return with_sources(f"At **{event['event']}** ({event['date']}), **{event['fighter_a']}** fought "
+                                f"**{event['fighter_b']}**.", event["sources"])
+        entry = self._bout_at(fighter, event)
+        if entry is None or not entry.get("opponent"):
+            return None
+        return with_sources(f"At **{event['event']}** ({entry['date'] or event['date']}), {fighter['name']} fought "
+                            f"**{entry['opponent']}** and {describe_bout(entry)}.", event["sources"])
+
+    def _event_winner(self, fighter, event, _text):
+        if event is None or not event.get("winner"):
+            return None
+        text = f"**{event['winner']}** won at **{event['event']}** ({event['date']})"
+        if event.get("method"):
+            text += f" by {event['method']}"
+        if event.get("round"):
+            text += f" in round {event['round']}"
+        return with_sources(text + ".", event["sources"])
+
+    def _method_count(self, fighter, event, text):
+        if fighter is None or event is not None or _QUALIFIER.search(text):
+            return None
+        # "knockouts" -> "ko" etc., so method_kind reads the spelled-out (and plural) forms too
+        kind = fighter_views.method_kind(_KIND_WORD.sub(lambda m: _WORD_KINDS[m.group(1)], text))
+        if kind is None:
+            return None
+        wins = [entry for entry in fighter["history"]
+                if (entry["result"] or "").lower() == "win" and fighter_views.method_kind(entry["method"]) == kind]
+        on_file = ", ".join(f"{entry['event']} vs {entry['opponent']}" for entry in wins if entry["event"])
+        if kind == "ko" and fighter.get("knockouts") is not None:
+            answer = f"{fighter['name']} has **{fighter['knockouts']}** career wins by knockout."
+            if on_file:
+                answer += f" Knockout wins on file: {on_file}."
+        else:
+            answer = f"{fighter['name']} has **{len(wins)}** {KIND_WORDS[kind]} wins on file"
+            answer += f" ({on_file})." if on_file else "."
+        return with_sources(answer, fighter["sources"])
+
+    def _record(self, fighter, event, text):
+        if fighter is None or event is not None or not fighter.get("record") or _QUALIFIER.search(text):
+            return None
+        answer = (f"{fighter['name']}'s professional record is **{fighter_views.format_record(fighter['record'])}** "
+                  f"(wins-losses-draws)")
+        if fighter.get("win_pct") is not None:
+            answer += f", a {fighter['win_pct']}% win rate"
+        answer += "."
+        last = fighter["history"][0] if fighter["history"] else {}
+        if last.get("event"):
+            answer += (f" Most recent fight: {describe_bout(last)} against {last['opponent']} at "
+                       f"{last['event']} ({last['date']}).")
+        return with_sources(answer, fighter["sources"])
+
+    def _last_fight(self, fighter, event, _text):
+        if fighter is None or event is not None or not fighter["history"] or not fighter["history"][0]["event"]:
+            return None
+        entry = fighter["history"][0]
+        return with_sources(f"{fighter['name']}'s most recent fight on file was at **{entry['event']}** "
+                            f"({entry['date']}) against **{entry['opponent']}**: they {describe_bout(entry)}.",
+                            fighter["sources"])
+
+    def _age(self, fighter, event, _text):
+        if fighter is None or event is not None or not fighter_views._present(fighter.get("age")):
+            return None
+        when = f" at {fighter['last_event']}" if fighter.get("last_event") else ""
+        return with_sources(f"{fighter['name']} was **{fighter['age']:.0f}** years old{when}.", fighter["sources"])
+
+    def _height(self, fighter, event, _text):
+        if fighter is None or event is not None or not fighter_views._present(fighter.get("height_cm")):
+            return None
+        return with_sources(f"{fighter['name']} is **{fighter['height_cm']:.0f} cm** tall.", fighter["sources"])
+
+    def _event_result(self, fighter, event, _text):
+        if event is None:
+            return None
+        if fighter is not None:
+            entry = self._bout_at(fighter, event)
+            if entry is None:
+                return None
+            return with_sources(f"At **{event['event']}** ({entry['date'] or event['date']}), {fighter['name']} "
+                                f"{describe_bout(entry)} against **{entry['opponent']}**.", event["sources"])
+        lines = [f"**{event['event']}**"]
+        for label, field in (("Date", "date"), ("Location", "location"), ("Winner", "winner"),
+                             ("Method", "method"), ("Round", "round"), ("Time", "time")):
+            if event.get(field) is not None:
+                lines.append(f"*   **{label}:** {event[field]}")
+        return with_sources("\n".join(lines), event["sources"])
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> QueryRouter:
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = QueryRouter()
+    return _router
+
+
+def reload(path: str = file_read.DATA_PATH):
+    """Rebuild the entity index after the data file (and the views) changed."""
+    global _router
+    router = QueryRouter(fighter_views.get_views(), file_read.readFile(path))
+    with _router_lock:
+        _router = router
@@ -0,0 +1,442 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+from watchfiles import watch
+import embeddings
+import file_read
+import lexical
+import near_dup
+import telemetry
+import vector_store
+
+CHROMA_PATH = vector_store.CHROMA_PATH
+COLLECTION_NAME = vector_store.COLLECTION_NAME
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+# Columns stored as chunk metadata (shown in the prompt and usable in where filters)
+METADATA_COLUMNS = [
+    "source_url",
+    "source_type",
+    "source_title",
+    "author_or_channel",
+    "published_date",
+    "tags",
+    "entities",
+    "event_name",
+    "fighter_a",
+    "fighter_b",
+    # Used by the context packer to dedupe, merge and budget chunks
+    "item_id",
+    "content_hash_sha1",
+    "chunk_index",
+    "char_start",
+    "char_end",
+    "token_est",
+]
+# Hits taken from each of the vector and BM25 searches before fusion, per requested result
+CANDIDATE_MULTIPLIER = 3
+# Chunks read from the store at a time while building the BM25 index
+LEXICAL_PAGE_SIZE = int(os.getenv("LEXICAL_PAGE_SIZE", "5000"))
+
+# Collapse near-duplicate chunks before embedding (see near_dup.py)
+NEAR_DUP_DEDUP = os.getenv("NEAR_DUP_DEDUP", "1") != "0"
+
+# Callbacks run after the index content changes (e.g. to drop cached answers)
+index_listeners = []
+# Callbacks run with the data file path after watch_data_file() sees it change
+data_listeners = []
+
+
+# ---------------- Utility Methods ----------------
+def chunk_ids(df: pd.DataFrame) -> list:
+    """Stable ids keyed on item_id/chunk_index (a #n suffix separates repeated keys)."""
+    chunk_index = pd.to_numeric(df["chunk_index"], errors="coerce").fillna(0).astype(int).astype(str)
+    base = df["item_id"].fillna("item").astype(str) + "::" + chunk_index
+    repeat = base.groupby(base).cumcount()
+    return base.where(repeat == 0, base + "#" + repeat.astype(str)).tolist()
+
+
+def chunk_hash(text: str, metadata: dict) -> str:
+    """SHA1 over the chunk text and its metadata, used to detect changed chunks."""
+    payload = text + json.dumps(metadata, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def chunk_records(df: pd.DataFrame, dedupe: bool = NEAR_DUP_DEDUP):
+    """Ids, texts and metadata (including chunk_sha1) for every row with chunk_text.
+
+    With dedupe, near-duplicate chunks (scraped copies of the same story) collapse to one.
+    """
+    # Drop rows with missing chunk_text
+    df_filtered = df.dropna(subset=["chunk_text"])
+
+    ids = chunk_ids(df_filtered)
+    texts = df_filtered["chunk_text"].tolist()
+    # Chroma metadata values must be scalars, so everything is stored as text
+    metadatas = df_filtered.reindex(columns=METADATA_COLUMNS).fillna("").astype(str).to_dict(orient="records")
+    if dedupe and ids:
+        with telemetry.span("near_dup", chunks=len(ids)) as dedup_span:
+            ids, texts, metadatas = near_dup.dedupe(ids, texts, metadatas)
+            dedup_span.set_attribute("kept", len(ids))
+    for text, meta in zip(texts, metadatas):
+        meta["chunk_sha1"] = chunk_hash(text, meta)
+    return ids, texts, metadatas
+
+
+class RetrievalService:
+    """Embedding model + persistent vector store (Chroma or FAISS), built once per process."""
+
+    def __init__(self, persist_path: str = None, collection_name: str = COLLECTION_NAME,
+                 backend: str = embeddings.EMBEDDING_BACKEND, sync: bool = True,
+                 store: str = vector_store.VECTOR_STORE):
+        # Load a pre-trained embedding model on the configured CPU backend
+        with telemetry.span("model_load", backend=backend):
+            self.model = embeddings.Embedder(backend)
+
+        # Open the persisted store (the Chroma one ships with the repo; created if missing).
+        # Without an explicit path it follows the serving alias written by db_config.py; a
+        # versioned build is served read-only (see read_only).
+        self.store_name = store
+        self.collection_name = collection_name
+        self.follow_alias = persist_path is None
+        self._alias_mtime = self._alias_stamp()
+        with telemetry.span("store_open", store=store):
+            self.store = vector_store.open_store(store, persist_path, collection_name)
+        self._sync_lock = threading.Lock()
+
+        # In-memory LRU of query embeddings, keyed on the normalized query text
+        self._embed_query = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(self._encode_query)
+
+        # BM25 index over the stored chunks, rebuilt lazily after the collection changes
+        self._lexical = None
+        self._lexical_lock = threading.Lock()
+
+        # Near-duplicate LSH index of the stored chunks, loaded on the first write
+        self._near_dups = None
+
+        # Bring the store up to date; only new or changed chunks get embedded
+        if sync and self.read_only:
+            print(f"Serving {store} index version {vector_store.current_version(store)} read-only; "
+                  "rebuild with `python db_config.py build` to pick up data changes")
+        elif sync:
+            self.sync_index()
+
+    @property
+    def read_only(self) -> bool:
+        """True while serving a versioned build: those only change through db_config.py build + an alias switch."""
+        return self.follow_alias and vector_store.current_version(self.store_name) is not None
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"{self.store_name} index version {vector_store.current_version(self.store_name)} "
+                               "is read-only; rebuild with `python db_config.py build`")
+
+    def _indexed_hashes(self, ids: list = None) -> dict:
+        """chunk id -> stored chunk_sha1, for the given ids or the whole collection."""
+        indexed = self.store.get(ids=ids, include=["metadatas"])
+        return {
+            chunk_id: (meta or {}).get("chunk_sha1")
+            for chunk_id, meta in zip(indexed["ids"], indexed["metadatas"])
+        }
+
+    def _upsert_changed(self, ids: list, texts: list, metadatas: list, indexed_hashes: dict) -> dict:
+        """Embed and upsert only chunks whose hash differs from the stored one."""
+        changed = [i for i, chunk_id in enumerate(ids)
+                   if indexed_hashes.get(chunk_id) != metadatas[i]["chunk_sha1"]]
+
+        if changed:
+            # Convert only the new/changed text to embeddings
+            with telemetry.span("embed_chunks", chunks=len(changed)):
+                embeddings = self.model.encode([texts[i] for i in changed], show_progress_bar=True)
+            self.store.upsert(
+                documents=[texts[i] for i in changed],
+                embeddings=embeddings,
+                metadatas=[metadatas[i] for i in changed],
+                ids=[ids[i] for i in changed]
+            )
+
+        if changed:
+            self._lexical = None
+            _notify_index_changed()
+
+        added = sum(1 for i in changed if ids[i] not in indexed_hashes)
+        return {
+            "added": added,
+            "updated": len(changed) - added,
+            "unchanged": len(ids) - len(changed),
+        }
+
+    def _near_dup_index(self) -> near_dup.LSHIndex:
+        """LSH index saved next to the store files (loaded once per store)."""
+        if self._near_dups is None:
+            self._near_dups = near_dup.LSHIndex(os.path.join(self.store.path, near_dup.LSH_FILE))
+        return self._near_dups
+
+    def upsert_chunks(self, df: pd.DataFrame) -> dict:
+        """Add or update one batch of rows; chunks missing from the batch are left alone.
+
+        With near-duplicate dedupe, chunks matching one indexed by an earlier batch are skipped.
+        """
+        self._check_writable()
+        ids, texts, metadatas = chunk_records(df)
+        if not ids:
+            return {"added": 0, "updated": 0, "unchanged": 0, "near_duplicates": 0}
+        with self._sync_lock:
+            skipped = 0
+            if NEAR_DUP_DEDUP:
+                index = self._near_dup_index()
+                sigs = near_dup.signatures(texts)
+                new = [i for i, (chunk_id, sig) in enumerate(zip(ids, sigs)) if index.match(chunk_id, sig) is None]
+                skipped = len(ids) - len(new)
+                ids, texts, metadatas = [ids[i] for i in new], [texts[i] for i in new], [metadatas[i] for i in new]
+                index.add(ids, sigs[new])
+            summary = self._upsert_changed(ids, texts, metadatas, self._indexed_hashes(ids))
+            self.store.commit()
+            if NEAR_DUP_DEDUP:
+                index.save()
+            summary["near_duplicates"] = skipped
+            return summary
+
+    def sync_index(self, path: str = file_read.DATA_PATH) -> dict:
+        """Diff the data file against the collection and apply the changes."""
+        self._check_writable()
+        with self._sync_lock:
+            with telemetry.span("read_file", path=path):
+                ids, texts, metadatas = chunk_records(file_read.readFile(path))
+
+            # Compare against the hashes already stored in the collection
+            indexed_hashes = self._indexed_hashes()
+            removed = sorted(set(indexed_hashes) - set(ids))
+            if removed:
+                self.store.delete(ids=removed)
+                self._lexical = None
+                _notify_index_changed()
+
+            summary = self._upsert_changed(ids, texts, metadatas, indexed_hashes)
+            # One write of the store files for the whole sync
+            self.store.commit()
+            if NEAR_DUP_DEDUP:
+                # The whole file was just deduped; its kept chunks are the index (signatures are cached)
+                index = self._near_dup_index()
+                index.reset(ids, near_dup.signatures(texts))
+                index.save()
+            summary["deleted"] = len(removed)
+            print("Index sync:", summary)
+            return summary
+
+    def _encode_query(self, normalized_text: str):
+        return self.model.encode([normalized_text])[0]
+
+    @staticmethod
+    def _alias_stamp():
+        try:
+            return os.stat(vector_store.ALIAS_PATH).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _follow_alias(self):
+        """Swap to the store the alias points at if it changed (a new build or a rollback)."""
+        if not self.follow_alias or self._alias_stamp() == self._alias_mtime:
+            return
+        with self._sync_lock:
+            stamp = self._alias_stamp()
+            if stamp == self._alias_mtime:
+                return
+            with telemetry.span("store_open", store=self.store_name):
+                store = vector_store.open_store(self.store_name, None, self.collection_name)
+            self.store, self._alias_mtime, self._lexical, self._near_dups = store, stamp, None, None
+        print(f"Serving {self.store_name} index version {vector_store.current_version(self.store_name)}")
+        _notify_index_changed()
+
+    def _lexical_index(self) -> dict:
+        """BM25 index plus the fighter/event postings and names.
+
+        Documents are read a page at a time and not kept: resident memory is the BM25
+        postings (a few bytes per token) and the name postings; query() fetches its hits' text.
+        """
+        lexical_index = self._lexical
+        if lexical_index is not None:
+            return lexical_index
+        with self._lexical_lock:
+            if self._lexical is None:
+                ids = self.store.get(include=[])["ids"]
+                # Postings: fighter / event name -> positions of its chunks (the BM25 doc order)
+                fighters, events = {}, {}
+
+                def texts():
+                    # Also fills the name postings as the pages go by
+                    for start in range(0, len(ids), LEXICAL_PAGE_SIZE):
+                        page_ids = ids[start:start + LEXICAL_PAGE_SIZE]
+                        page = self.store.get(ids=page_ids, include=["documents", "metadatas"])
+                        stored = dict(zip(page["ids"], zip(page["documents"], page["metadatas"])))
+                        for pos, chunk_id in enumerate(page_ids, start=start):
+                            doc, meta = stored[chunk_id]
+                            meta = meta or {}
+                            for name in {meta.get("fighter_a", ""), meta.get("fighter_b", "")}:
+                                if name.strip():
+                                    fighters.setdefault(name, []).append(pos)
+                            if meta.get("event_name", "").strip():
+                                events.setdefault(meta["event_name"], []).append(pos)
+                            yield f"{doc} {meta.get('entities', '')}"
+
+                bm25 = lexical.BM25Index(ids, texts())
+                self._lexical = {
+                    "bm25": bm25,
+                    "fighters": sorted(fighters),
+                    "events": sorted(events),
+                    "fighter_postings": {name: np.array(p, dtype=np.int64) for name, p in fighters.items()},
+                    "event_postings": {name: np.array(p, dtype=np.int64) for name, p in events.items()},
+                }
+            return self._lexical
+
+    def named_filters(self, text: str) -> dict:
+        """Fighters and events from the index that the query names, e.g. {"fighters": [...], "events": [...]}."""
+        lexical_index = self._lexical_index()
+        return {
+            key: [name for name in lexical_index[key]
+                  if re.search(r"\b" + re.escape(name) + r"\b", text, flags=re.IGNORECASE)]
+            for key in ("fighters", "events")
+        }
+
+    def _search(self, text: str, filters: dict, n_candidates: int) -> list:
+        """Fused (RRF) ranking of vector and BM25 hits restricted to filters."""
+        lexical_index = self._lexical_index()
+        bm25 = lexical_index["bm25"]
+        if not len(bm25):
+            return []
+
+        where = where_clause(filters)
+        allowed = positions = None
+        if where is not None:
+            positions = filtered_positions(lexical_index, filters)
+            if not len(positions):
+                return []
+            allowed = np.zeros(len(bm25), dtype=bool)
+            allowed[positions] = True
+
+        with telemetry.span("query_embedding") as embed_span:
+            hits_before = self._embed_query.cache_info().hits
+            # MiniLM is uncased, so case and spacing do not change the embedding
+            query_embedding = self._embed_query(" ".join(text.lower().split()))
+            embed_span.set_attribute("cache_hit", self._embed_query.cache_info().hits > hits_before)
+        with telemetry.span("vector_search", filtered=where is not None) as search_span:
+            vector_hits = self.store.search(
+                query_embedding,
+                min(n_candidates, len(bm25) if positions is None else len(positions)),
+                where=where,
+                allowed_ids=None if positions is None else [bm25.ids[i] for i in positions]
+            )
+            search_span.set_attribute("hits", len(vector_hits))
+        with telemetry.span("bm25_search") as search_span:
+            lexical_hits = bm25.search(text, n_candidates, allowed=allowed)
+            search_span.set_attribute("hits", len(lexical_hits))
+        return lexical.reciprocal_rank_fusion([vector_hits, lexical_hits])
+
+    def query(self, text: str, n_results: int = 5, filters: dict = None) -> dict:
+        """Hybrid vector + BM25 search, pre-filtered on the fighters/events the query names.
+
+        Returns the Chroma query layout: {"ids": [[...]], "documents": [[...]], "metadatas": [[...]]}.
+        """
+        self._follow_alias()
+        if filters is None:
+            filters = self.named_filters(text)
+        n_candidates = n_results * CANDIDATE_MULTIPLIER
+        ranked = self._search(text, filters, n_candidates)
+        if not ranked and where_clause(filters) is not None:
+            # Nothing indexed for that fighter/event: fall back to the whole collection
+            ranked = self._search(text, {}, n_candidates)
+
+        # Text and metadata of the hits only, read from the store
+        stored = self.store.get(ids=ranked, include=["documents", "metadatas"]) if ranked else \
+            {"ids": [], "documents": [], "metadatas": []}
+        found = dict(zip(stored["ids"], zip(stored["documents"], stored["metadatas"])))
+        ids = [chunk_id for chunk_id in ranked if chunk_id in found][:n_results]
+        return {
+            "ids": [ids],
+            "documents": [[found[chunk_id][0] for chunk_id in ids]],
+            "metadatas": [[found[chunk_id][1] or {} for chunk_id in ids]],
+        }
+
+
+def where_clause(filters: dict):
+    """Chroma where clause for named fighters/events (None when nothing is named)."""
+    clauses = []
+    fighters = (filters or {}).get("fighters") or []
+    events = (filters or {}).get("events") or []
+    if fighters:
+        clauses.append({"$or": [{"fighter_a": {"$in": fighters}}, {"fighter_b": {"$in": fighters}}]})
+    if events:
+        clauses.append({"event_name": {"$in": events}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def filtered_positions(lexical_index: dict, filters: dict) -> np.ndarray:
+    """Sorted positions of the chunks matching filters, from the fighter/event postings
+    (union within fighters and within events, intersected across the two)."""
+    matched = None
+    for key, postings in (("fighters", lexical_index["fighter_postings"]),
+                          ("events", lexical_index["event_postings"])):
+        names = (filters or {}).get(key) or []
+        if not names:
+            continue
+        lists = [postings[name] for name in names if name in postings]
+        positions = np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.int64)
+        matched = positions if matched is None else np.intersect1d(matched, positions, assume_unique=True)
+    return matched if matched is not None else np.arange(len(lexical_index["bm25"]))
+
+
+def _notify_index_changed():
+    for listener in index_listeners:
+        try:
+            listener()
+        except Exception as e:
+            print(f"Index listener failed: {e}")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> RetrievalService:
+    """Return the process-wide RetrievalService, creating it on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RetrievalService()
+    return _service
+
+
+def watch_data_file(path: str = file_read.DATA_PATH, stop_event: threading.Event = None) -> threading.Thread:
+    """Re-sync the index in a background thread whenever the data file changes on disk."""
+    target = os.path.abspath(path)
+
+    def _run():
+        # Watch the parent directory so editors that save via rename are still picked up
+        for _changes in watch(os.path.dirname(target),
+                              watch_filter=lambda _change, changed_path: os.path.abspath(changed_path) == target,
+                              stop_event=stop_event):
+            try:
+                service = get_service()
+                if service.read_only:
+                    print("Data file changed; serving a versioned index, rebuild with `python db_config.py build`")
+                else:
+                    service.sync_index(path)
+            except Exception as e:
+                print(f"Index sync failed: {e}")
+            for listener in data_listeners:
+                try:
+                    listener(path)
+                except Exception as e:
+                    print(f"Data listener failed: {e}")
+
+    thread = threading.Thread(target=_run, name="index-watcher", daemon=True)
+    thread.start()
+    return thread
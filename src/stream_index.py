@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import file_read
+import data_cleanup
+import data_prune
+import retrieval
+
+# Streaming file -> vector index pipeline for corpora too large for one DataFrame.
+# Each stage is a generator over (batch_no, DataFrame), so at most one batch is in memory.
+
+BATCH_SIZE = 5000
+
+
+# ---------------- Checkpointing ----------------
+def checkpoint_path(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(file_read.SNAPSHOT_DIR, f"{stem}.stream_checkpoint.json")
+
+
+def quality_report_path(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(file_read.SNAPSHOT_DIR, f"{stem}.quality.json")
+
+
+def quality_profile_path(path: str) -> str:
+    """Full profile of the batches indexed so far, merged into when a stream resumes."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(file_read.SNAPSHOT_DIR, f"{stem}.quality_profile.npz")
+
+
+def load_quality_profile(path: str, source_hash: str, batch_size: int, batches_done: int):
+    """Saved profile covering exactly the first batches_done batches of this file, else a new one."""
+    profile, meta = data_prune.QualityProfile.load(quality_profile_path(path))
+    if profile is None or meta != {"source_sha1": source_hash, "batch_size": batch_size,
+                                   "batches_done": batches_done}:
+        return data_prune.QualityProfile(), False
+    return profile, True
+
+
+def load_checkpoint(path: str, source_hash: str, batch_size: int) -> int:
+    """Number of batches already indexed for this exact file and batch size (0 if none)."""
+    try:
+        with open(checkpoint_path(path), encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    if state.get("source_sha1") != source_hash or state.get("batch_size") != batch_size:
+        return 0
+    return state.get("batches_done", 0)
+
+
+def save_checkpoint(path: str, state: dict):
+    """Write the checkpoint atomically so a crash never leaves a half-written file."""
+    os.makedirs(file_read.SNAPSHOT_DIR, exist_ok=True)
+    target = checkpoint_path(path)
+    with open(target + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(target + ".tmp", target)
+
+
+# ---------------- Pipeline Stages ----------------
+def read_stage(path: str, batch_size: int, start_batch: int = 0):
+    """Parse the source in batches, skipping those already indexed."""
+    for batch_no, batch in enumerate(file_read.readFileChunks(path, chunksize=batch_size)):
+        if batch_no < start_batch:
+            continue
+        yield batch_no, batch
+
+
+def clean_stage(batches):
+    for batch_no, batch in batches:
+        yield batch_no, data_cleanup.clean_data(batch)
+
+
+def prune_stage(batches, row_threshold: float = 50.0, profile: data_prune.QualityProfile = None):
+    """Drop mostly-empty rows; every batch's quality statistics are merged into profile."""
+    for batch_no, batch in batches:
+        yield batch_no, data_prune.prune_missing_values(batch, row_threshold, profile)
+
+
+def index_stage(batches, service: retrieval.RetrievalService):
+    """Embed and upsert each batch; yields the per-batch summary."""
+    for batch_no, batch in batches:
+        summary = service.upsert_chunks(batch)
+        summary["rows"] = len(batch)
+        summary["quarantined"] = len(batch.attrs.get("quarantine", []))
+        yield batch_no, summary
+
+
+def run(path: str = file_read.DATA_PATH, batch_size: int = BATCH_SIZE, resume: bool = True,
+        service: retrieval.RetrievalService = None) -> dict:
+    """Stream the file into the vector index batch by batch, checkpointing after each one.
+
+    Chunks are only added or updated; use RetrievalService.sync_index to also drop removed ones.
+    """
+    source_hash = file_read.file_sha1(path)
+    start_batch = load_checkpoint(path, source_hash, batch_size) if resume else 0
+    if start_batch:
+        print(f"Resuming after {start_batch} indexed batches")
+
+    service = service or retrieval.RetrievalService(sync=False)
+    state = {"source": path, "source_sha1": source_hash, "batch_size": batch_size,
+             "batches_done": start_batch, "complete": False}
+
+    # Data-quality statistics of every batch, carried over from the interrupted run when resuming
+    quality, resumed = load_quality_profile(path, source_hash, batch_size, start_batch)
+    if start_batch and not resumed:
+        # No profile of the earlier batches: re-read them for the report (they are not re-indexed)
+        for batch_no, _batch in prune_stage(clean_stage(read_stage(path, batch_size)), profile=quality):
+            if batch_no + 1 >= start_batch:
+                break
+    batches = read_stage(path, batch_size, start_batch)
+    for batch_no, summary in index_stage(prune_stage(clean_stage(batches), profile=quality), service):
+        state["batches_done"] = batch_no + 1
+        # Profile first: a checkpoint never points past the batches the profile covers
+        quality.save(quality_profile_path(path), source_sha1=source_hash, batch_size=batch_size,
+                     batches_done=batch_no + 1)
+        save_checkpoint(path, state)
+        print(f"Batch {batch_no}: {summary}")
+
+    os.makedirs(file_read.SNAPSHOT_DIR, exist_ok=True)
+    report_path = quality_report_path(path)
+    with open(report_path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(quality.to_json())
+    os.replace(report_path + ".tmp", report_path)
+    print(f"Data quality: {quality.rows} rows, {quality.pruned_rows} pruned, "
+          f"{quality.duplicate_rows} duplicates -> {report_path}")
+
+    state["complete"] = True
+    save_checkpoint(path, state)
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a data file into the vector index in batches.")
+    parser.add_argument("path", nargs="?", default=file_read.DATA_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-resume", action="store_true", help="start from the first batch")
+    args = parser.parse_args()
+    run(args.path, args.batch_size, resume=not args.no_resume)
@@ -0,0 +1,74 @@
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the OpenAI chat API, for trying the streaming UI offline:
+#   python stub_llm_server.py 8001
+#   OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPEN_API_KEY=stub python main.py
+
+STUB_ANSWER = "Rabindra Dhant is a Nepali MMA fighter and the MFN Bantamweight Champion."
+TOKEN_DELAY_SECONDS = 0.05
+
+
+def completion_chunk(content=None, finish_reason=None):
+    """One chat.completion.chunk in the OpenAI streaming format."""
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        if not body.get("stream"):
+            payload = json.dumps({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": STUB_ANSWER}}],
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        # Server-sent events, one word per chunk, terminated by [DONE]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        words = STUB_ANSWER.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == 0 else " " + word
+            self.wfile.write(f"data: {json.dumps(completion_chunk(token))}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(TOKEN_DELAY_SECONDS)
+        self.wfile.write(f"data: {json.dumps(completion_chunk(finish_reason='stop'))}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def main(port: int = 8001):
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    print(f"Stub LLM server listening on http://127.0.0.1:{port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8001)
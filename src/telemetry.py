@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from opentelemetry import context as otel_context
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import HistogramDataPoint, InMemoryMetricReader
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+# Tracing and latency metrics for the chat path, all local:
+#   spans      -> TRACE_EXPORTER=file (./.telemetry/spans.jsonl), console or none
+#   histograms -> http://127.0.0.1:METRICS_PORT/metrics (Prometheus text format)
+#   slow turns -> ./.telemetry/slow_requests.jsonl, with per-stage timings
+
+SERVICE_NAME = "mma-chat-assistant"
+TELEMETRY_DIR = "./.telemetry"
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")
+TRACE_FILE = os.path.join(TELEMETRY_DIR, "spans.jsonl")
+SLOW_REQUEST_LOG = os.path.join(TELEMETRY_DIR, "slow_requests.jsonl")
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "5"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))  # 0 disables the endpoint
+
+# Proxies until setup() installs the SDK providers, so importing modules can create spans freely
+tracer = trace.get_tracer(SERVICE_NAME)
+meter = metrics.get_meter(SERVICE_NAME)
+stage_duration = meter.create_histogram("stage_duration", unit="ms",
+                                        description="Latency of one stage of a request")
+request_duration = meter.create_histogram("request_duration", unit="ms",
+                                          description="End-to-end latency of a chat or transcription request")
+
+_metric_reader = None
+_slow_log_lock = threading.Lock()
+
+
+def setup(exporter: str = TRACE_EXPORTER, metrics_port: int = METRICS_PORT):
+    """Install the tracer/meter providers and start the metrics endpoint (once per process)."""
+    global _metric_reader
+    if _metric_reader is not None:
+        return
+    resource = Resource.create({"service.name": SERVICE_NAME})
+
+    provider = TracerProvider(resource=resource)
+    if exporter == "console":
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+    elif exporter == "file":
+        os.makedirs(TELEMETRY_DIR, exist_ok=True)
+        out = open(TRACE_FILE, "a", encoding="utf-8", buffering=1)
+        provider.add_span_processor(BatchSpanProcessor(
+            ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+        ))
+    trace.set_tracer_provider(provider)
+
+    _metric_reader = InMemoryMetricReader()
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[_metric_reader]))
+
+    if metrics_port:
+        serve_metrics(metrics_port)
+
+
+# ---------------- Spans ----------------
+@contextmanager
+def span(name: str, **attributes):
+    """Child span of the current one (for synchronous code), also recorded in the stage histogram."""
+    start = time.perf_counter()
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        try:
+            yield current
+        finally:
+            stage_duration.record((time.perf_counter() - start) * 1000, {"stage": name})
+
+
+class RequestTrace:
+    """Root span for one request, with explicitly parented stage spans.
+
+    Stage spans are never made "current", so they are safe to hold across the yields of
+    Gradio's async generators; run() makes a stage current inside a worker thread instead.
+    """
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.stages = {}
+        self.root = tracer.start_span(name, attributes=attributes)
+        self.context = trace.set_span_in_context(self.root)
+        self._start = time.perf_counter()
+        self._ended = False
+
+    @contextmanager
+    def stage(self, name: str, **attributes):
+        stage_span = tracer.start_span(name, context=self.context, attributes=attributes)
+        start = time.perf_counter()
+        try:
+            yield stage_span
+        except Exception as e:
+            stage_span.record_exception(e)
+            stage_span.set_status(Status(StatusCode.ERROR, str(e)))
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = round(self.stages.get(name, 0) + elapsed, 4)
+            stage_duration.record(elapsed * 1000, {"stage": name})
+            stage_span.end()
+
+    def run(self, name: str, fn, *args, **kwargs):
+        """fn(*args, **kwargs) inside a stage span; spans opened by fn (via span()) nest under it."""
+        with self.stage(name) as stage_span:
+            token = otel_context.attach(trace.set_span_in_context(stage_span))
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                otel_context.detach(token)
+
+    def set(self, **attributes):
+        self.root.set_attributes(attributes)
+
+    def end(self):
+        """Close the root span, record the request latency and log it if it was slow."""
+        if self._ended:
+            return
+        self._ended = True
+        elapsed = time.perf_counter() - self._start
+        request_duration.record(elapsed * 1000, {"request": self.name})
+        self.root.end()
+        if elapsed >= SLOW_REQUEST_SECONDS:
+            log_slow_request(self, elapsed)
+
+
+def log_slow_request(request: RequestTrace, elapsed: float):
+    record = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "request": request.name,
+        "seconds": round(elapsed, 3),
+        "trace_id": format(request.root.get_span_context().trace_id, "032x"),
+        "stages": request.stages,
+        "attributes": dict(getattr(request.root, "attributes", None) or {}),
+    }
+    print(f"Slow {request.name} request: {record['seconds']}s {record['stages']}")
+    os.makedirs(TELEMETRY_DIR, exist_ok=True)
+    with _slow_log_lock, open(SLOW_REQUEST_LOG, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+# ---------------- Metrics endpoint ----------------
+def _labels(attributes: dict, **extra) -> str:
+    labels = {**attributes, **extra}
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}" if labels else ""
+
+
+def prometheus_text() -> str:
+    """Current histograms in the Prometheus text exposition format."""
+    data = _metric_reader.get_metrics_data() if _metric_reader is not None else None
+    lines = []
+    for resource_metrics in (data.resource_metrics if data else []):
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                name = metric.name.replace(".", "_") + (f"_{metric.unit}" if metric.unit else "")
+                lines.append(f"# HELP {name} {metric.description}")
+                lines.append(f"# TYPE {name} histogram")
+                for point in metric.data.data_points:
+                    if not isinstance(point, HistogramDataPoint):
+                        continue
+                    attributes = dict(point.attributes)
+                    cumulative = 0
+                    for bound, count in zip(list(point.explicit_bounds) + ["+Inf"], point.bucket_counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(attributes, le=bound)} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(attributes)} {point.sum}")
+                    lines.append(f"{name}_count{_labels(attributes)} {point.count}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        payload = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *_args):
+        pass  # scraped every few seconds; keep the console quiet
+
+
+def serve_metrics(port: int = METRICS_PORT) -> threading.Thread:
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    except OSError as e:
+        print(f"Metrics endpoint not started: {e}")
+        return None
+    thread = threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True)
+    thread.start()
+    print(f"Metrics on http://127.0.0.1:{port}/metrics")
+    return thread
@@ -0,0 +1,433 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+# Vector stores behind RetrievalService. Pick one with VECTOR_STORE (chroma | faiss);
+# the FAISS index type comes from FAISS_INDEX_KIND (flat | ivf | hnsw).
+# Compare them on the dataset with `python vector_store.py`.
+
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
+# The Chroma store shipped with the repo is only a seed: it is copied to the (git-ignored)
+# runtime path on first use, and syncs write to that copy
+CHROMA_SEED_PATH = "./chroma_store"
+CHROMA_PATH = "./.cache/chroma_store"
+COLLECTION_NAME = "rabindra_info"
+FAISS_PATH = "./faiss_store"
+# Versioned builds from db_config.py live here; alias.json names the version each store serves
+INDEX_VERSIONS_DIR = "./index_versions"
+ALIAS_PATH = os.path.join(INDEX_VERSIONS_DIR, "alias.json")
+FAISS_INDEX_KIND = os.getenv("FAISS_INDEX_KIND", "hnsw")
+HNSW_M = 32
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+# FaissStore rebuilds its index on commit once this share of positions are deleted or replaced
+COMPACT_RATIO = 0.25
+
+
+def seed_chroma_store(path: str = CHROMA_PATH, seed_path: str = CHROMA_SEED_PATH):
+    """Copy the shipped store to path unless it already exists (atomic rename of a temp copy)."""
+    if os.path.exists(path) or not os.path.isdir(seed_path):
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.copytree(seed_path, tmp)
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # seeded by a concurrent start
+        if not os.path.exists(path):
+            raise
+
+
+class ChromaStore:
+    """Persistent Chroma collection (the original store)."""
+
+    def __init__(self, path: str = CHROMA_PATH, collection_name: str = COLLECTION_NAME):
+        import chromadb
+        if path == CHROMA_PATH:
+            seed_chroma_store()
+        self.path = path
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection(name=collection_name)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def get(self, ids: list = None, include=("documents", "metadatas")) -> dict:
+        """{"ids", "documents", "metadatas"} for the given ids or the whole store."""
+        return self.collection.get(ids=ids, include=list(include))
+
+    def upsert(self, ids: list, documents: list, embeddings, metadatas: list):
+        self.collection.upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+
+    def delete(self, ids: list):
+        self.collection.delete(ids=ids)
+
+    def commit(self):
+        """Chroma persists every write itself."""
+
+    def close(self):
+        pass
+
+    def search(self, embedding, k: int, where: dict = None, allowed_ids: list = None) -> list:
+        """Ids of the k nearest chunks; Chroma applies the where clause itself."""
+        if k <= 0:
+            return []
+        return self.collection.query(query_embeddings=[embedding], n_results=k, where=where, include=[])["ids"][0]
+
+
+class FaissStore:
+    """FAISS index (flat, IVF or HNSW) plus chunk records, saved to disk and memory-mapped on load.
+
+    Loading maps the index and vectors read-only, so worker processes share one copy of them in
+    the page cache; the documents and metadata (records.json) are loaded by each process.
+    Upserts append to the index and deletes leave tombstones; nothing is written until commit(),
+    which also rebuilds the index once tombstones pass COMPACT_RATIO.
+    """
+
+    def __init__(self, path: str = FAISS_PATH, kind: str = FAISS_INDEX_KIND):
+        import faiss
+        if kind not in ("flat", "ivf", "hnsw"):
+            raise ValueError(f"Unknown FAISS index kind: {kind}")
+        self.faiss = faiss
+        self.path = path
+        self.kind = kind
+        # Per index position (None once deleted); positions maps live chunk ids to them
+        self.ids, self.documents, self.metadatas = [], [], []
+        self.positions = {}
+        self.vectors = None  # saved vectors (memory-mapped)
+        self._pending = []  # vectors added since the last commit
+        self.index = None
+        self._mapped = False
+        self._dirty = False
+        self._trained_on = 0  # IVF: vectors the centroids were trained on
+        self._load()
+
+    # ---------------- Files ----------------
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @property
+    def _index_file(self) -> str:
+        return self._file(f"index.{self.kind}.faiss")
+
+    def _load(self):
+        if not os.path.exists(self._file("records.json")):
+            return
+        with open(self._file("records.json"), encoding="utf-8") as f:
+            records = json.load(f)
+        self.ids, self.documents, self.metadatas = records["ids"], records["documents"], records["metadatas"]
+        self.positions = {chunk_id: pos for pos, chunk_id in enumerate(self.ids) if chunk_id is not None}
+        self.vectors = np.load(self._file("vectors.npy"), mmap_mode="r")
+        if not os.path.exists(self._index_file):
+            # Records were written with another index kind; build this one from the same vectors
+            self._dirty = True
+            self.commit()
+            return
+        # IVF maps its inverted lists; flat and HNSW map the flat vector codes
+        mmap_flag = self.faiss.IO_FLAG_MMAP if self.kind == "ivf" else self.faiss.IO_FLAG_MMAP_IFC
+        flags = mmap_flag | self.faiss.IO_FLAG_READ_ONLY
+        self.index = self.faiss.read_index(self._index_file, flags)
+        self._mapped = True
+        self._trained_on = self.index.ntotal
+        self._tune(self.index)
+
+    def _replace(self, name: str, write):
+        """Write a file next to its final location, then swap it in."""
+        tmp = self._file(name + ".tmp")
+        write(tmp)
+        os.replace(tmp, self._file(name))
+
+    def _all_vectors(self) -> np.ndarray:
+        saved = np.asarray(self.vectors, dtype=np.float32) if self.vectors is not None else None
+        if not self._pending:
+            return saved
+        pending = np.vstack(self._pending)
+        return pending if saved is None else np.vstack([saved, pending])
+
+    def commit(self):
+        """Write the index, vectors and records once for all changes since the last commit."""
+        if not self._dirty:
+            return
+        vectors = self._all_vectors()
+        dead = len(self.ids) - len(self.positions)
+        retrain = self.kind == "ivf" and len(self.positions) > 2 * self._trained_on
+        if self.index is None or dead > COMPACT_RATIO * len(self.ids) or retrain:
+            # Drop the tombstones and rebuild (IVF also re-trains its centroids on the grown corpus)
+            live = sorted(self.positions.values())
+            self.ids = [self.ids[pos] for pos in live]
+            self.documents = [self.documents[pos] for pos in live]
+            self.metadatas = [self.metadatas[pos] for pos in live]
+            self.positions = {chunk_id: pos for pos, chunk_id in enumerate(self.ids)}
+            vectors = vectors[live] if vectors is not None else None
+            if vectors is not None:
+                self.index = self._build(np.ascontiguousarray(vectors, dtype=np.float32))
+                self._mapped, self._trained_on = False, len(vectors)
+
+        os.makedirs(self.path, exist_ok=True)
+        if self.index is not None:
+            self._replace(os.path.basename(self._index_file), lambda tmp: self.faiss.write_index(self.index, tmp))
+
+            def write_vectors(tmp):
+                with open(tmp, "wb") as f:
+                    np.save(f, vectors)
+            self._replace("vectors.npy", write_vectors)
+
+        def write_records(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}, f)
+        self._replace("records.json", write_records)
+
+        self.vectors = np.load(self._file("vectors.npy"), mmap_mode="r") if self.index is not None else None
+        self._pending, self._dirty = [], False
+
+    def close(self):
+        self.commit()
+
+    # ---------------- Index ----------------
+    def _build(self, vectors: np.ndarray):
+        faiss = self.faiss
+        n, dim = vectors.shape
+        if self.kind == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        elif self.kind == "ivf" and n > 0:
+            # ~sqrt(n) lists, with enough points per list to train the centroids
+            nlist = max(1, min(int(math.sqrt(n)), n // 39))
+            index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+        else:
+            index = faiss.IndexFlatIP(dim)
+        if n:
+            index.add(vectors)
+        self._tune(index)
+        return index
+
+    def _writable_index(self):
+        """The index in memory (a loaded one is a read-only memory map until the first write)."""
+        if self._mapped:
+            self.index = self.faiss.read_index(self._index_file)
+            self._tune(self.index)
+            self._mapped = False
+        return self.index
+
+    def _tune(self, index):
+        if self.kind == "hnsw":
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        elif self.kind == "ivf" and hasattr(index, "nprobe"):
+            index.nprobe = IVF_NPROBE
+
+    def _search_params(self, selector):
+        faiss = self.faiss
+        if self.kind == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=HNSW_EF_SEARCH)
+        if self.kind == "ivf" and hasattr(self.index, "nprobe"):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.index.nprobe)
+        return faiss.SearchParameters(sel=selector)
+
+    # ---------------- Store interface ----------------
+    def count(self) -> int:
+        return len(self.positions)
+
+    def get(self, ids: list = None, include=("documents", "metadatas")) -> dict:
+        if ids is None:
+            positions = sorted(self.positions.values())
+        else:
+            positions = [pos for pos in (self.positions.get(chunk_id) for chunk_id in ids) if pos is not None]
+        return {
+            "ids": [self.ids[pos] for pos in positions],
+            "documents": [self.documents[pos] for pos in positions] if "documents" in include else None,
+            "metadatas": [self.metadatas[pos] for pos in positions] if "metadatas" in include else None,
+        }
+
+    def _tombstone(self, pos: int):
+        self.ids[pos] = self.documents[pos] = self.metadatas[pos] = None
+
+    def upsert(self, ids: list, documents: list, embeddings, metadatas: list):
+        """Append the chunks to the index; a chunk that was already stored leaves a tombstone."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        # Repeated id within this batch: the last one wins
+        last = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        rows = sorted(last.values())
+        if not rows:
+            return
+        for i in rows:
+            old = self.positions.get(ids[i])
+            if old is not None:
+                self._tombstone(old)
+            self.positions[ids[i]] = len(self.ids)
+            self.ids.append(ids[i])
+            self.documents.append(documents[i])
+            self.metadatas.append(metadatas[i])
+        new = np.ascontiguousarray(embeddings[rows])
+        self._pending.append(new)
+        if self.index is None:
+            self.index = self._build(new)
+            self._trained_on = len(new)
+        else:
+            self._writable_index().add(new)
+        self._dirty = True
+
+    def delete(self, ids: list):
+        for chunk_id in ids:
+            pos = self.positions.pop(chunk_id, None)
+            if pos is not None:
+                self._tombstone(pos)
+                self._dirty = True
+
+    def search(self, embedding, k: int, where: dict = None, allowed_ids: list = None) -> list:
+        """Ids of the k nearest chunks; filtering uses allowed_ids (FAISS has no metadata filters)."""
+        if self.index is None or not self.positions or k <= 0:
+            return []
+        params = None
+        if allowed_ids is not None:
+            allowed = np.array([self.positions[i] for i in allowed_ids if i in self.positions], dtype=np.int64)
+            if not len(allowed):
+                return []
+            params = self._search_params(self.faiss.IDSelectorBatch(allowed))
+            fetch = min(k, len(allowed))
+        else:
+            # Over-fetch past the tombstones, which are dropped below
+            fetch = min(k + len(self.ids) - len(self.positions), self.index.ntotal)
+        query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        _scores, hits = self.index.search(query, fetch, params=params)
+        return [self.ids[pos] for pos in hits[0] if pos >= 0 and self.ids[pos] is not None][:k]
+
+
+# ---------------- Versions and serving alias ----------------
+def version_path(name: str, version: str) -> str:
+    return os.path.join(INDEX_VERSIONS_DIR, name, version)
+
+
+def read_alias() -> dict:
+    """{store name: {"current": version, "previous": [older versions, newest first]}}."""
+    if not os.path.exists(ALIAS_PATH):
+        return {}
+    with open(ALIAS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def current_version(name: str = VECTOR_STORE):
+    """Version the alias points at for this store, or None to serve the unversioned default path."""
+    return read_alias().get(name, {}).get("current")
+
+
+def switch_alias(name: str, version: str) -> dict:
+    """Point the serving alias at version (atomic file swap); the old one is kept for rollback."""
+    alias = read_alias()
+    entry = alias.setdefault(name, {"current": None, "previous": []})
+    if entry["current"] and entry["current"] != version:
+        entry["previous"] = [entry["current"]] + [v for v in entry["previous"] if v not in (version, entry["current"])]
+    else:
+        entry["previous"] = [v for v in entry["previous"] if v != version]
+    entry["current"] = version
+
+    os.makedirs(INDEX_VERSIONS_DIR, exist_ok=True)
+    tmp = ALIAS_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(alias, f, indent=2)
+    os.replace(tmp, ALIAS_PATH)
+    return entry
+
+
+def drop_version(name: str, version: str):
+    """Delete a version that is no longer current and forget it in the alias."""
+    alias = read_alias()
+    entry = alias.get(name, {"current": None, "previous": []})
+    if entry.get("current") == version:
+        raise ValueError(f"{version} is the serving version of {name}")
+    shutil.rmtree(version_path(name, version), ignore_errors=True)
+    if version in entry.get("previous", []):
+        entry["previous"].remove(version)
+        tmp = ALIAS_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(alias, f, indent=2)
+        os.replace(tmp, ALIAS_PATH)
+
+
+def open_store(name: str = VECTOR_STORE, path: str = None, collection_name: str = COLLECTION_NAME,
+               kind: str = FAISS_INDEX_KIND):
+    """Create a vector store by name: chroma or faiss.
+
+    Without an explicit path the store opens the version the alias points at, if any.
+    """
+    if path is None and current_version(name):
+        path = version_path(name, current_version(name))
+    if name == "chroma":
+        return ChromaStore(path or CHROMA_PATH, collection_name)
+    if name == "faiss":
+        return FaissStore(path or FAISS_PATH, kind)
+    raise ValueError(f"Unknown vector store: {name}")
+
+
+# ---------------- Comparison ----------------
+def compare(vectors: np.ndarray, queries: np.ndarray, k: int = 5,
+            stores=("chroma", "faiss-flat", "faiss-ivf", "faiss-hnsw")) -> list:
+    """recall@k against exact search, and p50/p99 query latency, for every store on the same corpus."""
+    ids = [f"doc-{i}" for i in range(len(vectors))]
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+    truth = [{ids[i] for i in row} for row in exact]
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="vector-store-compare-")
+    try:
+        for name in stores:
+            store_name, _, kind = name.partition("-")
+            store = open_store(store_name, os.path.join(workdir, name), kind=kind or FAISS_INDEX_KIND)
+            start = time.perf_counter()
+            for begin in range(0, len(ids), 5000):
+                end = begin + 5000
+                store.upsert(ids[begin:end], [""] * len(ids[begin:end]), vectors[begin:end],
+                             [{"n": i} for i in range(begin, min(end, len(ids)))])
+            store.commit()
+            build_seconds = time.perf_counter() - start
+            if store_name == "faiss":
+                # Re-open so queries run against the memory-mapped files, as a worker would
+                store = open_store(store_name, os.path.join(workdir, name), kind=kind)
+
+            latencies, hits = [], 0
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = store.search(query, k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(expected.intersection(found))
+            results.append({
+                "store": name,
+                "corpus": len(ids),
+                f"recall@{k}": round(hits / (k * len(queries)), 4),
+                "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+                "build_seconds": round(build_seconds, 2),
+            })
+            print(results[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    import embeddings
+    import file_read
+
+    parser = argparse.ArgumentParser(description="Compare vector stores on the dataset embeddings.")
+    parser.add_argument("--stores", default="chroma,faiss-flat,faiss-ivf,faiss-hnsw")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=1000,
+                        help="jittered copies of each chunk embedding, to reach a realistic corpus size")
+    args = parser.parse_args()
+
+    texts = file_read.readFile()["chunk_text"].dropna().tolist()
+    base = embeddings.Embedder().encode(texts, show_progress_bar=True)
+    rng = np.random.default_rng(0)
+
+    def jitter(x, scale):
+        x = x + rng.normal(0, scale, x.shape).astype(np.float32)
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    corpus = jitter(np.repeat(base, args.scale, axis=0), 0.05).astype(np.float32)
+    queries = jitter(base[rng.integers(0, len(base), args.queries)], 0.05).astype(np.float32)
+    compare(corpus, queries, k=args.k, stores=args.stores.split(","))
@@ -0,0 +1,292 @@
+import argparse
+import functools
+import glob
+import os
+import threading
+import numpy as np
+import pandas as pd
+import data_cleanup
+import file_read
+from fighter_views import MAX_NAME_CHARS, method_kind, parse_record
+
+# Win prediction: a versioned feature store built from the fight rows, an XGBoost model trained
+# on it, and a batch scorer that keeps every fighter's current feature vector in memory.
+#   python win_model.py train [--data PATH]
+#   python win_model.py score "Fighter A" "Fighter B" ["Fighter C" "Fighter D" ...]
+
+FEATURE_VERSION = 2  # bump when the feature definitions change
+FEATURE_DIR = "./.cache/features"
+MODEL_DIR = "./.cache/win_model"
+# Matchups scored on demand are kept in an LRU of this many pairs
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+
+# Per-fighter state before a bout; model features are A-minus-B differences of these
+STATE_COLUMNS = ['wins', 'losses', 'draws', 'win_pct', 'age', 'height_cm', 'reach_cm',
+                 'ko_wins', 'sub_wins', 'dec_wins', 'streak']
+FEATURE_COLUMNS = [f"d_{column}" for column in STATE_COLUMNS]
+
+# More wins / a better win rate / a longer streak can only raise the odds; this keeps the
+# model sensible while the dataset holds only a handful of bouts (small min_child_weight for the same reason)
+MONOTONE = {'d_wins': 1, 'd_losses': -1, 'd_win_pct': 1, 'd_ko_wins': 1, 'd_sub_wins': 1, 'd_dec_wins': 1,
+            'd_streak': 1}
+XGB_PARAMS = {"n_estimators": 100, "max_depth": 3, "learning_rate": 0.1, "min_child_weight": 0.1,
+              "objective": "binary:logistic", "eval_metric": "logloss",
+              "monotone_constraints": tuple(MONOTONE.get(column, 0) for column in FEATURE_COLUMNS)}
+
+
+# ---------------- Utility Methods ----------------
+def data_version(path: str = file_read.DATA_PATH) -> str:
+    """Feature/model version: the data file contents plus the feature definitions."""
+    return f"{file_read.file_sha1(path)[:16]}.f{FEATURE_VERSION}"
+
+
+def feature_paths(version: str, feature_dir: str = FEATURE_DIR):
+    base = os.path.join(feature_dir, version)
+    return base + ".bouts.feather", base + ".fighters.feather"
+
+
+def model_path(version: str, model_dir: str = MODEL_DIR) -> str:
+    return os.path.join(model_dir, f"{version}.json")
+
+
+def _number(value) -> float:
+    number = pd.to_numeric(value, errors="coerce")
+    return float(number) if pd.notna(number) else np.nan
+
+
+def _side_value(row: pd.Series, side: str, field: str, source: str = None):
+    if source is None:
+        return row.get(f"fighter_{side}_{field}")
+    values = row.get(source)
+    return values.get(f"fighter_{side}_{field}") if isinstance(values, dict) else None
+
+
+def unique_bouts(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per decided bout (several sources describe the same fight), oldest first."""
+    names = df['fighter_a'].astype('string').str.strip(), df['fighter_b'].astype('string').str.strip()
+    outcome = df['outcome'].astype('string').str.lower()
+    keep = (names[0].str.len() <= MAX_NAME_CHARS) & (names[1].str.len() <= MAX_NAME_CHARS) \
+        & outcome.isin(['win', 'loss', 'draw'])
+    # Variant spellings of a name are one fighter (as in the sidebar views)
+    aliases = data_cleanup.name_aliases(pd.concat([names[0].str.lower(), names[1].str.lower()]),
+                                        pd.concat([df['item_id'], df['item_id']]))
+    bouts = df[keep.fillna(False)].assign(
+        _a=names[0].str.lower().replace(aliases), _b=names[1].str.lower().replace(aliases),
+        _event=df['event_name'].astype('string').str.strip().str.lower(),
+        _date=pd.to_datetime(df['event_date'], errors='coerce'),
+        _filled=df.notna().sum(axis=1),
+    )
+    bouts['_pair'] = [" | ".join(sorted(pair)) for pair in zip(bouts['_a'], bouts['_b'])]
+    # The most complete description of each fight wins
+    bouts = bouts.sort_values('_filled', ascending=False, kind='stable')
+    bouts = bouts.drop_duplicates(['_event', '_pair'])
+    bouts = bouts.sort_values('_date', na_position='first', kind='stable')
+    bouts.attrs['aliases'] = aliases
+    return bouts
+
+
+# ---------------- Feature store ----------------
+def build_features(df: pd.DataFrame):
+    """Bout feature matrix (state of both fighters going in, A-minus-B) and each fighter's current state.
+
+    Walks the bouts in date order; a record printed on the bout row overrides the running count.
+    """
+    states, names, rows = {}, {}, []
+    bouts = unique_bouts(df)
+    for _, bout in bouts.iterrows():
+        before = {}
+        for side, key in (('a', bout['_a']), ('b', bout['_b'])):
+            state = states.setdefault(key, dict.fromkeys(STATE_COLUMNS, 0.0) | {
+                'age': np.nan, 'height_cm': np.nan, 'reach_cm': np.nan, 'win_pct': np.nan})
+            names[key] = bout[f"fighter_{side}"]
+            record = parse_record(_side_value(bout, side, 'record_at_fight'))
+            if record:
+                state['wins'], state['losses'], state['draws'] = map(float, record)
+            for field, source in (('age', None), ('height_cm', None), ('reach_cm', 'extras')):
+                value = _number(_side_value(bout, side, field, source))
+                if not np.isnan(value):
+                    state[field] = value
+            total = state['wins'] + state['losses'] + state['draws']
+            state['win_pct'] = state['wins'] / total if total else np.nan
+            before[side] = dict(state)
+
+        outcome = bout['outcome'].lower()
+        rows.append([before['a'][c] - before['b'][c] for c in STATE_COLUMNS]
+                    + [1.0 if outcome == 'win' else 0.0 if outcome == 'loss' else 0.5])
+
+        # Results of this bout feed the next one
+        for side, key, result in (('a', bout['_a'], outcome),
+                                  ('b', bout['_b'], data_cleanup.OUTCOME_FLIP.get(outcome, outcome).lower())):
+            state = states[key]
+            if result == 'win':
+                state['wins'] += 1
+                state['streak'] = max(state['streak'], 0) + 1
+                kind = method_kind(bout.get('method'))
+                if kind:
+                    state[f"{kind}_wins"] += 1
+            elif result == 'loss':
+                state['losses'] += 1
+                state['streak'] = min(state['streak'], 0) - 1
+            else:
+                state['draws'] += 1
+                state['streak'] = 0
+            total = state['wins'] + state['losses'] + state['draws']
+            state['win_pct'] = state['wins'] / total
+
+    features = pd.DataFrame(rows, columns=FEATURE_COLUMNS + ['label'])
+    # Variant spellings that resolve to each fighter, so lookups by any of them find the same state
+    variants = {}
+    for variant, key in bouts.attrs['aliases'].items():
+        variants.setdefault(key, []).append(variant)
+    fighters = pd.DataFrame([{'fighter_key': key, 'fighter': names[key], 'aliases': "|".join(variants.get(key, [])),
+                              **state} for key, state in states.items()],
+                            columns=['fighter_key', 'fighter', 'aliases'] + STATE_COLUMNS)
+    return features, fighters
+
+
+def load_features(path: str = file_read.DATA_PATH, feature_dir: str = FEATURE_DIR):
+    """Cached feature matrices for the current data version, built and stored on first use."""
+    import pyarrow.feather as feather
+    version = data_version(path)
+    bouts_path, fighters_path = feature_paths(version, feature_dir)
+    if os.path.exists(bouts_path) and os.path.exists(fighters_path):
+        return version, feather.read_feather(bouts_path), feather.read_feather(fighters_path)
+
+    features, fighters = build_features(data_cleanup.clean_data(file_read.readFile(path)))
+    os.makedirs(feature_dir, exist_ok=True)
+    for frame, target in ((features, bouts_path), (fighters, fighters_path)):
+        tmp = target + ".tmp"
+        feather.write_feather(frame, tmp, compression="uncompressed")
+        os.replace(tmp, target)
+    # Older versions are rebuilt on demand if ever needed again
+    for old in glob.glob(os.path.join(feature_dir, "*.feather")):
+        if not old.startswith(os.path.join(feature_dir, version + ".")):
+            os.remove(old)
+    print(f"Feature store {version}: {len(features)} bouts, {len(fighters)} fighters")
+    return version, features, fighters
+
+
+# ---------------- Model ----------------
+def symmetric(features: pd.DataFrame):
+    """Each bout seen from both corners, so P(A beats B) = 1 - P(B beats A) is learned."""
+    x = features[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    y = features['label'].to_numpy(dtype=np.float32)
+    return np.vstack([x, -x]), np.concatenate([y, 1 - y])
+
+
+def train(path: str = file_read.DATA_PATH, model_dir: str = MODEL_DIR) -> str:
+    """Train on the current feature store and save the booster; returns the model file."""
+    from xgboost import XGBClassifier
+    version, features, _fighters = load_features(path)
+    decided = features[features['label'] != 0.5]
+    if decided.empty:
+        raise RuntimeError("No decided bouts to train a win model on")
+    x, y = symmetric(decided)
+    model = XGBClassifier(**XGB_PARAMS)
+    model.fit(x, y)
+
+    target = model_path(version, model_dir)
+    os.makedirs(model_dir, exist_ok=True)
+    tmp = target + ".tmp.json"
+    model.get_booster().save_model(tmp)
+    os.replace(tmp, target)
+    for old in glob.glob(os.path.join(model_dir, "*.json")):
+        if old != target:
+            os.remove(old)
+    print(f"Trained win model {version} on {len(decided)} bouts -> {target}")
+    return target
+
+
+class WinPredictor:
+    """Loaded once: current state of every fighter as a matrix plus the booster; scores pairs in batches."""
+
+    def __init__(self, path: str = file_read.DATA_PATH, model_dir: str = MODEL_DIR):
+        import xgboost
+        self.version, _features, fighters = load_features(path)
+        target = model_path(self.version, model_dir)
+        if not os.path.exists(target):
+            target = train(path, model_dir)
+        self.booster = xgboost.Booster()
+        self.booster.load_model(target)
+
+        self.names = fighters['fighter'].tolist()
+        self.rows = {key: i for i, key in enumerate(fighters['fighter_key'])}
+        # Variant spelling -> canonical key (as in unique_bouts and the sidebar views)
+        self.aliases = {variant: key for key, variants in zip(fighters['fighter_key'], fighters['aliases'])
+                        for variant in variants.split("|") if variant}
+        # Trailing all-NaN row for fighters with no bouts on file (XGBoost treats NaN as missing)
+        states = fighters[STATE_COLUMNS].to_numpy(dtype=np.float32)
+        self.states = np.vstack([states, np.full((1, len(STATE_COLUMNS)), np.nan, dtype=np.float32)])
+        # In-memory LRU of scored matchups, keyed on the normalized fighter names
+        self._probability = functools.lru_cache(maxsize=PREDICTION_CACHE_SIZE)(self._score_pair)
+
+    def canonical(self, fighter) -> str:
+        """Lookup key of a fighter name, with variant spellings mapped to their canonical one."""
+        key = str(fighter).strip().lower()
+        return self.aliases.get(key, key)
+
+    def _row(self, fighter) -> int:
+        return self.rows.get(self.canonical(fighter), len(self.states) - 1)
+
+    def predict_pairs(self, pairs) -> np.ndarray:
+        """P(first fighter wins) for every (fighter_a, fighter_b) pair, in one booster call."""
+        pairs = list(pairs)
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+        a = np.fromiter((self._row(f) for f, _ in pairs), dtype=np.int64, count=len(pairs))
+        b = np.fromiter((self._row(f) for _, f in pairs), dtype=np.int64, count=len(pairs))
+        x = self.states[a] - self.states[b]
+        # Score both corners and average, so the two probabilities always sum to 1
+        p = self.booster.inplace_predict(np.vstack([x, -x]))
+        return (p[:len(pairs)] + 1 - p[len(pairs):]) / 2
+
+    def _score_pair(self, key_a: str, key_b: str) -> float:
+        return float(self.predict_pairs([(key_a, key_b)])[0])
+
+    def probability(self, fighter_a, fighter_b) -> float:
+        """P(fighter_a beats fighter_b), scored on first request and then served from the LRU."""
+        return self._probability(self.canonical(fighter_a), self.canonical(fighter_b))
+
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor() -> WinPredictor:
+    """Process-wide predictor, loaded (and trained if needed) on first use."""
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _predictor = WinPredictor()
+    return _predictor
+
+
+def loaded_predictor():
+    """The predictor if it is already loaded, else None (never trains; for request handlers)."""
+    return _predictor
+
+
+def reload(path: str = file_read.DATA_PATH):
+    """Rebuild features, retrain if needed and swap in a new predictor (after the data file changes)."""
+    global _predictor
+    predictor = WinPredictor(path)
+    with _predictor_lock:
+        _predictor = predictor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the win model or score matchups.")
+    parser.add_argument("command", choices=["train", "score"])
+    parser.add_argument("fighters", nargs="*", help="pairs of fighter names (score)")
+    parser.add_argument("--data", default=file_read.DATA_PATH)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train(args.data)
+    else:
+        if len(args.fighters) % 2:
+            parser.error("score takes fighter names in pairs")
+        pairs = list(zip(args.fighters[::2], args.fighters[1::2]))
+        for (a, b), p in zip(pairs, WinPredictor(args.data).predict_pairs(pairs)):
+            print(f"{a} vs {b}: {p:.1%} / {1 - p:.1%}")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app runs as flat modules from src/ (python main.py), so tests import them the same way
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+DATA_PATH = os.path.join(SRC_DIR, "master_data-rabindra-dhant.txt")
+sys.path.insert(0, SRC_DIR)
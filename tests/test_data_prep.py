@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import DATA_PATH
+import data_cleanup
+import data_prep
+import file_read
+
+# Missing markers, numbers, well-formed and malformed m:ss strings, surrounding whitespace
+VALUES = [None, np.nan, pd.NA, "", "  ", 0, 5, 7.5, np.int64(4), np.float64(2.0), "3:05", " 12:30 ", "0:00",
+          "1:2", "abc", "100:00", "3:05:00", "3 :05"]
+
+
+def same(a, b):
+    return (pd.isna(a) and pd.isna(b)) or a == b
+
+
+@pytest.mark.parametrize("position", range(len(VALUES)), ids=[repr(v) for v in VALUES])
+def test_to_seconds_series_matches_scalar(position):
+    value = VALUES[position]
+    expected = data_prep.to_seconds_mmss(value)
+    # Alone and mixed into a column of other values (dtype inference differs)
+    assert same(data_prep.to_seconds_mmss_series(pd.Series([value], dtype=object))[0], expected)
+    assert same(data_prep.to_seconds_mmss_series(pd.Series(VALUES, dtype=object))[position], expected)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "Int64", "string"])
+def test_to_seconds_series_matches_scalar_on_typed_columns(dtype):
+    values = [1, None, 90] if dtype != "string" else ["1:30", None, "", " 2:00", "x"]
+    series = pd.Series(values, dtype=dtype)
+    result = data_prep.to_seconds_mmss_series(series)
+    for value, got in zip(series, result):
+        assert same(got, data_prep.to_seconds_mmss(value))
+
+
+@pytest.mark.parametrize("first", VALUES, ids=repr)
+@pytest.mark.parametrize("second", [None, np.nan, pd.NA, "", "x", 3], ids=repr)
+def test_coalesce_series_matches_scalar(first, second):
+    expected = data_prep.coalesce(first, second)
+    got = data_prep.coalesce_series(pd.Series([first], dtype=object), pd.Series([second], dtype=object))[0]
+    assert same(got, expected)
+
+
+def test_expand_json_column_parses_the_batch_and_reports_fallbacks():
+    series = pd.Series(['{"a": 1}', None, "", '{"a": 2, "b": "x"}'], index=[10, 11, 12, 13])
+    parsed, expanded, fallback = data_prep.expand_json_column(series)
+    assert parsed.tolist() == [{"a": 1}, {}, {}, {"a": 2, "b": "x"}]
+    assert expanded["a"].tolist() == [1, pd.NA, pd.NA, 2] and fallback == []
+
+    # A python-literal cell breaks the batch parse; only it falls back
+    series[12] = "{'a': 3}"
+    parsed, expanded, fallback = data_prep.expand_json_column(series)
+    assert parsed[12] == {"a": 3} and fallback == [12]
+
+
+def test_clean_data_records_json_fallback_rows():
+    df, _ = file_read.parse_csv(DATA_PATH)
+    label = df.index[df["stats_json"].notna()][0]
+    df.loc[label, "stats_json"] = "{'fighter_a_record_at_fight': '1-0'}"
+    cleaned = data_cleanup.clean_data(df)
+    assert cleaned.attrs["json_fallback"]["stats_json"] == [label]
+    assert cleaned.loc[label, "fighter_a_record_at_fight"] == "1-0"
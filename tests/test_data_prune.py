@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_cleanup
+import data_prune
+import file_read
+from conftest import DATA_PATH
+
+
+def test_clean_data_columns_do_not_count_as_missing():
+    df, _ = file_read.parse_csv(DATA_PATH)
+    profile = data_prune.QualityProfile()
+    profile.update(data_cleanup.clean_data(df.copy()))
+    assert set(profile.column_rows) == set(df.columns)
+
+
+def test_rows_with_text_are_never_pruned():
+    df, _ = file_read.parse_csv(DATA_PATH)
+    df = data_cleanup.clean_data(df)
+    has_text = df["chunk_text"].astype("string").str.strip().fillna("").ne("")
+    pruned = data_prune.prune_missing_values(df, row_threshold=0.0)
+    assert set(df.index[has_text]) <= set(pruned.index)
+    assert len(pruned) < len(df) or has_text.all()
+
+
+def test_merged_and_reloaded_profiles_count_duplicates_across_chunks(tmp_path):
+    df, _ = file_read.parse_csv(DATA_PATH)
+    whole = data_prune.QualityProfile()
+    whole.update(df)
+
+    first, second = data_prune.QualityProfile(), data_prune.QualityProfile()
+    first.update(df.iloc[:10])
+    second.update(pd.concat([df.iloc[10:], df.iloc[:3]]))
+    path = str(tmp_path / "profile.npz")
+    first.save(path, batches_done=1)
+    reloaded, meta = data_prune.QualityProfile.load(path)
+    assert meta == {"batches_done": 1}
+    merged = reloaded.merge(second)
+    assert merged.duplicate_rows == whole.duplicate_rows + 3
+    assert merged.report()["rows"] == whole.report()["rows"] + 3
+
+
+class FailingService:
+    """Stands in for RetrievalService: accepts batches until fail_at."""
+
+    def __init__(self, fail_at=None):
+        self.fail_at, self.batches = fail_at, 0
+
+    def upsert_chunks(self, batch):
+        if self.batches == self.fail_at:
+            raise RuntimeError("interrupted")
+        self.batches += 1
+        return {}
+
+
+def test_resumed_stream_reports_the_whole_file(tmp_path, monkeypatch):
+    import stream_index
+    monkeypatch.chdir(tmp_path)
+    full = stream_index.run(DATA_PATH, batch_size=10, resume=False, service=FailingService())
+    with open(stream_index.quality_report_path(DATA_PATH)) as f:
+        expected = json.load(f)
+
+    with pytest.raises(RuntimeError):
+        stream_index.run(DATA_PATH, batch_size=10, resume=False, service=FailingService(fail_at=2))
+    resumed_service = FailingService()
+    resumed = stream_index.run(DATA_PATH, batch_size=10, resume=True, service=resumed_service)
+    with open(stream_index.quality_report_path(DATA_PATH)) as f:
+        report = json.load(f)
+    assert resumed_service.batches == full["batches_done"] - 2
+    assert report == expected
+
+
+def test_row_hashes_stay_in_few_sorted_runs():
+    df, _ = file_read.parse_csv(DATA_PATH)
+    doubled = pd.concat([df, df], ignore_index=True)
+    whole = data_prune.QualityProfile()
+    whole.update(doubled)
+    chunked = data_prune.QualityProfile()
+    for start in range(0, len(doubled), 3):
+        chunked.update(doubled.iloc[start:start + 3])
+    assert chunked.duplicate_rows == whole.duplicate_rows >= len(df)
+    assert len(chunked._row_hashes) <= 1 + int(np.log2(len(df)))
+    assert all((run[1:] > run[:-1]).all() for run in chunked._row_hashes)
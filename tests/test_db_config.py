@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import db_config
+import vector_store
+
+pytest.importorskip("faiss")
+
+
+class HashEncoder:
+    """Deterministic stand-in for the MiniLM embedder (verify only needs encode())."""
+
+    def encode(self, texts, show_progress_bar=False):
+        rng = np.random.default_rng(sum(map(ord, "".join(texts))))
+        vectors = rng.normal(size=(len(texts), 16)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_store(path, n):
+    ids = [f"chunk-{i}" for i in range(n)]
+    vectors = HashEncoder().encode(ids)
+    store = vector_store.open_store("faiss", str(path), kind="flat")
+    store.upsert(ids=ids, documents=ids, embeddings=vectors, metadatas=[{} for _ in ids])
+    return store, ids, vectors
+
+
+def test_verify_accepts_a_full_build(tmp_path):
+    store, ids, vectors = build_store(tmp_path, 12)
+    assert db_config.verify(store, HashEncoder(), ids, vectors, previous_count=12) == []
+
+
+def test_verify_rejects_a_build_that_shrank(tmp_path):
+    store, ids, vectors = build_store(tmp_path, 1)
+    problems = db_config.verify(store, HashEncoder(), ids, vectors, previous_count=12)
+    assert any("shrank from 12" in problem for problem in problems)
@@ -0,0 +1,68 @@
+import pytest
+from conftest import DATA_PATH
+import data_cleanup
+import file_read
+import fighter_views
+
+
+@pytest.fixture(scope="module")
+def views():
+    df, _quarantine = file_read.parse_csv(DATA_PATH)
+    return fighter_views.FighterViews(data_cleanup.clean_data(df))
+
+
+def test_career_knockouts_win_over_per_bout_counts(views):
+    # Profile pages say 7 (ko_tko_wins / knockout_wins); the MFN 17 preview printed 6 going in
+    assert views.profile("Rabindra Dhant")["knockouts"] == 7
+
+
+def test_knockouts_fall_back_to_ko_wins_on_file(views):
+    assert views.profile("Quillan Salkilld")["knockouts"] == 1
+
+
+def test_comparison_table_shows_extras_rows(views):
+    table = views.comparison_table("Rabindra Dhant", "Chungreng Koren").set_index("Attribute")
+    assert table.loc["Nationality", "Rabindra Dhant"] == "Nepalese"
+    assert table.loc["Team", "Rabindra Dhant"] == "Lock N Roll MMA"
+    assert table.loc["Knockouts", "Rabindra Dhant"] == "7"
+    assert "Nickname" in table.index
+
+
+def test_missing_age_and_height_show_as_not_available(views):
+    # clean_data's nullable dtypes leave pd.NA for Anshul Jubli's age and height
+    profile = views.profile("Anshul Jubli")
+    assert profile["age"] is None and profile["height_cm"] is None
+    table = views.comparison_table("Anshul Jubli", "Rabindra Dhant").set_index("Attribute")
+    assert table.loc["Age", "Anshul Jubli"] == "N/A"
+    assert table.loc["Height", "Anshul Jubli"] == "N/A"
+
+
+def test_name_variants_are_one_fighter(views):
+    assert "Chungren Koren" not in views.fighters()
+    assert views.profile("Chungren Koren") is views.profile("Chungreng Koren")
+    assert views.profile("Chungreng Koren")["record"] == (7, 2, 0)
+
+
+def test_mfn_17_is_one_fight_in_history(views):
+    history = views.profile("Rabindra Dhant")["history"]
+    assert [fight["event"] for fight in history] == ["Matrix Fight Night 17", "NWC 1"]
+    assert history[0]["opponent"] == "Chungreng Koren"
+
+
+def test_comparison_tables_are_bounded(views, monkeypatch):
+    monkeypatch.setattr(fighter_views, "TABLE_CACHE_SIZE", 2)
+    for name in ("Someone", "Someone Else", "A Third Name"):
+        views.comparison_table("Rabindra Dhant", name)
+    assert len(views._tables) == 2
+    assert ("rabindra dhant", "a third name", None) in views._tables
+
+
+def test_refresh_skips_an_unchanged_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # readFile writes its snapshot under ./.snapshots
+    views = fighter_views.FighterViews()
+    assert views.refresh(DATA_PATH)["fighters"] > 0
+
+    def fail(df):
+        raise AssertionError("clean_data ran for an unchanged file")
+    monkeypatch.setattr(data_cleanup, "clean_data", fail)
+    assert views.refresh(DATA_PATH) == {"fighters": 0, "events": 0}
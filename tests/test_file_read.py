@@ -0,0 +1,83 @@
+import os
+import csv
+import pandas as pd
+from conftest import DATA_PATH
+import file_read
+
+
+def csv_records(path: str = DATA_PATH):
+    """Header and non-blank logical records, split by the csv module (an independent parser)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return rows[0], [row for row in rows[1:] if any(field.strip() for field in row)]
+
+
+def splits_cleanly(row: list, header: list) -> bool:
+    """Whether the loader should accept a record: it fits the header, or only a stray empty
+    cell before extras_json makes it one field too long."""
+    shifted = header.index(file_read.SHIFTED_COLUMN)
+    return len(row) <= len(header) or (len(row) == len(header) + 1 and row[shifted] == ""
+                                       and row[shifted + 1].startswith("{"))
+
+
+def test_shipped_csv_rows_match_logical_records():
+    header, records = csv_records()
+    expected = [row[0] for row in records if splits_cleanly(row, header)]
+
+    df, quarantine = file_read.parse_csv(DATA_PATH)
+
+    assert len(df) == len(expected) == 26
+    # File order is kept and every record is either a row or one quarantine entry
+    assert df["item_id"].tolist() == expected
+    assert len(df) + len(quarantine) == len(records)
+
+
+def test_shipped_csv_has_no_duplicate_rows():
+    df, _quarantine = file_read.parse_csv(DATA_PATH)
+    assert not df.duplicated().any()
+    assert not df.duplicated(["item_id", "chunk_index"]).any()
+
+
+def test_quarantine_holds_whole_multiline_records():
+    header, records = csv_records()
+    _df, quarantine = file_read.parse_csv(DATA_PATH)
+    rejected = [row for row in records if not splits_cleanly(row, header)]
+
+    assert len(quarantine) == len(rejected)
+    for entry, row in zip(quarantine, rejected):
+        assert next(csv.reader([entry["text"].splitlines()[0]]))[0] == row[0]
+        assert len(next(csv.reader(entry["text"].splitlines(keepends=True)))) == len(row)
+
+
+def test_chunked_read_matches_full_parse():
+    df, _quarantine = file_read.parse_csv(DATA_PATH)
+    chunks = list(file_read.readFileChunks(DATA_PATH, chunksize=3))
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert streamed["item_id"].tolist() == df["item_id"].tolist()
+
+
+def test_stray_cell_before_extras_json_is_dropped():
+    df, _quarantine = file_read.parse_csv(DATA_PATH)
+    profile = df[df["item_id"] == "Dhant_profile"].iloc[0]
+    assert profile["stats_json"].startswith('{"pro_record":"9-1-0"')
+    assert profile["extras_json"].startswith('{"date_of_birth"')
+    assert len(profile["content_hash_sha1"]) == 40
+
+
+def test_cold_start_snapshot_is_atomic_and_keeps_other_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(file_read.SNAPSHOT_DIR)
+    stem = os.path.splitext(os.path.basename(DATA_PATH))[0]
+    checkpoint = os.path.join(file_read.SNAPSHOT_DIR, f"{stem}.stream_checkpoint.json")
+    stale = os.path.join(file_read.SNAPSHOT_DIR, f"{stem}.0000000000000000.p1.feather")
+    for name in (checkpoint, stale):
+        open(name, "w").close()
+
+    cold = file_read.readFile(DATA_PATH)
+    snapshot_path, _quarantine_path = file_read.snapshot_paths(DATA_PATH, file_read.file_sha1(DATA_PATH))
+
+    assert os.path.exists(snapshot_path) and os.path.exists(checkpoint)
+    assert not os.path.exists(stale)
+    assert not [name for name in os.listdir(file_read.SNAPSHOT_DIR) if name.endswith(".tmp")]
+    warm = file_read.readFile(DATA_PATH)
+    assert warm["item_id"].tolist() == cold["item_id"].tolist()
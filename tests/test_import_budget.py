@@ -0,0 +1,11 @@
+import pytest
+
+pytest.importorskip("gradio")
+pytest.importorskip("dotenv")
+
+import main
+
+
+def test_ui_import_is_within_budget():
+    # check_imports times `import gradio_ui` in a fresh interpreter
+    assert main.check_imports() == 0
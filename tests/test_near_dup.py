@@ -0,0 +1,29 @@
+import near_dup
+
+STORY = ("Chungreng Koren defeated Anshul Jubli by unanimous decision at Matrix Fight Night 17 "
+         "in New Delhi after three close rounds of grappling and clinch work against the cage")
+
+
+def test_signatures_are_cached_by_text():
+    near_dup._signature_cache.clear()
+    first = near_dup.signatures([STORY, STORY + " tonight"])
+    assert len(near_dup._signature_cache) == 2
+    again = near_dup.signatures([STORY])
+    assert len(near_dup._signature_cache) == 2
+    assert (again[0] == first[0]).all()
+
+
+def test_lsh_index_matches_earlier_batches_and_persists(tmp_path):
+    path = str(tmp_path / near_dup.LSH_FILE)
+    index = near_dup.LSHIndex(path)
+    index.add(["a"], near_dup.signatures([STORY]))
+    index.save()
+
+    reopened = near_dup.LSHIndex(path)
+    copy, other = near_dup.signatures([STORY + " tonight", "Weigh-in results for the featherweight card"])
+    assert reopened.match("b", copy) == "a"
+    assert reopened.match("a", copy) is None  # a chunk never matches itself
+    assert reopened.match("c", other) is None
+
+    reopened.remove(["a"])
+    assert len(reopened) == 0 and reopened.match("b", copy) is None
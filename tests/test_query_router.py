@@ -0,0 +1,63 @@
+import pytest
+from conftest import DATA_PATH
+import data_cleanup
+import file_read
+import fighter_views
+import query_router
+
+
+@pytest.fixture(scope="module")
+def router():
+    df, _quarantine = file_read.parse_csv(DATA_PATH)
+    views = fighter_views.FighterViews(data_cleanup.clean_data(df.copy()))
+    return query_router.QueryRouter(views, df)
+
+
+@pytest.mark.parametrize("question", [
+    "What is Dhant's record against Indian fighters?",
+    "What is Rabindra Dhant's record since 2023?",
+    "How many knockouts does Dhant have against opponents from India?",
+])
+def test_qualified_counts_fall_back_to_rag(router, question):
+    assert router.route(question) == (None, None)
+
+
+def test_record(router):
+    intent, answer = router.route("What is Dhant's record?")
+    assert intent == "record"
+    assert "**9-1-0**" in answer
+
+
+def test_knockout_count_uses_career_total(router):
+    intent, answer = router.route("How many knockouts does Rabindra Dhant have?")
+    assert intent == "method_count"
+    assert "**7**" in answer
+    # MFN 17 is listed once, under the canonical opponent spelling
+    assert answer.count("Matrix Fight Night 17") == 1
+    assert "Chungreng Koren" in answer
+
+
+def test_mfn_17_bout_is_not_duplicated(router):
+    history = router.views.profile("Rabindra Dhant")["history"]
+    assert sum(entry["event"] == "Matrix Fight Night 17" for entry in history) == 1
+    intent, answer = router.route("Who did Dhant fight at MFN 17?")
+    assert intent == "event_opponent"
+    assert "**Chungreng Koren**" in answer
+
+
+def test_variant_spelling_routes_to_the_same_fighter(router):
+    intent, answer = router.route("What was Chungren Koren's last fight?")
+    assert intent == "last_fight"
+    assert answer.startswith("Chungreng Koren's most recent fight")
+
+
+@pytest.mark.parametrize("question", ["How old is Anshul Jubli?", "How tall is Anshul Jubli?"])
+def test_missing_age_and_height_fall_back_to_rag(router, question):
+    # Neither is on file for Anshul Jubli (pd.NA after clean_data)
+    assert router.route(question) == (None, None)
+
+
+def test_age_on_file(router):
+    intent, answer = router.route("How old is Rabindra Dhant?")
+    assert intent == "age"
+    assert "**26**" in answer
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+import lexical
+import retrieval
+
+
+def matches_filters(metadata, filters):
+    """Per-chunk reading of where_clause: any listed fighter in either corner, and any listed event."""
+    fighters = filters.get("fighters") or []
+    events = filters.get("events") or []
+    if fighters and metadata["fighter_a"] not in fighters and metadata["fighter_b"] not in fighters:
+        return False
+    return not events or metadata["event_name"] in events
+
+
+def lexical_index(metadatas):
+    ids = [f"c{i}" for i in range(len(metadatas))]
+    index = {"bm25": lexical.BM25Index(ids, ["" for _ in ids]),
+             "metadatas": dict(zip(ids, metadatas)), "fighter_postings": {}, "event_postings": {}}
+    for pos, meta in enumerate(metadatas):
+        for name in {meta["fighter_a"], meta["fighter_b"]}:
+            index["fighter_postings"].setdefault(name, []).append(pos)
+        index["event_postings"].setdefault(meta["event_name"], []).append(pos)
+    for key in ("fighter_postings", "event_postings"):
+        index[key] = {name: np.array(p, dtype=np.int64) for name, p in index[key].items()}
+    return index
+
+
+def test_filtered_positions_match_metadata_scan():
+    metadatas = [
+        {"fighter_a": "A", "fighter_b": "B", "event_name": "E1"},
+        {"fighter_a": "A", "fighter_b": "C", "event_name": "E2"},
+        {"fighter_a": "C", "fighter_b": "D", "event_name": "E1"},
+        {"fighter_a": "B", "fighter_b": "A", "event_name": "E2"},
+    ]
+    index = lexical_index(metadatas)
+    for filters in ({"fighters": ["A"]}, {"fighters": ["A", "D"]}, {"events": ["E1"]},
+                    {"fighters": ["C"], "events": ["E2"]}, {"fighters": ["Nobody"]}, {}):
+        expected = [i for i, meta in enumerate(metadatas) if matches_filters(meta, filters)]
+        assert retrieval.filtered_positions(index, filters).tolist() == expected
+
+
+def test_lexical_index_is_built_in_pages_and_query_reads_hits_from_the_store(tmp_path, monkeypatch):
+    pytest.importorskip("faiss")
+    import functools
+    import threading
+    import vector_store
+
+    metadatas = [{"fighter_a": "Rabindra Dhant", "fighter_b": f"Opponent {i}", "event_name": f"Event {i % 2}",
+                  "entities": ""} for i in range(5)]
+    ids = [f"c{i}" for i in range(5)]
+    store = vector_store.open_store("faiss", str(tmp_path), kind="flat")
+    vectors = np.eye(5, 8, dtype=np.float32)
+    store.upsert(ids=ids, documents=[f"bout number {i} knockout" for i in range(5)], embeddings=vectors,
+                 metadatas=metadatas)
+
+    monkeypatch.setattr(retrieval, "LEXICAL_PAGE_SIZE", 2)
+    service = retrieval.RetrievalService.__new__(retrieval.RetrievalService)
+    service.store, service.follow_alias = store, False
+    service._lexical, service._lexical_lock = None, threading.Lock()
+    service._embed_query = functools.lru_cache(maxsize=4)(lambda text: vectors[3])
+
+    index = service._lexical_index()
+    assert "documents" not in index
+    assert index["event_postings"]["Event 1"].tolist() == [1, 3]
+    assert index["fighter_postings"]["Rabindra Dhant"].tolist() == [0, 1, 2, 3, 4]
+
+    result = service.query("bout number 3", n_results=2, filters={"events": ["Event 1"]})
+    assert result["ids"][0][0] == "c3"
+    assert set(result["ids"][0]) == {"c1", "c3"}
+    assert result["documents"][0][0] == "bout number 3 knockout"
+    assert result["metadatas"][0][0]["fighter_b"] == "Opponent 3"
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("gradio")
+pytest.importorskip("dotenv")
+pytest.importorskip("openai")
+
+from conftest import DATA_PATH
+import data_cleanup
+import fighter_views
+import file_read
+import query_router
+import stub_llm_server
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    monkeypatch.setattr(stub_llm_server, "TOKEN_DELAY_SECONDS", 0.0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub_llm_server.StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_chat_streams_incremental_updates(stub_server, tmp_path, monkeypatch):
+    # The answer cache and telemetry write relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    import gradio_ui
+
+    df, _quarantine = file_read.parse_csv(DATA_PATH)
+    views = fighter_views.FighterViews(data_cleanup.clean_data(df.copy()))
+    monkeypatch.setattr(query_router, "_router", query_router.QueryRouter(views, df))
+    # No vector index here: the question goes to the LLM with an empty context
+    monkeypatch.setattr(gradio_ui, "retrieve_context", lambda user_input: ("", "stub-key"))
+    monkeypatch.setattr(gradio_ui, "is_cacheable", lambda user_input, history: False)
+    monkeypatch.setattr(gradio_ui, "OPENAI_BASE_URL", stub_server)
+    monkeypatch.setattr(gradio_ui, "OPEN_API_KEY", "stub")
+    monkeypatch.setattr(gradio_ui, "_client", None)
+
+    async def collect():
+        answers = []
+        async for history, _state, _stats, _text in gradio_ui.chat_with_markdown(
+                "Tell me about Rabindra Dhant's background", []):
+            answers.append(history[-1][1])
+        return answers
+
+    answers = asyncio.run(collect())
+    # The empty placeholder, then one update per streamed word
+    assert len(answers) >= len(stub_llm_server.STUB_ANSWER.split(" "))
+    assert all(len(a) < len(b) for a, b in zip(answers, answers[1:]))
+    assert answers[-1] == f"🤖 {stub_llm_server.STUB_ANSWER}"
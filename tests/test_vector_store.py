@@ -0,0 +1,85 @@
+import os
+import numpy as np
+import pytest
+import vector_store
+
+pytest.importorskip("faiss")
+
+
+def unit_vectors(n, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def add(store, ids, vectors):
+    store.upsert(ids=ids, documents=[f"doc {i}" for i in ids], embeddings=vectors,
+                 metadatas=[{"id": i} for i in ids])
+
+
+@pytest.mark.parametrize("kind", ["flat", "hnsw", "ivf"])
+def test_upserts_append_and_write_once_on_commit(tmp_path, kind):
+    store = vector_store.FaissStore(str(tmp_path), kind)
+    vectors = unit_vectors(100)
+    add(store, [f"c{i}" for i in range(50)], vectors[:50])
+    add(store, [f"c{i}" for i in range(50, 100)], vectors[50:])
+
+    assert store.index.ntotal == 100 and store.count() == 100
+    assert not os.path.exists(tmp_path / "records.json")
+    store.commit()
+
+    reopened = vector_store.FaissStore(str(tmp_path), kind)
+    assert reopened.count() == 100
+    assert reopened.positions == store.positions
+    assert reopened.search(vectors[70], 1) == ["c70"]
+
+    # A loaded (memory-mapped, read-only) index is copied into memory on the first write
+    extra = unit_vectors(1, seed=2)
+    add(reopened, ["extra"], extra)
+    assert reopened.search(extra[0], 1) == ["extra"]
+
+
+def test_replaced_and_deleted_chunks_leave_tombstones(tmp_path):
+    store = vector_store.FaissStore(str(tmp_path), "flat")
+    vectors = unit_vectors(20)
+    add(store, [f"c{i}" for i in range(20)], vectors)
+    store.commit()
+
+    moved = unit_vectors(1, seed=1)
+    add(store, ["c3"], moved)
+    store.delete(["c5"])
+    assert store.index.ntotal == 21 and store.count() == 19
+    assert "c5" not in store.search(vectors[5], 20)
+    assert store.search(moved[0], 1) == ["c3"]
+    assert store.get(["c3"])["documents"] == ["doc c3"]
+    assert store.search(vectors[4], 3, allowed_ids=["c4", "c5"]) == ["c4"]
+
+    store.commit()
+    reopened = vector_store.FaissStore(str(tmp_path), "flat")
+    assert reopened.count() == 19 and reopened.search(moved[0], 1) == ["c3"]
+
+
+def test_commit_compacts_once_tombstones_pile_up(tmp_path):
+    store = vector_store.FaissStore(str(tmp_path), "hnsw")
+    vectors = unit_vectors(20)
+    add(store, [f"c{i}" for i in range(20)], vectors)
+    store.delete([f"c{i}" for i in range(10)])
+    store.commit()
+
+    assert store.index.ntotal == 10 and len(store.ids) == 10
+    assert store.positions == {f"c{i}": i - 10 for i in range(10, 20)}
+    assert store.search(vectors[15], 1) == ["c15"]
+
+
+def test_runtime_chroma_store_is_seeded_from_the_shipped_copy(tmp_path):
+    seed, runtime = tmp_path / "chroma_store", tmp_path / ".cache" / "chroma_store"
+    seed.mkdir()
+    (seed / "chroma.sqlite3").write_text("shipped")
+    vector_store.seed_chroma_store(str(runtime), str(seed))
+    assert (runtime / "chroma.sqlite3").read_text() == "shipped"
+
+    # Later writes go to the runtime copy only, and an existing copy is never re-seeded
+    (runtime / "chroma.sqlite3").write_text("synced")
+    vector_store.seed_chroma_store(str(runtime), str(seed))
+    assert (runtime / "chroma.sqlite3").read_text() == "synced"
+    assert (seed / "chroma.sqlite3").read_text() == "shipped"
+    assert not list((tmp_path / ".cache").glob("*.tmp"))
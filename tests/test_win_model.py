@@ -0,0 +1,39 @@
+import os
+import pytest
+from conftest import DATA_PATH
+import win_model
+
+pytest.importorskip("xgboost")
+
+
+@pytest.fixture(scope="module")
+def predictor(tmp_path_factory):
+    # Snapshots, features and the model are cached relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("win_model"))
+    try:
+        yield win_model.WinPredictor(DATA_PATH)
+    finally:
+        os.chdir(cwd)
+
+
+def test_pairs_are_scored_on_demand_into_a_bounded_lru(predictor):
+    p = predictor.probability("Rabindra Dhant", "Chungreng Koren")
+    assert predictor.probability(" rabindra dhant ", "chungreng koren") == p
+    info = predictor._probability.cache_info()
+    assert info.currsize == 1 and info.hits == 1
+    assert info.maxsize == win_model.PREDICTION_CACHE_SIZE
+
+
+def test_corners_sum_to_one(predictor):
+    forward, backward = predictor.predict_pairs([("Rabindra Dhant", "Chungreng Koren"),
+                                                 ("Chungreng Koren", "Rabindra Dhant")])
+    assert forward + backward == pytest.approx(1.0)
+
+
+def test_variant_spellings_score_as_the_canonical_fighter(predictor):
+    # "Chungren Koren" is a dataset spelling of Chungreng Koren
+    assert predictor.canonical("Chungren Koren") == "chungreng koren"
+    assert predictor.probability("Rabindra Dhant", "Chungren Koren") == \
+        predictor.probability("Rabindra Dhant", "Chungreng Koren")
+    assert predictor._row("Chungren Koren") == predictor._row("Chungreng Koren") != len(predictor.states) - 1